@@ -1,25 +1,48 @@
+import argparse
+import collections
+import os
 import sys
 import time
-import requests  # <--- NEW: Required for API calls
-from pylsl import StreamInlet, resolve_streams
+import numpy as np
+from pylsl import StreamInlet, resolve_streams, local_clock
+from clench_classifier import MODEL_PATH, ClenchClassifier
+from feature_engine import FEATURE_CHANNELS, SlidingFeatures
+from gesture_detector import PROFILE_PATH, ClenchStateMachine, load_profile, normalize, save_recording
+from signal_sender import SignalSender
 
-# Configuration for the Backend Server (FastAPI on port 8000)
-API_URL = "http://127.0.0.1:8000/api/signal"
+# Gestures go to the backend (FastAPI on port 8000) over a persistent /ws/ingest
+# connection from a background thread; see signal_sender.py
+sender: SignalSender | None = None
 
-def send_signal(action_name):
+TIME_CORRECTION_INTERVAL = 10  # Seconds between LSL clock offset refreshes
+CHUNK_MAX_SAMPLES = 1024       # Samples processed per block
+CHUNK_POLL_INTERVAL = 0.005    # Seconds to wait when no samples are pending
+DISPLAY_INTERVAL = 0.1         # Seconds between live value refreshes
+RANGE_CHECK_WINDOWS = 40       # Recent windows (5 s) checked against the classifier's training ranges
+
+# Thresholds and timing windows: defaults in gesture_detector.py, per-user profile from calibrate.py
+ACTION_NAMES = {
+    "RIGHT": "SINGLE CLENCH",
+    "DOWN": "DOUBLE CLENCH",
+    "SELECT": "HOLD",
+    "CORRECT_DOWN": "DOUBLE CLENCH (undo RIGHT)",
+}
+
+def send_signal(action_name, sample_time, corrects=None):
     """
-    Sends the action to the FastAPI backend on port 8000.
-    Uses a short timeout to prevent blocking the data stream loop.
+    Queues the action for the FastAPI backend on port 8000 and returns its seq.
+    Returns immediately so the data stream loop never waits on the network.
+    sample_time is the triggering sample's LSL timestamp on our local_clock().
+    corrects is the seq of the RIGHT a CORRECT_DOWN undoes.
     """
-    try:
-        payload = {"action": action_name, "timestamp": time.time()}
-        # timeout=0.2 ensures we don't lag the loop if the server is slow
-        requests.post(API_URL, json=payload, timeout=0.2)
-        print(f"\n>>> API SENT: {action_name}")
-    except requests.exceptions.RequestException:
-        print(f"\n>>> API ERROR: Could not connect to {API_URL}")
-
-def main():
+    detected = local_clock()
+    # Wall-clock time of the sample itself, not of when we got around to detecting it
+    timestamp = time.time() - (detected - sample_time)
+    seq = sender.send(action_name, timestamp, {"sample": sample_time, "detected": detected}, corrects)
+    print(f"\n>>> API QUEUED: {action_name} (#{seq})")
+    return seq
+
+def main(args):
     print("Searching for streams...")
     streams = resolve_streams()
     if not streams:
@@ -36,88 +59,99 @@ def main():
         sys.exit(1)
 
     inlet = StreamInlet(selected_stream)
-    
-    # --- TROUBLESHOOTING PARAMETERS ---
-    # Adjust these based on the live "VAL" printed in the console
-    THRESHOLD_HIGH = 0.9    # Point where clench is 'On'
-    THRESHOLD_LOW = 0.5     # Point where clench is 'Off' (Must be > Equilibrium)
-    HOLD_TIME = 2         # Seconds held to trigger 'HOLD'
-    DOUBLE_GAP_MAX = 1.5    # Max seconds to wait for a 2nd clench
-    # ----------------------------------
-
-    # State Variables
-    is_active = False
-    start_high_time = 0
-    end_high_time = 0
-    waiting_for_second = False
-    hold_triggered = False
-    current_state_label = "IDLE"
+
+    global sender
+    sender = SignalSender(clock=local_clock)
+
+    # Sample timestamps are on the stream source's clock; this maps them onto ours
+    time_correction = inlet.time_correction()
+    last_correction = time.time()
+
+    profile = load_profile(args.profile)
+    detector = ClenchStateMachine.from_profile(profile, speculative=args.speculative)
+    last_right = None  # Seq of the last RIGHT sent, named by a following CORRECT_DOWN
+    # Window features (RMS, MAV, ...) computed the same way clench_classifier.py computes them from --record sessions
+    features = SlidingFeatures.for_rate(selected_stream.nominal_srate())
+    window = features.features()
+    # Optional per-window classifier (clench_classifier.py, trained on --record sessions); shown next to the threshold detector
+    classifier = ClenchClassifier.load(args.model) if os.path.exists(args.model) else None
+    clench_probability = 0.0
+    recent_in_range = collections.deque(maxlen=RANGE_CHECK_WINDOWS)
+    range_warned = False
+    last_display = 0.0
+    # Raw blocks and sent gestures, kept only with --record (for bench_gestures.py)
+    recorded_times, recorded_samples, recorded_gestures = [], [], []
 
     print(f"\nMonitoring {selected_stream.name()}...")
+    source = args.profile if os.path.exists(args.profile) else "defaults, run calibrate.py to fit"
+    print("Profile (" + source + "): " + ", ".join(f"{k}={v:g}" for k, v in profile.items()))
+    if classifier:
+        print(f"Classifier ({args.model}): {classifier.info.get('kind')}, held-out accuracy "
+              f"{classifier.info.get('trained_on', {}).get('held_out_accuracy')}")
+    if args.speculative:
+        print("Speculative mode: single clenches are sent on release")
     print("Commands will print below. Live value is on the bottom line.\n")
 
     try:
         while True:
-            sample, timestamp = inlet.pull_sample()
-            if sample:
-                # --- Your Processing Logic ---
-                val = sample[0]
-                if val < 0.5:
-                    val = 0.5
-                avg = (val - 0.5) * 2 
-                # Note: equilibrium is now 0.0, max is 1.0
-                
-                current_time = time.time()
-
-                # LOGIC ENGINE
-                if avg > THRESHOLD_HIGH:
-                    if not is_active:
-                        # INITIAL CONTACT
-                        is_active = True
-                        start_high_time = current_time
-                        current_state_label = "CLENCHING"
-                        
-                        if waiting_for_second:
-                            print("\nACTION: DOUBLE CLENCH")
-                            send_signal("DOWN")
-                            waiting_for_second = False
-                    
-                    # HOLD DETECTION
-                    if not hold_triggered and (current_time - start_high_time) > HOLD_TIME:
-                        print("\nACTION: HOLD")
-                        send_signal("SELECT")
-                        hold_triggered = True
-                        waiting_for_second = False 
-
-                elif avg < THRESHOLD_LOW:
-                    if is_active:
-                        # RELEASE DETECTED
-                        is_active = False
-                        end_high_time = current_time
-                        current_state_label = "IDLE"
-                        
-                        if not hold_triggered:
-                            # Start waiting to see if it's a Single or the start of a Double
-                            waiting_for_second = True
-                            current_state_label = "WAITING (DOUBLE?)"
-                        
-                        hold_triggered = False 
-
-                # SINGLE CLENCH TIMEOUT
-                if waiting_for_second and not is_active:
-                    gap_duration = current_time - end_high_time
-                    if gap_duration > DOUBLE_GAP_MAX:
-                        print("\nACTION: SINGLE CLENCH")
-                        send_signal("RIGHT")
-                        waiting_for_second = False
-                        current_state_label = "IDLE"
-
-                # LIVE MONITORING (Updates on one line)
-                sys.stdout.write(f"\rVAL: {avg:.2f} | STATE: {current_state_label: <15}")
+            # Everything that arrived since the last pull, one timestamp per sample
+            chunk, timestamps = inlet.pull_chunk(timeout=0.0, max_samples=CHUNK_MAX_SAMPLES)
+            if not timestamps:
+                time.sleep(CHUNK_POLL_INTERVAL)
+                continue
+            if time.time() - last_correction > TIME_CORRECTION_INTERVAL:
+                time_correction = inlet.time_correction()
+                last_correction = time.time()
+
+            samples = np.asarray(chunk, dtype=float)
+            avg = normalize(samples[:, 0], profile["equilibrium"])
+            sample_times = np.asarray(timestamps) + time_correction
+            if args.record:
+                recorded_times.append(sample_times)
+                recorded_samples.append(samples)
+
+            windows = features.update(samples[:, :FEATURE_CHANNELS])
+            if len(windows):
+                window = windows[-1]
+                if classifier:
+                    clench_probability = classifier.predict_proba(windows)[-1]
+                    recent_in_range.extend(classifier.in_range(windows))
+
+            for action, sample_time in detector.process(avg, sample_times):
+                print(f"\nACTION: {ACTION_NAMES[action]}")
+                # A CORRECT_DOWN names the speculative RIGHT it undoes, so frontends that
+                # dropped that RIGHT (cooldown) don't undo an earlier one instead
+                seq = send_signal(action, sample_time, last_right if action == "CORRECT_DOWN" else None)
+                last_right = seq if action == "RIGHT" else None
+                recorded_gestures.append((action, sample_time))
+
+            # LIVE MONITORING (Updates on one line, a few times a second)
+            if time.time() - last_display > DISPLAY_INTERVAL:
+                model_text = ""
+                if classifier:
+                    # Mostly outside what the model was trained on (another user or headset, or record.py's EMG)
+                    outside = len(recent_in_range) == RANGE_CHECK_WINDOWS and np.mean(recent_in_range) < 0.5
+                    if outside and not range_warned:
+                        print(f"\nWarning: live features are outside {args.model}'s training ranges; P(CLENCH) is not shown")
+                        range_warned = True
+                    model_text = " | P(CLENCH): n/a" if outside else f" | P(CLENCH): {clench_probability:.2f}"
+                sys.stdout.write(f"\rVAL: {avg[-1]:.2f} | RMS: {window[0]:.2f}{model_text} | STATE: {detector.label: <15}")
                 sys.stdout.flush()
+                last_display = time.time()
 
     except KeyboardInterrupt:
         print("\n\nStream stopped.")
+    finally:
+        sender.close()
+        if args.record and recorded_times:
+            save_recording(args.record, np.concatenate(recorded_times), np.concatenate(recorded_samples), recorded_gestures)
+            print(f"Recording saved to {args.record}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Jaw clench detection from an LSL stream")
+    parser.add_argument("--speculative", action="store_true",
+                        help="Send single clenches on release; a second clench sends CORRECT_DOWN")
+    parser.add_argument("--profile", default=PROFILE_PATH, help="Calibrated thresholds and timing (calibrate.py)")
+    parser.add_argument("--model", default=MODEL_PATH, help="Per-window clench classifier (clench_classifier.py)")
+    parser.add_argument("--record", metavar="PATH", help="Save raw samples and gestures to this .npz on exit")
+    main(parser.parse_args())
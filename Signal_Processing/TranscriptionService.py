@@ -3,6 +3,7 @@ Ultra-Lightweight Transcription Service
 Fully threaded and non-blocking - will NOT freeze your system.
 """
 
+import os
 import threading
 import queue
 import requests
@@ -19,6 +20,8 @@ except ImportError:
 
 # Backend API endpoint
 API_URL = "http://127.0.0.1:8000/api/transcription"
+# Only frontends subscribed to /ws/transcription?device=<id> show our transcriptions
+DEVICE_ID = os.getenv("DEVICE_ID", "default")
 
 # Lightweight settings
 PHRASE_TIME_LIMIT = 5  # Max 5 seconds per phrase
@@ -36,7 +39,8 @@ def send_to_backend(text, speaker="Someone"):
         requests.post(API_URL, json={
             "text": text,
             "speaker": speaker,
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "device": DEVICE_ID
         }, timeout=0.5)
     except:
         pass  # Silently fail - don't block
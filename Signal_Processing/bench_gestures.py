@@ -0,0 +1,128 @@
+"""
+Replay recordings through the clench state machine in normal and speculative mode.
+
+    python bench_gestures.py session1.npz session2.npz   # made with ClenchDetection.py --record
+    python bench_gestures.py --synthetic 500              # generated gestures with known intent
+    python bench_gestures.py session1.npz --profile gesture_profile.json
+
+Both modes see the same samples. For every single clench the report gives how
+much earlier speculative mode sent its RIGHT, and how often a speculative RIGHT
+had to be corrected (the clench turned out to be the first half of a double),
+with how long the wrong cell stayed highlighted before the correction.
+"""
+
+import argparse
+import numpy as np
+from gesture_detector import ClenchStateMachine, DOUBLE_GAP_MAX, HOLD_TIME, default_profile, normalize, load_profile, load_recording, load_units
+
+SYNTHETIC_RATE = 250    # Samples per second
+REPLAY_BLOCK = 32       # Samples per process() call, about what the live loop pulls at 250 Hz
+GESTURE_MIX = {"RIGHT": 0.55, "DOWN": 0.3, "SELECT": 0.15}
+
+
+def synthetic_recording(gestures: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """Raw-scale (times, values, intended actions) with jittered clench lengths, gaps and noise."""
+    rng = np.random.default_rng(seed)
+    intents = list(rng.choice(list(GESTURE_MIX), size=gestures, p=list(GESTURE_MIX.values())))
+    clenches, t = [], 1.0
+    for intent in intents:
+        if intent == "SELECT":
+            length = HOLD_TIME + rng.uniform(0.3, 1.0)
+            clenches.append((t, t + length))
+        else:
+            length = rng.uniform(0.12, 0.45)
+            clenches.append((t, t + length))
+            if intent == "DOWN":
+                start = t + length + rng.uniform(0.15, 0.9)
+                length = rng.uniform(0.12, 0.45)
+                clenches.append((start, start + length))
+                t = start
+        t += length + DOUBLE_GAP_MAX + rng.uniform(0.3, 2.0)  # Users wait out the window between gestures
+
+    times = np.arange(0, t + 1.0, 1 / SYNTHETIC_RATE)
+    values = np.full(len(times), 0.3) + rng.normal(0, 0.02, len(times))
+    for start, end in clenches:
+        during = (times >= start) & (times < end)
+        values[during] = rng.uniform(0.97, 1.1) + rng.normal(0, 0.02, during.sum())
+    return times, values, intents
+
+
+def replay(times: np.ndarray, values: np.ndarray, speculative: bool, profile: dict) -> list[tuple[str, float]]:
+    detector = ClenchStateMachine.from_profile(profile, speculative=speculative)
+    avg = normalize(values, profile["equilibrium"])
+    events = []
+    for start in range(0, len(times), REPLAY_BLOCK):
+        events += detector.process(avg[start:start + REPLAY_BLOCK], times[start:start + REPLAY_BLOCK])
+    return events
+
+
+def resolve(events: list[tuple[str, float]]) -> tuple[list[tuple[str, float]], list[float]]:
+    """What the frontend ends up applying, and how long each corrected RIGHT was on screen."""
+    applied, shown = [], []
+    for action, t in events:
+        if action == "CORRECT_DOWN":
+            _, right_t = applied.pop()
+            shown.append(t - right_t)
+            action = "DOWN"
+        applied.append((action, t))
+    return applied, shown
+
+
+def spread_ms(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+    ms = np.asarray(values) * 1000
+    return f"mean {ms.mean():.0f} ms, p50 {np.percentile(ms, 50):.0f} ms, p95 {np.percentile(ms, 95):.0f} ms"
+
+
+def bench(recordings: list[tuple[str, np.ndarray, np.ndarray, list[str] | None]], profile: dict):
+    saved, shown = [], []
+    speculative_rights = corrections = mismatches = wrong = 0
+
+    for name, times, values, intents in recordings:
+        normal = replay(times, values, speculative=False, profile=profile)
+        speculative = replay(times, values, speculative=True, profile=profile)
+        applied, corrected_shown = resolve(speculative)
+        speculative_rights += sum(action == "RIGHT" for action, _ in speculative)
+        corrections += len(corrected_shown)
+        shown += corrected_shown
+
+        if [a for a, _ in applied] != [a for a, _ in normal]:
+            mismatches += 1
+            print(f"{name}: modes disagree on the resulting actions")
+            continue
+        saved += [n_t - s_t for (action, n_t), (_, s_t) in zip(normal, applied) if action == "RIGHT"]
+        if intents is not None and [a for a, _ in normal] != intents:
+            wrong += 1
+
+        counts = {action: sum(a == action for a, _ in normal) for action in ("RIGHT", "DOWN", "SELECT")}
+        print(f"{name}: {times[-1] - times[0]:.0f} s, {counts}")
+
+    print()
+    print(f"Single clench latency saved: {spread_ms(saved)} ({len(saved)} clenches)")
+    rate = corrections / speculative_rights if speculative_rights else 0.0
+    print(f"Speculative RIGHTs corrected: {corrections}/{speculative_rights} ({rate:.1%})")
+    print(f"Wrong cell shown before correction: {spread_ms(shown)}")
+    if mismatches:
+        print(f"Recordings where the modes disagree: {mismatches}")
+    if any(intents is not None for *_, intents in recordings):
+        print(f"Synthetic recordings detected differently from intent: {wrong}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="*", help=".npz files from ClenchDetection.py --record")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Also replay N generated gestures")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", help="Calibrated profile to detect with (default: built-in thresholds)")
+    args = parser.parse_args()
+
+    for path in args.recordings:
+        if load_units(path) != "lsl":
+            parser.error(f"{path} holds raw BrainFlow EMG (record.py); replay ClenchDetection.py --record sessions")
+    recordings = [(path, *load_recording(path), None) for path in args.recordings]
+    if args.synthetic:
+        recordings.append((f"synthetic ({args.synthetic} gestures)", *synthetic_recording(args.synthetic, args.seed)))
+    if not recordings:
+        parser.error("give recordings and/or --synthetic N")
+    bench(recordings, load_profile(args.profile) if args.profile else default_profile())
@@ -0,0 +1,241 @@
+"""
+Fit clench thresholds and timing windows to one user and save them as a profile.
+
+    python calibrate.py live1.npz live2.npz --output gesture_profile.json  # ClenchDetection.py --record
+
+ClenchDetection.py loads gesture_profile.json at startup (see --profile).
+
+Thresholds come from the rest noise and the user's weakest clenches: the low
+(release) threshold sits just above the loudest rest samples, the high (press)
+threshold well below the weakest clench peak. Cued recordings (labels 0 rest,
+1 clench) give rest and clench periods directly; live recordings are
+segmented first. record.py sessions are refused: they hold raw BrainFlow EMG,
+and thresholds fitted on that scale mean nothing to the LSL values the
+detector sees.
+
+Timing comes from live recordings, where clenches are the user's own rhythm
+rather than cue lengths. HOLD_TIME only has to outlast the longest tap and
+DOUBLE_GAP_MAX the longest pause inside a double clench, so each is set to
+a margin above that (p99); every second cut is saved on every SELECT and on
+every single clench in normal mode.
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+from gesture_detector import (
+    ClenchStateMachine, PROFILE_PATH, _first, default_profile, load_labels, load_recording, load_units, normalize,
+    save_profile
+)
+
+REST_MARGIN = 0.25       # Seconds around a clench not counted as rest
+NOISE_PERCENTILE = 99.5  # Rest level the release threshold has to clear
+WEAK_PERCENTILE = 10     # Clench peak the press threshold has to stay under
+LOW_FRACTION = 0.25      # Thresholds as a fraction of the way from rest noise to weak clench peak
+HIGH_FRACTION = 0.6
+TIMING_PERCENTILE = 99
+TIMING_MARGIN = 1.25     # Multiplier on the p99, plus TIMING_PAD seconds
+TIMING_PAD = 0.15
+HOLD_TIME_RANGE = (0.6, 4.0)
+DOUBLE_GAP_RANGE = (0.4, 3.0)
+MIN_EVENTS = 5           # Fewer taps or doubles than this and the default window is kept
+
+
+def clench_intervals(avg: np.ndarray, times: np.ndarray, high: float, low: float) -> list[tuple[float, float, float]]:
+    """(press time, release time, peak) of every clench, with the detector's hysteresis."""
+    above, below = avg > high, avg < low
+    clenches, i = [], 0
+    while True:
+        press = _first(above, i)
+        if press == len(avg):
+            return clenches
+        release = _first(below, press)
+        if release == len(avg):
+            return clenches  # Still clenched when the recording ended
+        clenches.append((float(times[press]), float(times[release]), float(avg[press:release].max())))
+        i = release + 1
+
+
+def rest_mask(times: np.ndarray, clenches: list[tuple[float, float, float]]) -> np.ndarray:
+    rest = np.ones(len(times), dtype=bool)
+    for start, end, _ in clenches:
+        rest[(times >= start - REST_MARGIN) & (times <= end + REST_MARGIN)] = False
+    return rest
+
+
+def provisional_clenches(avg: np.ndarray, times: np.ndarray) -> list[tuple[float, float, float]]:
+    """Clenches of a live recording found with thresholds relative to its own level, before any are fitted."""
+    floor, top = np.percentile(avg, 50), np.percentile(avg, 99.5)
+    return clench_intervals(avg, times, floor + 0.6 * (top - floor), floor + 0.3 * (top - floor))
+
+
+def live_labels(times: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Per-sample labels of a live recording: 1 clenched, 0 rest, -1 within REST_MARGIN of a clench."""
+    clenches = provisional_clenches(normalize(values, float(np.median(values))), times)
+    labels = np.where(rest_mask(times, clenches), 0, -1)
+    for start, end, _ in clenches:
+        labels[(times >= start) & (times < end)] = 1
+    return labels
+
+
+def cue_peaks(avg: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Peak of each run of clench-cued samples."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], labels == 1, [0])).astype(int)))
+    return np.array([avg[start:end].max() for start, end in zip(edges[0::2], edges[1::2])])
+
+
+def load_sessions(paths: list[str]) -> list[tuple[str, np.ndarray, np.ndarray, np.ndarray | None]]:
+    """(path, times, values, labels) per recording; raises ValueError for recordings that can't be calibrated on."""
+    sessions = []
+    for path in paths:
+        units = load_units(path)
+        if units != "lsl":
+            raise ValueError(
+                f"{path} holds {units} values (record.py), not the LSL stream values the detector thresholds; "
+                "calibrate on ClenchDetection.py --record sessions"
+            )
+        labels = load_labels(path)
+        if labels is not None:
+            missing = [name for label, name in ((0, "rest"), (1, "clench")) if not np.any(labels == label)]
+            if missing:
+                raise ValueError(f"{path} has no {' or '.join(missing)}-cued samples")
+        sessions.append((path, *load_recording(path), labels))
+    return sessions
+
+
+def fit_window(values: list[float], limits: tuple[float, float]) -> float | None:
+    if len(values) < MIN_EVENTS:
+        return None
+    window = np.percentile(values, TIMING_PERCENTILE) * TIMING_MARGIN + TIMING_PAD
+    return float(np.clip(window, *limits))
+
+
+def calibrate(paths: list[str]) -> tuple[dict, dict]:
+    """Returns (profile, report)."""
+    sessions = load_sessions(paths)
+    profile = default_profile()
+
+    # Equilibrium: the typical raw value at rest
+    rest_raw = [values[labels == 0] if labels is not None else values for _, _, values, labels in sessions]
+    profile["equilibrium"] = float(np.median(np.concatenate(rest_raw)))
+
+    # Provisional segmentation, so rest noise and clench peaks can be measured
+    noise, peaks = [], []
+    for _, times, values, labels in sessions:
+        avg = normalize(values, profile["equilibrium"])
+        if labels is not None:
+            noise.append(avg[labels == 0])
+            peaks.append(cue_peaks(avg, labels))
+            continue
+        clenches = provisional_clenches(avg, times)
+        noise.append(avg[rest_mask(times, clenches)])
+        peaks.append(np.array([peak for *_, peak in clenches]))
+
+    if not np.concatenate(peaks).size:
+        raise ValueError("No clenches found in the recordings")
+    if not np.concatenate(noise).size:
+        raise ValueError("No rest found in the recordings")
+    noise_level = float(np.percentile(np.concatenate(noise), NOISE_PERCENTILE))
+    weak_clench = float(np.percentile(np.concatenate(peaks), WEAK_PERCENTILE))
+    if weak_clench <= noise_level * 1.5:
+        raise ValueError(f"Clenches (p{WEAK_PERCENTILE} {weak_clench:.3f}) are not distinguishable from rest noise ({noise_level:.3f})")
+    profile["threshold_low"] = noise_level + LOW_FRACTION * (weak_clench - noise_level)
+    profile["threshold_high"] = noise_level + HIGH_FRACTION * (weak_clench - noise_level)
+
+    # Timing from live sessions, segmented with the fitted thresholds and split into gestures by the defaults
+    taps, double_gaps, between, holds = [], [], [], 0
+    for _, times, values, labels in sessions:
+        if labels is not None:
+            continue
+        avg = normalize(values, profile["equilibrium"])
+        clenches = clench_intervals(avg, times, profile["threshold_high"], profile["threshold_low"])
+        completes_double = False
+        for k, (start, end, _) in enumerate(clenches):
+            if end - start >= profile["hold_time"]:
+                holds += 1
+            else:
+                taps.append(end - start)
+            if k + 1 == len(clenches):
+                break
+            gap = clenches[k + 1][0] - end
+            next_is_tap = clenches[k + 1][1] - clenches[k + 1][0] < profile["hold_time"]
+            if gap < profile["double_gap_max"] and not completes_double and end - start < profile["hold_time"] and next_is_tap:
+                double_gaps.append(gap)
+                completes_double = True
+            else:
+                between.append(gap)
+                completes_double = False
+
+    hold_time = fit_window(taps, HOLD_TIME_RANGE)
+    double_gap_max = fit_window(double_gaps, DOUBLE_GAP_RANGE)
+    defaults = default_profile()
+    if hold_time is not None:
+        profile["hold_time"] = hold_time
+    if double_gap_max is not None:
+        profile["double_gap_max"] = double_gap_max
+
+    report = {
+        "rest_noise": noise_level,
+        "weak_clench": weak_clench,
+        "taps": len(taps),
+        "doubles": len(double_gaps),
+        "holds": holds,
+        "tap_p99": float(np.percentile(taps, TIMING_PERCENTILE)) if taps else None,
+        "double_gap_p99": float(np.percentile(double_gaps, TIMING_PERCENTILE)) if double_gaps else None,
+        # Pauses between separate gestures short enough to now read as a double clench
+        "merged_gestures": sum(gap < profile["double_gap_max"] for gap in between),
+        "timing_fitted": {"hold_time": hold_time is not None, "double_gap_max": double_gap_max is not None},
+        "saved_per_single_s": defaults["double_gap_max"] - profile["double_gap_max"],
+        "saved_per_select_s": defaults["hold_time"] - profile["hold_time"],
+    }
+    return profile, report
+
+
+def replay_counts(paths: list[str], profile: dict) -> dict:
+    counts = {"RIGHT": 0, "DOWN": 0, "SELECT": 0}
+    for path in paths:
+        times, values = load_recording(path)
+        for action, _ in ClenchStateMachine.from_profile(profile).process(normalize(values, profile["equilibrium"]), times):
+            counts[action] += 1
+    return counts
+
+
+def main(args):
+    try:
+        profile, report = calibrate(args.recordings)
+    except ValueError as e:
+        raise SystemExit(f"Calibration failed: {e}")
+    defaults = default_profile()
+
+    print(f"Rest noise (p{NOISE_PERCENTILE}): {report['rest_noise']:.3f}   weak clench (p{WEAK_PERCENTILE}): {report['weak_clench']:.3f}")
+    print(f"Taps: {report['taps']}   doubles: {report['doubles']}   holds: {report['holds']}")
+    for field in profile:
+        note = ""
+        if field in report["timing_fitted"] and not report["timing_fitted"][field]:
+            note = f"  (kept: fewer than {MIN_EVENTS} examples in live recordings)"
+        print(f"  {field:<15} {defaults[field]:>7.3f} -> {profile[field]:.3f}{note}")
+    print(f"Saved per single clench (normal mode): {report['saved_per_single_s']:.2f} s, per hold: {report['saved_per_select_s']:.2f} s")
+    if report["merged_gestures"]:
+        print(f"Warning: {report['merged_gestures']} pauses between separate gestures are shorter than the new double-clench window")
+
+    live = [path for path in args.recordings if load_labels(path) is None]
+    if live:
+        print(f"Replayed gestures with defaults: {replay_counts(live, defaults)}, with profile: {replay_counts(live, profile)}")
+
+    if args.dry_run:
+        return
+    save_profile(
+        profile, args.output,
+        fitted_from=[os.path.basename(path) for path in args.recordings],
+        fitted_at=time.strftime("%Y-%m-%d %H:%M:%S")
+    )
+    print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+", help=".npz sessions from record.py or ClenchDetection.py --record")
+    parser.add_argument("--output", default=PROFILE_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Print the fit without saving it")
+    main(parser.parse_args())
@@ -0,0 +1,229 @@
+"""
+Local per-window clench classifier: trained with scikit-learn, run with NumPy only.
+
+    python clench_classifier.py live1.npz live2.npz                            # ClenchDetection.py --record
+    python clench_classifier.py X_20261019_101500.npy y_20261019_101500.npy   # record.py output
+    python clench_classifier.py training_data.csv --model mlp                  # to_csv.py output
+
+Training fits a scaler and a logistic regression (or a small MLP) on the
+window features of feature_engine.py, log-compressed because EMG power
+spans orders of magnitude. The fitted model is exported to clench_model.json
+as the scaler and a list of dense layers. ClenchClassifier evaluates those
+with a few matrix products, so ClenchDetection can score every 125 ms window
+without scikit-learn installed and without a round trip to Wood Wide.
+
+Train on ClenchDetection.py --record sessions: they hold the LSL values the
+live loop computes its features from. Their windows are labeled by cue when
+the session has labels, otherwise with calibrate.py's clench segmentation.
+record.py and to_csv.py features are still accepted, but they come from raw
+BrainFlow EMG, on another scale.
+
+The model also keeps each feature's training range, and ClenchDetection
+stops showing a probability while live windows fall outside them (another
+user or headset, or a model trained on BrainFlow features).
+"""
+
+import argparse
+import csv
+import json
+import time
+import numpy as np
+from calibrate import live_labels
+from feature_engine import DEFAULT_SAMPLING_RATE, FEATURE_CHANNELS, FEATURE_NAMES, SlidingFeatures
+from gesture_detector import load_labels, load_units
+
+MODEL_PATH = "clench_model.json"
+HOLDOUT_FRACTION = 0.2  # Last part of the data, kept out of training to report accuracy
+MLP_HIDDEN = (16,)
+RANGE_MARGIN = 0.25  # How far past a feature's training range (log1p scale, fraction of its width) still counts as inside
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+}
+
+
+def transform(X: np.ndarray) -> np.ndarray:
+    """Log-compress features; rms, mav and peak grow with amplitude, variance with its square."""
+    return np.log1p(np.abs(np.asarray(X, dtype=float)))
+
+
+class ClenchClassifier:
+    def __init__(self, model: dict):
+        self.mean = np.asarray(model["mean"])
+        self.scale = np.asarray(model["scale"])
+        self.layers = [
+            (np.asarray(layer["weights"]), np.asarray(layer["bias"]), ACTIVATIONS[layer["activation"]])
+            for layer in model["layers"]
+        ]
+        self.threshold = model.get("threshold", 0.5)
+        self.info = {k: v for k, v in model.items() if k not in ("mean", "scale", "layers", "feature_ranges")}
+        self.range_low = self.range_high = None
+        if "feature_ranges" in model:  # Models exported before ranges were stored accept anything
+            low, high = transform(model["feature_ranges"]["min"]), transform(model["feature_ranges"]["max"])
+            self.range_low = low - RANGE_MARGIN * (high - low)
+            self.range_high = high + RANGE_MARGIN * (high - low)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "ClenchClassifier":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Clench probability per row of X, shape (windows, 5) in FEATURE_NAMES order."""
+        h = (transform(np.atleast_2d(X)) - self.mean) / self.scale
+        for weights, bias, activation in self.layers:
+            h = activation(h @ weights + bias)
+        return h[:, 0]
+
+    def in_range(self, X: np.ndarray) -> np.ndarray:
+        """Per row of X, whether every feature lies within the training range (with RANGE_MARGIN)."""
+        X = transform(np.atleast_2d(X))
+        if self.range_low is None:
+            return np.ones(len(X), dtype=bool)
+        return np.all((X >= self.range_low) & (X <= self.range_high), axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.predict_proba(X) >= self.threshold
+
+    def detect_single(self, features: dict[str, float]) -> dict:
+        """Same result shape as MockWoodWideClient.detect_single."""
+        p = float(self.predict_proba([features.get(name, 0.0) for name in FEATURE_NAMES])[0])
+        return {"is_clench": p >= self.threshold, "confidence": p}
+
+
+def session_windows(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Features and labels of a ClenchDetection.py --record session, computed as the live loop
+    computes them. Like record.py, windows never span two labels; samples near a clench
+    edge (label -1) are left out.
+    """
+    units = load_units(path)
+    if units != "lsl":
+        raise ValueError(f"{path} holds {units} values (record.py); give its X/y .npy pair or a --record session")
+    with np.load(path) as data:
+        times, samples = data["times"], data["samples"][:, :FEATURE_CHANNELS]
+    labels = load_labels(path)
+    if labels is None:
+        labels = live_labels(times, samples[:, 0])
+    rate = 1 / np.median(np.diff(times)) if len(times) > 1 else DEFAULT_SAMPLING_RATE
+    engine = SlidingFeatures.for_rate(rate)
+
+    X, y = [], []
+    edges = np.flatnonzero(np.diff(labels)) + 1
+    for start, end in zip(np.concatenate(([0], edges)), np.concatenate((edges, [len(labels)]))):
+        if labels[start] < 0:
+            continue
+        engine.reset()
+        features = engine.update(samples[start:end])
+        X.append(features)
+        y.append(np.full(len(features), labels[start]))
+    if not X:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0, dtype=int)
+    return np.concatenate(X), np.concatenate(y)
+
+
+def load_training_data(paths: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Features and labels from ClenchDetection.py --record .npz sessions, record.py X/y .npy
+    pairs and/or to_csv.py CSVs, concatenated in order.
+    """
+    X, y = [], []
+    for path in paths:
+        if path.endswith(".npz"):
+            features, labels = session_windows(path)
+            X.append(features)
+            y.append(labels)
+    npy = [path for path in paths if path.endswith(".npy")]
+    for x_path, y_path in zip(npy[0::2], npy[1::2]):
+        X.append(np.load(x_path))
+        y.append(np.load(y_path))
+    for path in paths:
+        if path.endswith(".csv"):
+            with open(path, newline="") as f:
+                rows = list(csv.DictReader(f))
+            X.append(np.array([[float(row[name]) for name in FEATURE_NAMES] for row in rows]))
+            y.append(np.array([int(row["is_clench"]) for row in rows]))
+    if not X or len(npy) % 2:
+        raise ValueError("Give --record .npz sessions, record.py X/y .npy pairs (X first) and/or to_csv.py .csv files")
+    return np.concatenate(X), np.concatenate(y)
+
+
+def train(X: np.ndarray, y: np.ndarray, kind: str = "logistic") -> tuple:
+    """Fit on X, y. Returns (exported model as a JSON-serializable dict, fitted estimator, scaler)."""
+    # Imported here so loading a model for the live loop never pulls in scikit-learn
+    try:
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.neural_network import MLPClassifier
+        from sklearn.preprocessing import StandardScaler
+    except ImportError:
+        raise RuntimeError("Training needs scikit-learn. Run: pip install scikit-learn")
+    classes = np.unique(y)
+    if len(classes) < 2:
+        found = f"only label {int(classes[0])}" if len(classes) else "no windows"
+        raise ValueError(f"Training data has {found}; it needs both rest (0) and clench (1) windows")
+    scaler = StandardScaler().fit(transform(X))
+    Z = scaler.transform(transform(X))
+
+    if kind == "mlp":
+        estimator = MLPClassifier(hidden_layer_sizes=MLP_HIDDEN, max_iter=2000, random_state=0).fit(Z, y)
+        activations = ["relu"] * len(MLP_HIDDEN) + ["sigmoid"]
+        layers = list(zip(estimator.coefs_, estimator.intercepts_, activations))
+    else:
+        estimator = LogisticRegression(max_iter=1000).fit(Z, y)
+        layers = [(estimator.coef_.T, estimator.intercept_, "sigmoid")]
+
+    return {
+        "kind": kind,
+        "features": list(FEATURE_NAMES),
+        "transform": "log1p",
+        "mean": scaler.mean_.tolist(),
+        "scale": scaler.scale_.tolist(),
+        "layers": [
+            {"weights": weights.tolist(), "bias": bias.tolist(), "activation": activation}
+            for weights, bias, activation in layers
+        ],
+        "threshold": 0.5,
+        "feature_ranges": {"min": X.min(axis=0).tolist(), "max": X.max(axis=0).tolist()},
+    }, estimator, scaler
+
+
+def main(args):
+    X, y = load_training_data(args.data)
+    split = int(len(X) * (1 - HOLDOUT_FRACTION))
+    print(f"Windows: {len(X)} ({int(y.sum())} clench), training on the first {split}")
+
+    try:
+        model, estimator, scaler = train(X[:split], y[:split], args.model)
+    except ValueError as e:
+        raise SystemExit(f"Training failed on the first {split} windows: {e}")
+    classifier = ClenchClassifier(model)
+
+    held_out = classifier.predict(X[split:])
+    accuracy = float(np.mean(held_out == y[split:].astype(bool))) if len(held_out) else None
+    exported = classifier.predict_proba(X)
+    reference = estimator.predict_proba(scaler.transform(transform(X)))[:, 1]
+    print(f"Held-out accuracy: {accuracy:.3f}" if accuracy is not None else "No held-out windows")
+    print(f"Exported vs scikit-learn max difference: {np.max(np.abs(exported - reference)):.2e}")
+
+    # One live window per call, as ClenchDetection does every 125 ms, and a whole session at once
+    start = time.perf_counter()
+    for row in X[:1000]:
+        classifier.predict_proba(row)
+    single_us = (time.perf_counter() - start) / min(len(X), 1000) * 1e6
+    start = time.perf_counter()
+    classifier.predict_proba(X)
+    batch_us = (time.perf_counter() - start) / len(X) * 1e6
+    print(f"Prediction: {single_us:.1f} us per single window, {batch_us:.3f} us per window in a batch")
+
+    model["trained_on"] = {"windows": split, "held_out_accuracy": round(accuracy, 4) if accuracy is not None else None}
+    with open(args.output, "w") as f:
+        json.dump(model, f)
+    print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data", nargs="+", help="--record .npz sessions, record.py X_*.npy y_*.npy pairs and/or to_csv.py .csv files")
+    parser.add_argument("--model", choices=("logistic", "mlp"), default="logistic")
+    parser.add_argument("--output", default=MODEL_PATH)
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+"""
+Sliding-window EMG features, shared by record.py (offline) and ClenchDetection (live).
+
+Each sample is first aggregated across channels (root mean square over the
+channels). Over a window of the last `window` aggregated values the engine
+keeps a running sum and sum of squares, and a monotonic deque of candidates
+for the peak, so every new sample costs the same regardless of window
+length. Features are emitted every `step` samples once the window is full:
+
+    rms, mav, variance, peak, peak_to_rms
+
+The running sums are recomputed exactly from the window every RESYNC
+samples so rounding error cannot accumulate over a long session.
+"""
+
+import collections
+import numpy as np
+
+FEATURE_NAMES = ("rms", "mav", "variance", "peak", "peak_to_rms")
+WINDOW_LENGTH_MS = 250  # record.py: 50 samples at 200 Hz
+STEP_MS = 125           # record.py: 25 samples at 200 Hz
+FEATURE_CHANNELS = 2    # Channels aggregated into window features, as in record.py
+DEFAULT_SAMPLING_RATE = 200  # For streams without a nominal rate (LSL reports 0 for irregular streams)
+RESYNC = 10000          # Samples between exact recomputations of the running sums
+
+
+class SlidingFeatures:
+    def __init__(self, window: int, step: int):
+        self.window = window
+        self.step = step
+        self.reset()
+
+    @classmethod
+    def for_rate(cls, sampling_rate: float) -> "SlidingFeatures":
+        """WINDOW_LENGTH_MS windows every STEP_MS at the given sampling rate."""
+        sampling_rate = sampling_rate or DEFAULT_SAMPLING_RATE
+        return cls(max(1, round(sampling_rate * WINDOW_LENGTH_MS / 1000)), max(1, round(sampling_rate * STEP_MS / 1000)))
+
+    def reset(self):
+        """Forget all samples; the next window starts with the next sample."""
+        self.values: collections.deque[float] = collections.deque(maxlen=self.window)
+        self.peaks: collections.deque[tuple[int, float]] = collections.deque()  # (index, value), values decreasing
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.count = 0
+
+    def push(self, value: float) -> bool:
+        """Add one aggregated sample. Returns whether a window completes here."""
+        if len(self.values) == self.window:
+            oldest = self.values[0]
+            self.total -= oldest
+            self.total_sq -= oldest * oldest
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+        while self.peaks and self.peaks[-1][1] <= value:
+            self.peaks.pop()
+        self.peaks.append((self.count, value))
+        if self.peaks[0][0] <= self.count - self.window:
+            self.peaks.popleft()
+
+        self.count += 1
+        if self.count % RESYNC == 0:
+            self.total = float(sum(self.values))
+            self.total_sq = float(sum(v * v for v in self.values))
+        return self.count >= self.window and (self.count - self.window) % self.step == 0
+
+    def features(self) -> list[float]:
+        """Features of the current (possibly still filling) window."""
+        n = len(self.values)
+        if n == 0:
+            return [0.0] * len(FEATURE_NAMES)
+        mean_sq = max(self.total_sq / n, 0.0)
+        rms = mean_sq ** 0.5
+        mav = self.total / n  # Aggregated values are non-negative, so this is the mean absolute value
+        variance = max(mean_sq - mav * mav, 0.0)
+        peak = self.peaks[0][1]
+        return [rms, mav, variance, peak, peak / rms if rms > 0 else 0]
+
+    def update(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Add a block of samples, shape (samples, channels). Returns one row of
+        features per window completed within the block, shape (windows, 5).
+        """
+        aggregated = np.sqrt(np.mean(np.asarray(chunk, dtype=float) ** 2, axis=1))
+        rows = [self.features() for value in aggregated.tolist() if self.push(value)]
+        return np.array(rows).reshape(-1, len(FEATURE_NAMES))
+
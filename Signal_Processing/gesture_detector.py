@@ -0,0 +1,227 @@
+"""
+Clench gesture state machine, shared by the live detector and offline tools.
+
+Samples are processed in blocks: normalization and thresholding are NumPy
+operations over the whole block, and the state machine jumps straight to
+the next sample where something can happen (a press, a release, the hold
+deadline, the double-clench deadline) instead of stepping through every
+sample in Python. Timing uses each sample's own timestamp, so gestures are
+measured on the signal rather than on when a block happened to be read.
+
+In speculative mode a single clench is sent as RIGHT the moment it is
+released instead of DOUBLE_GAP_MAX later. If a second clench follows within
+the window, CORRECT_DOWN is sent instead of DOWN: consumers undo the
+speculative RIGHT and then move down.
+
+The defaults below suit nobody in particular; calibrate.py fits them to a
+user's recordings and saves a profile that ClenchDetection loads at startup.
+"""
+
+import json
+import os
+import numpy as np
+
+# Defaults; calibrate.py fits per-user values (or adjust based on the live "VAL" printed by ClenchDetection)
+THRESHOLD_HIGH = 0.9    # Point where clench is 'On'
+THRESHOLD_LOW = 0.5     # Point where clench is 'Off' (Must be > Equilibrium)
+HOLD_TIME = 2           # Seconds held to trigger 'HOLD'
+DOUBLE_GAP_MAX = 1.5    # Max seconds to wait for a 2nd clench
+
+EQUILIBRIUM = 0.5       # Raw value at rest
+
+PROFILE_PATH = "gesture_profile.json"
+PROFILE_FIELDS = ("threshold_high", "threshold_low", "hold_time", "double_gap_max", "equilibrium")
+
+# Actions sent to the backend. CORRECT_DOWN = "the RIGHT just sent was the first half of a double clench"
+ACTIONS = ("RIGHT", "DOWN", "SELECT", "CORRECT_DOWN")
+
+
+def normalize(values: np.ndarray, equilibrium: float = EQUILIBRIUM) -> np.ndarray:
+    """Raw channel values to 0.0 (equilibrium) .. 1.0 (max)."""
+    return (np.maximum(values, equilibrium) - equilibrium) * 2
+
+
+def _first(mask: np.ndarray, start: int = 0) -> int:
+    """Index of the first True in mask[start:], or len(mask) if there is none."""
+    if start >= len(mask):
+        return len(mask)
+    offset = int(mask[start:].argmax())
+    return start + offset if mask[start + offset] else len(mask)
+
+
+class ClenchStateMachine:
+    """
+    Single clench -> RIGHT (after DOUBLE_GAP_MAX with no second clench, or on
+    release when speculative), double clench -> DOWN (CORRECT_DOWN when
+    speculative), hold past HOLD_TIME -> SELECT.
+    """
+
+    def __init__(
+        self,
+        threshold_high: float = THRESHOLD_HIGH,
+        threshold_low: float = THRESHOLD_LOW,
+        hold_time: float = HOLD_TIME,
+        double_gap_max: float = DOUBLE_GAP_MAX,
+        speculative: bool = False
+    ):
+        self.threshold_high = threshold_high
+        self.threshold_low = threshold_low
+        self.hold_time = hold_time
+        self.double_gap_max = double_gap_max
+        self.speculative = speculative
+
+        self.is_active = False
+        self.start_high_time = 0.0
+        self.end_high_time = 0.0
+        self.waiting_for_second = False
+        self.second_clench = False  # This clench completed a double; its release starts nothing
+        self.hold_triggered = False
+        self.label = "IDLE"
+
+    @classmethod
+    def from_profile(cls, profile: dict, speculative: bool = False) -> "ClenchStateMachine":
+        return cls(
+            threshold_high=profile["threshold_high"],
+            threshold_low=profile["threshold_low"],
+            hold_time=profile["hold_time"],
+            double_gap_max=profile["double_gap_max"],
+            speculative=speculative
+        )
+
+    def process(self, avg: np.ndarray, times: np.ndarray) -> list[tuple[str, float]]:
+        """
+        Feed a block of normalized values and their sample times (seconds, ascending).
+        Returns the (action, sample time) pairs triggered within the block, in order.
+        """
+        high = avg > self.threshold_high
+        low = avg < self.threshold_low
+        events: list[tuple[str, float]] = []
+        i, n = 0, len(avg)
+
+        while i < n:
+            if not self.is_active:
+                press = _first(high, i)
+                if self.waiting_for_second:
+                    # SINGLE CLENCH TIMEOUT: the first sample past the gap, unless a press comes first
+                    timeout = _first(times[i:press] - self.end_high_time > self.double_gap_max) + i
+                    if timeout < press:
+                        if not self.speculative:  # Otherwise RIGHT already went out on release
+                            events.append(("RIGHT", float(times[timeout])))
+                        self.waiting_for_second = False
+                        self.label = "IDLE"
+                        i = timeout + 1
+                        continue
+                if press == n:
+                    break
+
+                # INITIAL CONTACT
+                self.is_active = True
+                self.start_high_time = float(times[press])
+                self.label = "CLENCHING"
+                if self.waiting_for_second:
+                    events.append(("CORRECT_DOWN" if self.speculative else "DOWN", self.start_high_time))
+                    self.waiting_for_second = False
+                    self.second_clench = True
+                i = press
+            else:
+                release = _first(low, i)
+                if not self.hold_triggered:
+                    # HOLD DETECTION: only while above the high threshold
+                    held = high[i:release] & (times[i:release] - self.start_high_time > self.hold_time)
+                    hold = _first(held) + i
+                    if hold < release:
+                        events.append(("SELECT", float(times[hold])))
+                        self.hold_triggered = True
+                        self.waiting_for_second = False
+                        i = hold + 1
+                        continue
+                if release == n:
+                    break
+
+                # RELEASE DETECTED
+                self.is_active = False
+                self.end_high_time = float(times[release])
+                self.label = "IDLE"
+                if not self.hold_triggered and not self.second_clench:
+                    # Start waiting to see if it's a Single or the start of a Double
+                    self.waiting_for_second = True
+                    self.label = "WAITING (DOUBLE?)"
+                    if self.speculative:
+                        events.append(("RIGHT", self.end_high_time))
+                self.hold_triggered = False
+                self.second_clench = False
+                i = release + 1
+
+        return events
+
+
+def default_profile() -> dict:
+    return {
+        "threshold_high": THRESHOLD_HIGH,
+        "threshold_low": THRESHOLD_LOW,
+        "hold_time": HOLD_TIME,
+        "double_gap_max": DOUBLE_GAP_MAX,
+        "equilibrium": EQUILIBRIUM,
+    }
+
+
+def load_profile(path: str = PROFILE_PATH) -> dict:
+    """Calibrated profile from calibrate.py, with defaults for anything missing; defaults if there is no file."""
+    profile = default_profile()
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        profile.update({field: float(saved[field]) for field in PROFILE_FIELDS if field in saved})
+    return profile
+
+
+def save_profile(profile: dict, path: str = PROFILE_PATH, **metadata):
+    """Write the profile fields, plus metadata such as what it was fitted from, as JSON."""
+    with open(path, "w") as f:
+        json.dump({**{field: round(float(profile[field]), 4) for field in PROFILE_FIELDS}, **metadata}, f, indent=2)
+
+
+def save_recording(
+    path: str,
+    times: np.ndarray,
+    samples: np.ndarray,
+    gestures: list[tuple[str, float]] = (),
+    labels: np.ndarray | None = None,
+    units: str = "lsl"
+):
+    """
+    Save raw samples (one row per sample, all channels) with their times and the gestures sent.
+    labels optionally gives each sample's cue (record.py: 0 rest, 1 clench, -1 before the first cue).
+    units is "lsl" for the stream values ClenchDetection thresholds (EQUILIBRIUM at rest)
+    or "brainflow" for record.py's raw EMG, which the thresholds do not apply to.
+    """
+    arrays = {
+        "times": np.asarray(times, dtype=float),
+        "samples": np.asarray(samples, dtype=float),
+        "gesture_actions": np.array([action for action, _ in gestures], dtype=str),
+        "gesture_times": np.array([t for _, t in gestures], dtype=float),
+        "units": np.array(units),
+    }
+    if labels is not None:
+        arrays["labels"] = np.asarray(labels, dtype=np.int8)
+    np.savez_compressed(path, **arrays)
+
+
+def load_recording(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """(times, channel 0 raw values) of a recording made with save_recording."""
+    with np.load(path) as data:
+        return data["times"], data["samples"][:, 0]
+
+
+def load_labels(path: str) -> np.ndarray | None:
+    """Per-sample cue labels of a recording, or None for unlabeled (live) recordings."""
+    with np.load(path) as data:
+        return data["labels"] if "labels" in data else None
+
+
+def load_units(path: str) -> str:
+    """Units of a recording's samples (see save_recording); older files: labeled ones came from record.py."""
+    with np.load(path) as data:
+        if "units" in data:
+            return str(data["units"])
+        return "brainflow" if "labels" in data else "lsl"
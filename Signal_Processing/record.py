@@ -3,6 +3,8 @@ import sys
 import time
 import numpy as np
 from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+from feature_engine import FEATURE_NAMES, SlidingFeatures
+from gesture_detector import save_recording
 
 # Settings
 SAMPLING_RATE = 200
@@ -12,6 +14,11 @@ WINDOW_SAMPLES = int(SAMPLING_RATE * WINDOW_LENGTH_MS / 1000)  # 50 samples
 STEP_SAMPLES = 25
 NUM_TRIALS = 20
 
+# BrainFlow reserves marker 0 for "no marker", so each cue needs a non-zero value
+CLENCH_MARKER = 1
+REST_MARKER = 2
+MARKER_LABELS = {REST_MARKER: 0, CLENCH_MARKER: 1}
+
 # Setup board
 params = BrainFlowInputParams()
 params.serial_port = "COM3"
@@ -38,6 +45,7 @@ pygame.mouse.set_visible(False)
 
 emg_channels = BoardShim.get_emg_channels(board_id)[:NUM_CHANNELS]
 marker_channel = BoardShim.get_marker_channel(board_id)
+timestamp_channel = BoardShim.get_timestamp_channel(board_id)
 
 def draw_black():
     screen.fill(BLACK)
@@ -56,16 +64,6 @@ def check_quit():
         if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
             raise KeyboardInterrupt
 
-def extract_features(window):
-    """Extract features from multi-channel window."""
-    aggregated = np.sqrt(np.mean(window ** 2, axis=0))
-    rms = np.sqrt(np.mean(aggregated ** 2))
-    mav = np.mean(np.abs(aggregated))
-    variance = np.var(aggregated)
-    peak = np.max(np.abs(aggregated))
-    peak_to_rms = peak / rms if rms > 0 else 0
-    return [rms, mav, variance, peak, peak_to_rms]
-
 try:
     board.start_stream()
     print(f"Stream started. EMG channels: {emg_channels}")
@@ -75,14 +73,14 @@ try:
         check_quit()
         
         # REST: Black screen 5 seconds (Label 0)
-        board.insert_marker(0)
+        board.insert_marker(REST_MARKER)
         draw_black()
         time.sleep(5.0)
         
         check_quit()
         
         # CLENCH: Black 2s, Fixation 1s, Black 2s (Label 1)
-        board.insert_marker(1)
+        board.insert_marker(CLENCH_MARKER)
         draw_black()
         time.sleep(2.0)
         draw_fixation()
@@ -114,22 +112,24 @@ markers = data[marker_channel, :]
 marker_indices = np.where(markers != 0)[0]
 marker_values = markers[marker_indices]
 
+# Same feature engine as the live detector; windows never span two cues
+engine = SlidingFeatures(WINDOW_SAMPLES, STEP_SAMPLES)
 X = []
 y = []
 
 for i in range(len(marker_indices)):
     marker_idx = marker_indices[i]
-    label = int(marker_values[i])
+    label = MARKER_LABELS[int(marker_values[i])]
     
     end_idx = marker_indices[i + 1] if i + 1 < len(marker_indices) else emg_data.shape[1]
     
-    for start in range(marker_idx, end_idx - WINDOW_SAMPLES, STEP_SAMPLES):
-        window = emg_data[:, start:start + WINDOW_SAMPLES]
-        features = extract_features(window)
-        X.append(features)
-        y.append(label)
+    # Windows must end before end_idx, so the segment stops one sample short of it
+    engine.reset()
+    features = engine.update(emg_data[:, marker_idx:end_idx - 1].T)
+    X.extend(features)
+    y.extend([label] * len(features))
 
-X = np.array(X)
+X = np.array(X).reshape(-1, len(FEATURE_NAMES))
 y = np.array(y)
 
 print(f"X shape: {X.shape}")
@@ -140,4 +140,12 @@ print(f"Clench samples: {np.sum(y == 1)}")
 timestamp = time.strftime("%Y%m%d_%H%M%S")
 np.save(f"X_{timestamp}.npy", X)
 np.save(f"y_{timestamp}.npy", y)
-print(f"\nSaved: X_{timestamp}.npy, y_{timestamp}.npy")
\ No newline at end of file
+print(f"\nSaved: X_{timestamp}.npy, y_{timestamp}.npy")
+
+# Raw session with each sample's cue (0 rest, 1 clench, -1 before the first cue). These are
+# BrainFlow EMG values, not the LSL values ClenchDetection thresholds, so calibrate.py refuses them
+labels = np.full(emg_data.shape[1], -1)
+for i, marker_idx in enumerate(marker_indices):
+    labels[marker_idx:] = MARKER_LABELS[int(marker_values[i])]
+save_recording(f"session_{timestamp}.npz", data[timestamp_channel, :], emg_data.T, labels=labels, units="brainflow")
+print(f"Saved: session_{timestamp}.npz")
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""
+Background gesture sender for ClenchDetection.
+
+send() only queues the gesture, so the sample loop never waits on the
+network. A sender thread keeps one WebSocket to the backend's /ws/ingest
+open, reconnecting with backoff. Every gesture carries a sequence number
+and stays pending until the backend acks it; after a reconnect everything
+unacked is resent, and the backend drops sequence numbers it has already
+seen, so each gesture is delivered at least once and applied once.
+
+For latency tracing each gesture also carries a trace id, stage stamps on
+this process's monotonic clock, and the current estimate of the offset
+from that clock to the backend's (from periodic clock probes).
+"""
+
+import collections
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import requests
+
+# Try to import the WebSocket client; fall back to HTTP POSTs with retries
+try:
+    from websockets.sync.client import connect
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+    print("websockets not installed, sending gestures over HTTP. Run: pip install websockets")
+
+INGEST_URL = "ws://127.0.0.1:8000/ws/ingest"
+API_URL = "http://127.0.0.1:8000/api/signal"
+# Frontends subscribed to /ws/signals?device=<id> receive our gestures
+DEVICE_ID = os.getenv("DEVICE_ID", "default")
+
+ACK_TIMEOUT = 1.0        # Seconds without an ack before the connection is considered dead
+RECONNECT_MIN = 0.25     # Reconnect backoff, doubling up to RECONNECT_MAX
+RECONNECT_MAX = 5.0
+CLOCK_SYNC_INTERVAL = 5.0  # Seconds between clock probes
+CLOCK_SYNC_SAMPLES = 8     # Offset comes from the lowest-RTT probe among the last few
+
+
+class ClockSync:
+    """Offset from a local monotonic clock to a remote one, NTP-style."""
+
+    def __init__(self):
+        self.samples: collections.deque = collections.deque(maxlen=CLOCK_SYNC_SAMPLES)
+
+    def add(self, t0: float, t1: float, t2: float):
+        """t0: probe sent (local), t1: remote clock when answered, t2: reply received (local)."""
+        self.samples.append((t2 - t0, t1 - (t0 + t2) / 2))
+
+    @property
+    def offset(self) -> float | None:
+        """Remote minus local clock, or None before the first probe returns."""
+        if not self.samples:
+            return None
+        return min(self.samples)[1]
+
+
+class SignalSender:
+    def __init__(
+        self,
+        ingest_url: str = INGEST_URL,
+        api_url: str = API_URL,
+        clock=time.monotonic,
+        device: str = DEVICE_ID
+    ):
+        self.ingest_url = ingest_url
+        self.api_url = api_url
+        self.device = device
+        self.clock = clock  # Clock of the stage stamps (ClenchDetection passes pylsl.local_clock)
+        self.clock_sync = ClockSync()
+        self.last_probe = 0.0
+        self.sender_id = uuid.uuid4().hex  # New id per run, so sequence numbers restart at 1
+        self.seq = itertools.count(1)
+        self.outbox: queue.Queue = queue.Queue()
+        self.pending: dict[int, dict] = {}  # seq -> gesture, sent but not yet acked
+        self.sent_at: dict[int, float] = {}
+        self.running = True
+        self.connected = False
+        self.stats = {"queued": 0, "sent": 0, "acked": 0, "resent": 0, "reconnects": 0}
+        target = self._run_websocket if WEBSOCKETS_AVAILABLE else self._run_http
+        self.thread = threading.Thread(target=target, daemon=True)
+        self.thread.start()
+
+    def send(
+        self,
+        action: str,
+        timestamp: float | None = None,
+        stamps: dict[str, float] | None = None,
+        corrects: int | None = None
+    ) -> int:
+        """
+        Queue a gesture for delivery and return its sequence number. Never blocks.
+        stamps are stage times on self.clock, e.g. {"sample": ..., "detected": ...}.
+        corrects is the seq of the gesture a CORRECT_DOWN undoes; it travels as that gesture's trace.
+        """
+        seq = next(self.seq)
+        gesture = {
+            "seq": seq,
+            "action": action,
+            "timestamp": time.time() if timestamp is None else timestamp,
+            "trace": self.trace(seq),
+            "stamps": dict(stamps or {}),
+        }
+        if corrects is not None:
+            gesture["corrects"] = self.trace(corrects)
+        self.outbox.put(gesture)
+        self.stats["queued"] += 1
+        return gesture["seq"]
+
+    def trace(self, seq: int) -> str:
+        return f"{self.sender_id[:8]}-{seq}"
+
+    def close(self, timeout: float = 2.0):
+        """Give queued and unacked gestures up to timeout seconds to go out, then stop."""
+        deadline = time.time() + timeout
+        while (not self.outbox.empty() or self.pending) and time.time() < deadline:
+            time.sleep(0.05)
+        self.running = False
+        self.thread.join(timeout=1.0)
+
+    def _take(self, wait: float) -> dict | None:
+        try:
+            return self.outbox.get(timeout=wait)
+        except queue.Empty:
+            return None
+
+    # ---- WebSocket transport ----
+
+    def _run_websocket(self):
+        backoff = RECONNECT_MIN
+        while self.running:
+            try:
+                with connect(self.ingest_url, open_timeout=2, close_timeout=1) as ws:
+                    self._handshake(ws)
+                    backoff = RECONNECT_MIN
+                    self._pump(ws)
+            except Exception as e:
+                if self.connected:
+                    print(f"\n>>> INGEST: connection lost ({e}), reconnecting")
+                self.connected = False
+                self.stats["reconnects"] += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX)
+
+    def _handshake(self, ws):
+        ws.send(json.dumps({"type": "hello", "sender": self.sender_id, "device": self.device}))
+        reply = json.loads(ws.recv(timeout=2))
+        last_seq = reply.get("last_seq", 0)
+
+        # A quick burst of probes so the first gestures already carry a clock offset
+        for _ in range(3):
+            t0 = self.clock()
+            ws.send(json.dumps({"type": "clock", "t0": t0}))
+            reply = json.loads(ws.recv(timeout=2))
+            self.clock_sync.add(t0, reply["t1"], self.clock())
+        self.last_probe = time.time()
+
+        # The backend already applied everything up to last_seq; resend the rest in order
+        for seq in sorted(self.pending):
+            if seq <= last_seq:
+                self._acked(seq)
+            else:
+                self._transmit(ws, self.pending[seq])
+                self.stats["resent"] += 1
+
+        self.connected = True
+        print(f"\n>>> INGEST: connected to {self.ingest_url} as device '{self.device}'")
+
+    def _pump(self, ws):
+        while self.running:
+            gesture = self._take(0.05)
+            if gesture:
+                self.pending[gesture["seq"]] = gesture
+                self._transmit(ws, gesture)
+                self.stats["sent"] += 1
+
+            if time.time() - self.last_probe > CLOCK_SYNC_INTERVAL:
+                ws.send(json.dumps({"type": "clock", "t0": self.clock()}))
+                self.last_probe = time.time()
+
+            # Collect whatever acks and clock replies have arrived without waiting for more
+            while True:
+                try:
+                    message = json.loads(ws.recv(timeout=0))
+                except TimeoutError:
+                    break
+                if "ack" in message:
+                    self._acked(message["ack"])
+                elif message.get("type") == "clock":
+                    self.clock_sync.add(message["t0"], message["t1"], self.clock())
+
+            if self.pending and time.time() - min(self.sent_at.values()) > ACK_TIMEOUT:
+                raise TimeoutError("no ack from backend")
+
+    def _transmit(self, ws, gesture: dict):
+        gesture["stamps"]["sent"] = self.clock()
+        ws.send(json.dumps({**gesture, "clock_offset": self.clock_sync.offset}))
+        self.sent_at[gesture["seq"]] = time.time()
+
+    def _acked(self, seq: int):
+        if self.pending.pop(seq, None) is not None:
+            self.stats["acked"] += 1
+        self.sent_at.pop(seq, None)
+
+    # ---- HTTP fallback ----
+
+    def _run_http(self):
+        session = requests.Session()  # Keep-alive: one connection instead of one per gesture
+        backoff = RECONNECT_MIN
+        while self.running:
+            gesture = self._take(0.1)
+            if gesture is None:
+                continue
+            self.pending[gesture["seq"]] = gesture
+            while self.running:
+                try:
+                    # No clock probes over HTTP, so stage stamps can't be placed on the backend clock
+                    response = session.post(self.api_url, json={**gesture, "sender": self.sender_id, "device": self.device}, timeout=2)
+                    response.raise_for_status()
+                    self._acked(gesture["seq"])
+                    self.stats["sent"] += 1
+                    backoff = RECONNECT_MIN
+                    break
+                except requests.exceptions.RequestException:
+                    print(f"\n>>> API ERROR: Could not reach {self.api_url}, retrying")
+                    self.stats["resent"] += 1
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, RECONNECT_MAX)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from bench_gestures import synthetic_recording
+from calibrate import calibrate
+from gesture_detector import save_recording
+
+
+def live_session(path, seed=0):
+    times, values, _ = synthetic_recording(200, seed)
+    save_recording(str(path), times, values[:, None])
+    return str(path)
+
+
+def test_live_sessions_fit_thresholds_between_rest_and_clench(tmp_path):
+    profile, report = calibrate([live_session(tmp_path / "live1.npz"), live_session(tmp_path / "live2.npz", 1)])
+    assert report["rest_noise"] < profile["threshold_low"] < profile["threshold_high"] < report["weak_clench"]
+    assert report["timing_fitted"] == {"hold_time": True, "double_gap_max": True}
+
+
+def test_record_py_sessions_are_refused(tmp_path):
+    path = str(tmp_path / "session.npz")
+    labels = np.repeat([0, 1], 500)
+    save_recording(path, np.arange(1000) / 200, np.random.default_rng(0).normal(0, 50, (1000, 2)), labels=labels, units="brainflow")
+    with pytest.raises(ValueError, match="BrainFlow|brainflow"):
+        calibrate([path])
+
+
+def test_cued_session_without_rest_is_refused(tmp_path):
+    path = str(tmp_path / "cued.npz")
+    save_recording(path, np.arange(1000) / 200, np.full((1000, 1), 1.0), labels=np.ones(1000, dtype=int))
+    with pytest.raises(ValueError, match="no rest"):
+        calibrate([path])
+
+
+def test_cued_session_uses_each_cue_peak(tmp_path):
+    times = np.arange(4000) / 200
+    labels = np.tile(np.repeat([0, 1], 500), 4)
+    values = np.full(len(times), 0.52)
+    for start in range(500, 4000, 1000):
+        values[start + 200:start + 300] = 1.0  # A short clench inside each 2.5 s cue
+    path = str(tmp_path / "cued.npz")
+    save_recording(path, times, values[:, None], labels=labels)
+    profile, report = calibrate([path])
+    assert report["weak_clench"] == pytest.approx(1.0, abs=0.05)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from bench_gestures import SYNTHETIC_RATE, synthetic_recording
+from clench_classifier import ClenchClassifier, load_training_data, train
+from feature_engine import SlidingFeatures
+from gesture_detector import save_recording
+
+pytest.importorskip("sklearn")
+
+
+def windows(seed=0):
+    rng = np.random.default_rng(seed)
+    rest = rng.uniform(5, 10, (200, 5))
+    clench = rng.uniform(50, 100, (200, 5))
+    return np.vstack([rest, clench]), np.repeat([0, 1], 200)
+
+
+def test_exported_model_matches_and_keeps_training_ranges():
+    X, y = windows()
+    model, estimator, scaler = train(X, y)
+    classifier = ClenchClassifier(model)
+    assert np.allclose(classifier.predict_proba(X), estimator.predict_proba(scaler.transform(np.log1p(X)))[:, 1])
+    assert classifier.in_range(X).all()
+    assert not classifier.in_range(X * 1000).any()
+    assert not classifier.in_range(np.full((1, 5), 0.01)).any()
+
+
+def test_one_class_training_data_is_refused():
+    X, _ = windows()
+    with pytest.raises(ValueError, match="only label 1"):
+        train(X, np.ones(len(X), dtype=int))
+
+
+def test_models_without_ranges_accept_every_window():
+    X, y = windows()
+    model, _, _ = train(X, y)
+    del model["feature_ranges"]
+    assert ClenchClassifier(model).in_range(X * 1000).all()
+
+
+def test_record_sessions_train_a_model_that_accepts_live_windows(tmp_path):
+    path = str(tmp_path / "live.npz")
+    times, values, _ = synthetic_recording(60)
+    save_recording(path, times, values[:, None])
+    X, y = load_training_data([path])
+    assert 0 < y.mean() < 0.5  # Clench windows from the segmentation, rest is most of the session
+
+    classifier = ClenchClassifier(train(X, y)[0])
+    # What ClenchDetection computes from the same stream, in one pass
+    live = SlidingFeatures.for_rate(SYNTHETIC_RATE).update(values[:, None])
+    # Windows straddling a clench edge, left out of training, are the only ones outside
+    assert classifier.in_range(live).mean() > 0.75
+    assert classifier.predict(X).tolist() == y.astype(bool).tolist()
+
+
+def test_record_py_sessions_are_refused(tmp_path):
+    path = str(tmp_path / "session.npz")
+    save_recording(path, np.arange(1000) / 200, np.ones((1000, 2)), labels=np.repeat([0, 1], 500), units="brainflow")
+    with pytest.raises(ValueError, match="X/y .npy pair"):
+        load_training_data([path])
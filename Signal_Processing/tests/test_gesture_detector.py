@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from gesture_detector import ClenchStateMachine
+
+BLOCK_SIZES = (1, 2, 7, 32, 250, None)  # None: the whole recording in one call
+
+
+def reference(avg, times, detector: ClenchStateMachine) -> list[tuple[str, float]]:
+    """The per-sample loop the block state machine replaced, with speculative mode and the second-clench fix."""
+    events = []
+    active = waiting = hold_triggered = second = False
+    start = end = 0.0
+    for value, t in zip(avg.tolist(), times.tolist()):
+        if value > detector.threshold_high:
+            if not active:
+                active, start = True, t
+                if waiting:
+                    events.append(("CORRECT_DOWN" if detector.speculative else "DOWN", t))
+                    waiting, second = False, True
+            if not hold_triggered and t - start > detector.hold_time:
+                events.append(("SELECT", t))
+                hold_triggered, waiting = True, False
+        elif value < detector.threshold_low:
+            if active:
+                active, end = False, t
+                if not hold_triggered and not second:
+                    waiting = True
+                    if detector.speculative:
+                        events.append(("RIGHT", t))
+                hold_triggered = second = False
+        if waiting and not active and t - end > detector.double_gap_max:
+            if not detector.speculative:
+                events.append(("RIGHT", t))
+            waiting = False
+    return events
+
+
+def random_recording(seed: int, seconds: float = 60.0) -> tuple[np.ndarray, np.ndarray]:
+    """Normalized values switching between rest, the hysteresis band and clenches of random lengths, jittered times."""
+    rng = np.random.default_rng(seed)
+    rate = rng.choice([100, 200, 250])
+    times = np.cumsum(rng.uniform(0.5, 1.5, int(seconds * rate)) / rate)
+    values = np.empty(len(times))
+    i = 0
+    while i < len(values):
+        length = int(rng.exponential(0.4) * rate) + 1
+        values[i:i + length] = rng.choice([0.1, 0.7, 1.0]) + rng.normal(0, 0.08, len(values[i:i + length]))
+        i += length
+    return np.clip(values, 0, None), times
+
+
+def run_blocks(avg, times, detector: ClenchStateMachine, block: int | None) -> list[tuple[str, float]]:
+    block = block or len(avg)
+    events = []
+    for start in range(0, len(avg), block):
+        events += detector.process(avg[start:start + block], times[start:start + block])
+    return events
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+@pytest.mark.parametrize("seed", range(6))
+def test_blocks_match_the_per_sample_loop(seed, speculative):
+    avg, times = random_recording(seed)
+    expected = reference(avg, times, ClenchStateMachine(hold_time=1.0, double_gap_max=0.8, speculative=speculative))
+    assert {action for action, _ in expected} >= {"SELECT", "CORRECT_DOWN" if speculative else "DOWN"}
+    for block in BLOCK_SIZES:
+        detector = ClenchStateMachine(hold_time=1.0, double_gap_max=0.8, speculative=speculative)
+        assert run_blocks(avg, times, detector, block) == expected, f"block size {block}"
+
+
+def test_double_clench_release_starts_no_single():
+    times = np.arange(0, 5, 0.01)
+    avg = np.zeros(len(times))
+    avg[(times >= 0.5) & (times < 0.7)] = 1.0
+    avg[(times >= 1.0) & (times < 1.2)] = 1.0
+    assert [action for action, _ in ClenchStateMachine().process(avg, times)] == ["DOWN"]
+    assert [action for action, _ in ClenchStateMachine(speculative=True).process(avg, times)] == ["RIGHT", "CORRECT_DOWN"]
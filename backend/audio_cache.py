@@ -0,0 +1,314 @@
+"""
+Disk-backed TTS audio cache.
+
+Audio is stored under a hash of (voice_id, model_id, normalized text), so
+repeated utterances ("Yes.", "Thank you.") are synthesized once. The cache
+is capped in bytes and evicts least recently used files. Concurrent misses
+for the same key share a single upstream synthesis, and every waiter
+receives chunks as they arrive rather than after the synthesis finishes.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable
+from config import TTS_CACHE_DIR, TTS_CACHE_MAX_MB
+
+READ_CHUNK_SIZE = 16 * 1024
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(voice_id: str, model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{voice_id}\0{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class _Synthesis:
+    """One in-flight upstream synthesis that any number of readers can follow."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.changed = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+        self.listeners = 0  # Requests streaming this synthesis; prefetches have none
+        self.promoted = asyncio.Event()  # Set when a request joins; a queued prefetch stops waiting for a slot
+
+    async def publish(self, chunk: bytes | None = None, error: BaseException | None = None):
+        async with self.changed:
+            if chunk is not None:
+                self.chunks.append(chunk)
+            else:
+                self.done = True
+                self.error = error
+            self.changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[bytes]:
+        index = 0
+        self.listeners += 1
+        try:
+            while True:
+                async with self.changed:
+                    await self.changed.wait_for(lambda: index < len(self.chunks) or self.done)
+                    pending = self.chunks[index:]
+                    finished, error = self.done, self.error
+                for chunk in pending:
+                    yield chunk
+                index += len(pending)
+                if finished and index >= len(self.chunks):
+                    if error:
+                        raise error
+                    return
+        finally:
+            self.listeners -= 1
+
+
+async def _acquire_unless(slots: asyncio.Semaphore, event: asyncio.Event) -> bool:
+    """Wait for a slot or the event, whichever comes first. True if a slot is held."""
+    if event.is_set():
+        return False
+    acquire = asyncio.ensure_future(slots.acquire())
+    wait = asyncio.ensure_future(event.wait())
+
+    def abandon():
+        acquire.cancel()
+        # A slot granted before the cancel took effect is handed back
+        acquire.add_done_callback(lambda t: t.cancelled() or t.exception() or slots.release())
+
+    try:
+        await asyncio.wait({acquire, wait}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        abandon()
+        raise
+    finally:
+        wait.cancel()
+    if acquire.done():
+        return True
+    abandon()
+    return False
+
+
+async def _queued(source: AsyncIterator[bytes], slots: asyncio.Semaphore, promoted: asyncio.Event) -> AsyncIterator[bytes]:
+    """source, started once a slot is free or a listener promotes it."""
+    held = await _acquire_unless(slots, promoted)
+    try:
+        async for chunk in source:
+            yield chunk
+    finally:
+        await source.aclose()
+        if held:
+            slots.release()
+
+
+class AudioCache:
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, int] = OrderedDict()  # key -> size, least recently used first
+        self.total_bytes = 0
+        self.inflight: dict[str, _Synthesis] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.prefetches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _scan(self) -> list[tuple[float, str, int]]:
+        """(mtime, key, size) of the files on disk. Runs in a worker thread; touches no shared state."""
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".mp3"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, name[:-4], stat.st_size))
+        return files
+
+    async def load(self):
+        """
+        Index existing cache files, oldest modification time first. The directory
+        scan runs in a thread; the index is merged on the event loop, where lookup()
+        and store may already be running, so entries added meanwhile are kept as
+        the most recently used.
+        """
+        if not self.enabled:
+            return
+        files = await asyncio.to_thread(self._scan)
+        merged: OrderedDict[str, int] = OrderedDict(
+            (key, size) for _, key, size in sorted(files) if key not in self.entries
+        )
+        merged.update(self.entries)
+        self.entries = merged
+        self.total_bytes = sum(merged.values())
+        self._evict()
+        print(f"TTS cache: {len(self.entries)} files, {self.total_bytes // 1024} KB in {self.directory}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def lookup(self, voice_id: str, model_id: str, text: str) -> str | None:
+        """Path of the cached audio, or None. Marks the entry as recently used."""
+        if not self.enabled:
+            return None
+        key = cache_key(voice_id, model_id, text)
+        if key not in self.entries:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.total_bytes -= self.entries.pop(key)
+            return None
+        self.entries.move_to_end(key)
+        now = time.time()
+        os.utime(path, (now, now))  # Persist recency across restarts
+        self.hits += 1
+        return path
+
+    def _store(self, key: str, audio: bytes):
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, self._path(key))
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    async def _produce(self, key: str, synthesis: _Synthesis, source: AsyncIterator[bytes]):
+        try:
+            async for chunk in source:
+                await synthesis.publish(chunk)
+        except BaseException as e:
+            self.inflight.pop(key, None)
+            await synthesis.publish(error=e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+        finally:
+            # Release the upstream stream (and its concurrency slot) promptly, even on cancel
+            await source.aclose()
+
+        audio = b"".join(synthesis.chunks)
+        try:
+            if audio:
+                await asyncio.to_thread(self._store, key, audio)
+                self.entries[key] = len(audio)
+                self.total_bytes += len(audio)
+                self._evict()
+        except OSError as e:
+            print(f"TTS cache write failed: {e}")
+        finally:
+            self.inflight.pop(key, None)
+            await synthesis.publish()
+
+    async def _read(self, path: str) -> AsyncIterator[bytes]:
+        with open(path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    async def stream(
+        self,
+        voice_id: str,
+        model_id: str,
+        text: str,
+        synthesize: Callable[[str, str], AsyncIterator[bytes]]
+    ) -> AsyncIterator[bytes]:
+        """
+        Audio for text: from disk on a hit, otherwise from a shared upstream synthesis.
+        The synthesis runs in its own task, so it completes (and is cached) even if
+        the first requester goes away while others are still listening.
+        """
+        if not self.enabled:
+            async for chunk in synthesize(text, voice_id):
+                yield chunk
+            return
+
+        path = self.lookup(voice_id, model_id, text)
+        if path:
+            async for chunk in self._read(path):
+                yield chunk
+            return
+
+        key = cache_key(voice_id, model_id, text)
+        synthesis = self.inflight.get(key)
+        if synthesis is None:
+            self.misses += 1
+            synthesis = self._start(key, synthesize(text, voice_id))
+        else:
+            self.shared += 1
+            synthesis.promoted.set()
+
+        async for chunk in synthesis.follow():
+            yield chunk
+
+    def _start(self, key: str, source: AsyncIterator[bytes], slots: asyncio.Semaphore | None = None) -> _Synthesis:
+        synthesis = _Synthesis()
+        if slots:
+            source = _queued(source, slots, synthesis.promoted)
+        self.inflight[key] = synthesis
+        synthesis.task = asyncio.create_task(self._produce(key, synthesis, source))
+        return synthesis
+
+    def prefetch(
+        self,
+        voice_id: str,
+        model_id: str,
+        text: str,
+        synthesize: Callable[[str, str], AsyncIterator[bytes]],
+        slots: asyncio.Semaphore | None = None
+    ) -> str | None:
+        """
+        Synthesize text into the cache in the background, with nobody listening yet.
+        With slots, the synthesis waits for one before starting, unless a request
+        starts streaming it first, in which case it starts at once.
+        Returns the cache key, or None if the audio is already cached or being synthesized.
+        """
+        if not self.enabled:
+            return None
+        key = cache_key(voice_id, model_id, text)
+        if key in self.entries or key in self.inflight:
+            return None
+        self.prefetches += 1
+        self._start(key, synthesize(text, voice_id), slots)
+        return key
+
+    def cancel_prefetch(self, key: str):
+        """Cancel a background synthesis unless a request has started streaming it."""
+        synthesis = self.inflight.get(key)
+        if synthesis and synthesis.listeners == 0 and synthesis.task:
+            synthesis.task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_syntheses": self.shared,
+            "prefetches": self.prefetches,
+            "in_flight": len(self.inflight),
+        }
+
+
+# Global instance
+audio_cache = AudioCache()
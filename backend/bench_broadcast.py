@@ -0,0 +1,133 @@
+"""
+Benchmark signal fan-out with hundreds of simulated WebSocket clients.
+
+Compares the per-client queues of BroadcastHub with sending to each client
+in turn (how /api/signal used to broadcast), with a few slow clients and a
+few stalled ones whose sends never complete:
+    python bench_broadcast.py --clients 500 --slow 5 --stalled 2 --messages 50
+Reports how long the publisher (the HTTP handler) is blocked per message and
+the delivery latency seen by healthy clients.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from broadcast import BroadcastHub, SLOW_CONSUMER_POLICIES
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class FakeWebSocket:
+    """Stands in for a client connection; send_text takes send_delay seconds (None = never returns)."""
+
+    def __init__(self, send_delay: float | None = 0.0):
+        self.send_delay = send_delay
+        self.latencies: list[float] = []
+
+    async def send_text(self, message: str):
+        if self.send_delay is None:
+            await asyncio.Event().wait()
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        sent_at = json.loads(message)["sent_at"]
+        self.latencies.append((time.perf_counter() - sent_at) * 1000)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def make_clients(args) -> tuple[list[FakeWebSocket], list[FakeWebSocket]]:
+    healthy = [FakeWebSocket() for _ in range(args.clients - args.slow - args.stalled)]
+    others = [FakeWebSocket(args.slow_ms / 1000) for _ in range(args.slow)]
+    others += [FakeWebSocket(None) for _ in range(args.stalled)]
+    return healthy, others
+
+
+async def publish_all(args, publish) -> list[float]:
+    blocked: list[float] = []
+    for i in range(args.messages):
+        message = json.dumps({"action": "RIGHT", "seq": i, "sent_at": time.perf_counter()})
+        started = time.perf_counter()
+        await publish(message)
+        blocked.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(1 / args.rate)
+    return blocked
+
+
+async def run_serial(args):
+    healthy, others = make_clients(args)
+    # Slow clients first, like a stale tab that connected before everyone else
+    clients = others + healthy
+    # Stalled sends would block forever; bound them the way a TCP timeout eventually would
+    timeout = args.send_timeout
+
+    async def publish(message: str):
+        for client in list(clients):
+            try:
+                await asyncio.wait_for(client.send_text(message), timeout)
+            except asyncio.TimeoutError:
+                clients.remove(client)
+
+    blocked = await publish_all(args, publish)
+    return blocked, healthy, {}
+
+
+async def run_hub(args):
+    healthy, others = make_clients(args)
+    hub = BroadcastHub("bench", queue_size=args.queue_size, policy=args.policy, send_timeout=args.send_timeout)
+    for client in others + healthy:
+        hub.subscribe(client)
+
+    async def publish(message: str):
+        hub.publish(message)
+
+    blocked = await publish_all(args, publish)
+    await asyncio.sleep(0.2)  # Let writers drain
+    stats = hub.stats()
+    for subscriber in list(hub.subscribers):
+        hub.unsubscribe(subscriber)
+    return blocked, healthy, stats
+
+
+def report(name: str, blocked: list[float], healthy: list[FakeWebSocket], stats: dict, expected: int):
+    latencies = [latency for client in healthy for latency in client.latencies]
+    complete = sum(len(client.latencies) == expected for client in healthy)
+    print(f"{name}:")
+    print(f"  publisher blocked  p50 {percentile(blocked, 50):.2f}ms  p95 {percentile(blocked, 95):.2f}ms  "
+          f"max {max(blocked):.2f}ms")
+    if latencies:
+        print(f"  healthy delivery   p50 {percentile(latencies, 50):.2f}ms  p95 {percentile(latencies, 95):.2f}ms  "
+              f"mean {statistics.mean(latencies):.2f}ms")
+    print(f"  healthy clients with every message: {complete}/{len(healthy)}")
+    if stats:
+        print(f"  hub: {stats['delivered']} delivered, {stats['dropped']} dropped, "
+              f"{stats['slow_disconnects']} slow disconnects, {stats['send_failures']} send failures")
+
+
+async def main(args):
+    for name, run in (("serial", run_serial), (f"hub ({args.policy})", run_hub)):
+        if name == "serial" and args.skip_serial:
+            continue
+        blocked, healthy, stats = await run(args)
+        report(name, blocked, healthy, stats, args.messages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--slow", type=int, default=5, help="Clients whose sends take --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=200)
+    parser.add_argument("--stalled", type=int, default=2, help="Clients whose sends never complete")
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=20, help="Messages per second")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--policy", choices=SLOW_CONSUMER_POLICIES, default="disconnect")
+    parser.add_argument("--send-timeout", type=float, default=1.0)
+    parser.add_argument("--skip-serial", action="store_true")
+    asyncio.run(main(parser.parse_args()))
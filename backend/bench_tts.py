@@ -0,0 +1,192 @@
+"""
+Benchmark time-to-first-audio and throughput of the TTS paths of a running backend.
+
+Start the ElevenLabs stand-in and point the backend at it:
+    python fake_elevenlabs.py --port 8020 --ttfb-ms 300 --chunk-ms 100
+    ELEVENLABS_BASE_URL=http://localhost:8020 uvicorn main:app --port 8000
+    python bench_tts.py --path all --requests 20 --concurrency 4
+
+Each request uses unique text so the TTS cache is bypassed; pass --cached to
+repeat the same sentences and measure cache hits instead.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+import httpx
+import websockets
+
+SENTENCES = [
+    "Yes, please.",
+    "I would like some water.",
+    "Can you help me sit up, please?",
+    "Thank you for coming to see me today, it means a lot.",
+    "I am feeling tired; could we talk again after lunch, when the doctor has been?",
+]
+
+PATHS = ["text-to-speech", "speak-sentence", "ws-json", "ws-stream", "ws-binary"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(error: str) -> str:
+    """Upstream errors embed full response headers; keep just the status."""
+    status = re.search(r"status_code: \d+", error)
+    return status.group(0) if status else error[:80]
+
+
+class Results:
+    def __init__(self):
+        self.first_audio: list[float] = []
+        self.complete: list[float] = []
+        self.audio_bytes = 0
+        self.errors: list[str] = []
+
+    def add(self, started: float, first: float | None, size: int):
+        finished = time.perf_counter()
+        if first is None:
+            self.errors.append("no audio")
+            return
+        self.first_audio.append((first - started) * 1000)
+        self.complete.append((finished - started) * 1000)
+        self.audio_bytes += size
+
+
+async def http_one(client: httpx.AsyncClient, endpoint: str, text: str, results: Results):
+    started = time.perf_counter()
+    first = None
+    size = 0
+    try:
+        async with client.stream("POST", endpoint, json={"text": text}) as response:
+            if response.status_code != 200:
+                await response.aread()
+                results.errors.append(f"{response.status_code} {summarize(response.text)}")
+                return
+            async for chunk in response.aiter_bytes():
+                if chunk and first is None:
+                    first = time.perf_counter()
+                size += len(chunk)
+    except httpx.HTTPError as e:
+        # The backend ends the body early when upstream fails after the first chunk
+        results.errors.append(f"stream cut: {type(e).__name__}")
+        return
+    results.add(started, first, size)
+
+
+async def ws_one(websocket, mode: str, text: str, results: Results):
+    message = {"text": text}
+    if mode == "ws-stream":
+        message["stream"] = True
+    started = time.perf_counter()
+    first = None
+    size = 0
+    await websocket.send(json.dumps(message))
+
+    while True:
+        frame = await websocket.recv()
+        if isinstance(frame, bytes):
+            # Binary mode: SPEAK_FRAME_HEADER (7 bytes) + audio; flags byte marks the end
+            if first is None and len(frame) > 7:
+                first = time.perf_counter()
+            size += len(frame) - 7
+            if frame[6] & 0x01:
+                break
+            continue
+
+        data = json.loads(frame)
+        if "error" in data:
+            results.errors.append(summarize(data["error"]))
+            return
+        if data.get("type") == "start":
+            continue
+        if data.get("audio"):
+            if first is None:
+                first = time.perf_counter()
+            size += len(data["audio"]) * 3 // 4
+        if mode == "ws-json" or data.get("done"):
+            break
+    results.add(started, first, size)
+
+
+async def run_path(base_url: str, path: str, texts: list[str], concurrency: int) -> tuple[Results, float]:
+    results = Results()
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for text in texts:
+        queue.put_nowait(text)
+
+    async def http_worker(client: httpx.AsyncClient):
+        while not queue.empty():
+            await http_one(client, f"/api/{path}", queue.get_nowait(), results)
+
+    async def ws_worker():
+        url = base_url.replace("http", "ws", 1) + "/ws/speak"
+        subprotocols = ["tts-binary.v1"] if path == "ws-binary" else None
+        while not queue.empty():
+            try:
+                async with websockets.connect(url, subprotocols=subprotocols, max_size=None) as websocket:
+                    while not queue.empty():
+                        await ws_one(websocket, path, queue.get_nowait(), results)
+            except websockets.ConnectionClosed as e:
+                results.errors.append(f"connection closed: {e.code}")
+
+    wall = time.perf_counter()
+    if path.startswith("ws-"):
+        await asyncio.gather(*(ws_worker() for _ in range(concurrency)))
+    else:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+            await asyncio.gather(*(http_worker(client) for _ in range(concurrency)))
+    return results, time.perf_counter() - wall
+
+
+def report(path: str, results: Results, wall: float):
+    done = len(results.first_audio)
+    print(f"{path}: {done} ok, {len(results.errors)} failed, {wall:.2f}s wall, "
+          f"{done / wall:.2f} utterances/s, {results.audio_bytes / 1024 / wall:.1f} KB/s audio")
+    if done:
+        ttfa, total = results.first_audio, results.complete
+        print(f"  first audio  p50 {percentile(ttfa, 50):.0f}ms  p95 {percentile(ttfa, 95):.0f}ms  max {max(ttfa):.0f}ms")
+        print(f"  complete     p50 {percentile(total, 50):.0f}ms  p95 {percentile(total, 95):.0f}ms  "
+              f"mean {statistics.mean(total):.0f}ms")
+    for error in sorted(set(results.errors))[:3]:
+        print(f"  error: {error}")
+
+
+async def main(args):
+    paths = PATHS if args.path == "all" else [args.path]
+    async with httpx.AsyncClient() as client:
+        if args.stand_in:
+            await client.post(f"{args.stand_in}/stats/reset")
+
+        for path in paths:
+            if args.cached:
+                texts = [SENTENCES[i % len(SENTENCES)] for i in range(args.requests)]
+            else:
+                run_id = int(time.time() * 1000) % 100000
+                # Nonce first: utterances are split into sentences and each one is cached separately
+                texts = [f"Note {run_id}-{i}: {SENTENCES[i % len(SENTENCES)]}" for i in range(args.requests)]
+            results, wall = await run_path(args.base_url, path, texts, args.concurrency)
+            report(path, results, wall)
+
+        if args.stand_in:
+            stats = (await client.get(f"{args.stand_in}/stats")).json()
+            print(f"stand-in: {stats['tts_requests']} syntheses, peak {stats['tts_peak_active']} concurrent, "
+                  f"{stats['tts_failed']} failed, {stats['tts_dropped']} dropped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", choices=PATHS + ["all"], default="all")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--cached", action="store_true", help="Repeat sentences so later requests hit the TTS cache")
+    parser.add_argument("--stand-in", default="http://localhost:8020",
+                        help="fake_elevenlabs.py URL for upstream stats; empty to skip")
+    asyncio.run(main(parser.parse_args()))
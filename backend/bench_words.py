@@ -0,0 +1,58 @@
+"""
+Benchmark the word prediction endpoints in-process.
+
+Run against recorded upstream traffic so no network is needed:
+    UPSTREAM_CASSETTE_MODE=replay python bench_words.py --requests 50
+Record a cassette first with UPSTREAM_CASSETTE_MODE=record (needs network).
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from main import app
+
+SENTENCES = [
+    [], ["I"], ["I", "want"], ["Can", "you"], ["Thank", "you"], ["I", "need", "some"],
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(total: int, concurrency: int, endpoint: str):
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one(i: int):
+                sentence = SENTENCES[i % len(SENTENCES)]
+                body = {"chat_history": [], "current_sentence": sentence, "is_sentence_start": not sentence}
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post(endpoint, json=body)
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            wall = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(total)))
+            wall = time.perf_counter() - wall
+
+    print(f"{endpoint}: {total} requests, concurrency {concurrency}, {wall:.2f}s wall")
+    print(f"  mean {statistics.mean(latencies):.1f}ms  p50 {percentile(latencies, 50):.1f}ms  "
+          f"p95 {percentile(latencies, 95):.1f}ms  max {max(latencies):.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--endpoint", default="/api/words")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.endpoint))
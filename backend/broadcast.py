@@ -0,0 +1,172 @@
+"""
+Fan-out of server-pushed messages (/ws/signals, /ws/transcription) to WebSocket subscribers.
+
+Subscribers join a channel (a device or session id); a message is
+serialized once and put on the bounded queue of every subscriber of its
+channel only, so publishing costs O(subscribers of that channel). Each
+subscriber has its own writer task, so a slow or half-dead client never
+delays delivery to the others or the publisher's HTTP response.
+When a queue is full the slow-consumer policy decides what gives:
+
+    disconnect   - close the slow client (it reconnects and starts fresh)
+    drop_oldest  - discard its oldest queued message
+    drop_newest  - discard the message being published
+"""
+
+import asyncio
+from fastapi import WebSocket
+from config import BROADCAST_QUEUE_SIZE, BROADCAST_SLOW_CONSUMER, BROADCAST_SEND_TIMEOUT
+
+SLOW_CONSUMER_POLICIES = ("disconnect", "drop_oldest", "drop_newest")
+
+# Close code for clients dropped by the "disconnect" policy (RFC 6455: try again later)
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Channel of clients and producers that don't name a device
+DEFAULT_CHANNEL = "default"
+MAX_CHANNEL_LENGTH = 64
+
+
+def device_channel(device: str | None) -> str:
+    """Channel for a device/session id given by a client or producer."""
+    device = (device or "").strip()[:MAX_CHANNEL_LENGTH]
+    return device or DEFAULT_CHANNEL
+
+
+class Subscriber:
+    def __init__(self, hub: "BroadcastHub", websocket: WebSocket, channel: str, queue_size: int):
+        self.hub = hub
+        self.websocket = websocket
+        self.channel = channel
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.writer = asyncio.create_task(self._write())
+
+    def send(self, message: str) -> bool:
+        """Queue a message for this client. Returns False if the slow-consumer policy rejected it."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        policy = self.hub.policy
+        if policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+            self.dropped += 1
+            self.hub.dropped += 1
+            return True
+        if policy == "drop_newest":
+            self.dropped += 1
+            self.hub.dropped += 1
+            return False
+
+        print(f"{self.hub.name}: disconnecting slow client ({self.queue.qsize()} messages queued)")
+        self.hub.slow_disconnects += 1
+        self.close(CLOSE_TRY_AGAIN_LATER)
+        return False
+
+    async def _write(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                # Not wait_for: on 3.11 it swallows a cancel that lands as the send completes,
+                # and close() would leave this writer running
+                async with asyncio.timeout(self.hub.send_timeout):
+                    await self.websocket.send_text(message)
+                self.hub.delivered += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Timed out or the socket is gone; closing it also ends the endpoint's receive loop
+            print(f"{self.hub.name}: dropping client after send failure: {e!r}")
+            self.hub.send_failures += 1
+            self.close(CLOSE_TRY_AGAIN_LATER)
+
+    def close(self, code: int | None = None):
+        if self.closed:
+            return
+        self.closed = True
+        self.hub.unsubscribe(self)
+        if asyncio.current_task() is not self.writer:
+            self.writer.cancel()
+        if code is not None:
+            asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), self.hub.send_timeout)
+        except Exception:
+            pass
+
+
+class BroadcastHub:
+    def __init__(
+        self,
+        name: str,
+        queue_size: int = BROADCAST_QUEUE_SIZE,
+        policy: str = BROADCAST_SLOW_CONSUMER,
+        send_timeout: float = BROADCAST_SEND_TIMEOUT
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy: {policy}")
+        self.name = name
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.channels: dict[str, list[Subscriber]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+        self.send_failures = 0
+
+    def __len__(self) -> int:
+        return sum(len(members) for members in self.channels.values())
+
+    @property
+    def subscribers(self) -> list[Subscriber]:
+        return [subscriber for members in self.channels.values() for subscriber in members]
+
+    def subscribe(self, websocket: WebSocket, channel: str = DEFAULT_CHANNEL) -> Subscriber:
+        subscriber = Subscriber(self, websocket, channel, self.queue_size)
+        self.channels.setdefault(channel, []).append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        members = self.channels.get(subscriber.channel)
+        if members and subscriber in members:
+            members.remove(subscriber)
+            if not members:
+                del self.channels[subscriber.channel]
+        if not subscriber.closed:
+            subscriber.close()
+
+    def publish(self, message: str, channel: str = DEFAULT_CHANNEL) -> int:
+        """Queue an already-serialized message for the channel's subscribers. Returns how many accepted it."""
+        self.published += 1
+        # Copy: the disconnect policy removes subscribers while we iterate
+        return sum(subscriber.send(message) for subscriber in list(self.channels.get(channel, ())))
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self),
+            "channels": len(self.channels),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "max_queued": max((s.queue.qsize() for s in self.subscribers), default=0),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+            "send_failures": self.send_failures,
+        }
+
+
+# Global instances
+signal_hub = BroadcastHub("signals")
+transcription_hub = BroadcastHub("transcription")
@@ -0,0 +1,61 @@
+"""
+Build the word-frequency list used by prefix (spelling) mode.
+
+    python build_lexicon.py                          # top 50000 English words from wordfreq
+    python build_lexicon.py --size 100000
+    python build_lexicon.py --from-text notes/*.txt  # count words in your own text instead
+
+Writes "word count" lines, most frequent first, to LEXICON_PATH
+(backend/data/lexicon.txt). wordfreq counts are frequencies per billion
+words. The shipped list was built with the defaults; wordfreq's data is
+CC BY-SA 4.0 (https://github.com/rspeer/wordfreq).
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+from config import LEXICON_PATH
+from lexicon import _WORD_RE
+
+DEFAULT_SIZE = 50000
+
+
+def from_wordfreq(size: int) -> Counter:
+    try:
+        from wordfreq import top_n_list, word_frequency
+    except ImportError:
+        sys.exit("wordfreq not installed. Run: pip install wordfreq (or use --from-text)")
+    counts = Counter()
+    for word in top_n_list("en", size * 2):  # Extra candidates, since numbers and symbols are skipped
+        if len(counts) >= size:
+            break
+        if _WORD_RE.fullmatch(word):
+            counts[word] = max(1, round(word_frequency(word, "en") * 1e9))
+    return counts
+
+
+def from_text(paths: list[str], size: int) -> Counter:
+    counts = Counter()
+    for path in paths:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                counts.update(_WORD_RE.findall(line.lower()))
+    return Counter(dict(counts.most_common(size)))
+
+
+def main(args):
+    counts = from_text(args.from_text, args.size) if args.from_text else from_wordfreq(args.size)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for word, count in counts.most_common():
+            f.write(f"{word} {count}\n")
+    print(f"Saved {len(counts)} words to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Number of words to keep")
+    parser.add_argument("--from-text", nargs="+", metavar="FILE", help="Count words in these text files")
+    parser.add_argument("--output", default=LEXICON_PATH)
+    main(parser.parse_args())
@@ -0,0 +1,247 @@
+"""
+Record/replay transport for upstream HTTP calls (OpenRouter, ElevenLabs).
+
+In "record" mode requests go to the real service and every exchange is
+appended to a JSON-lines cassette, including when each response chunk
+arrived. In "replay" mode no network is used: responses come from the
+cassette and are paced with the recorded time-to-first-byte and chunk
+gaps, multiplied by UPSTREAM_LATENCY_SCALE (0 = as fast as possible).
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+from config import UPSTREAM_CASSETTE_MODE, UPSTREAM_CASSETTE_DIR, UPSTREAM_LATENCY_SCALE
+
+# Hop-by-hop headers that must not be replayed as-is
+_SKIP_HEADERS = {"transfer-encoding", "connection", "keep-alive"}
+
+
+def _request_key(method: str, url: str, body: bytes) -> str:
+    return f"{method} {url} {hashlib.sha1(body).hexdigest()}"
+
+
+def _route_key(method: str, url: str) -> str:
+    return f"{method} {urlsplit(url).path}"
+
+
+class _RecordingStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Passes upstream chunks through to the caller and records their arrival times."""
+
+    def __init__(self, cassette: "CassetteTransport", entry: dict, stream, started: float):
+        self.cassette = cassette
+        self.entry = entry
+        self.stream = stream
+        self.started = started
+        self.saved = False
+
+    def _record(self, chunk: bytes):
+        offset = time.perf_counter() - self.started
+        self.entry["chunks"].append([round(offset, 4), base64.b64encode(chunk).decode("ascii")])
+
+    def _save(self):
+        if not self.saved:
+            self.saved = True
+            self.entry["elapsed"] = round(time.perf_counter() - self.started, 4)
+            self.cassette.append(self.entry)
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self._record(chunk)
+            yield chunk
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self._record(chunk)
+            yield chunk
+
+    def close(self):
+        self._save()
+        self.stream.close()
+
+    async def aclose(self):
+        self._save()
+        await self.stream.aclose()
+
+
+class _ReplayStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Yields recorded chunks with the recorded inter-chunk gaps (scaled)."""
+
+    def __init__(self, chunks: list, ttfb: float, scale: float):
+        self.chunks = chunks
+        self.ttfb = ttfb
+        self.scale = scale
+
+    def _gaps(self):
+        previous = self.ttfb
+        for offset, data in self.chunks:
+            yield max(0.0, offset - previous) * self.scale, base64.b64decode(data)
+            previous = offset
+
+    def __iter__(self):
+        for delay, chunk in self._gaps():
+            if delay:
+                time.sleep(delay)
+            yield chunk
+
+    async def __aiter__(self):
+        for delay, chunk in self._gaps():
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+class CassetteTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    httpx transport for the async upstream clients (AsyncElevenLabs, OpenRouter);
+    the sync interface serves scripts that use an httpx.Client.
+
+    Replay matches on method + URL + body hash first, then falls back to
+    method + URL path so prompts that differ per run still get an answer.
+    Entries for a key are served in recorded order and cycle when exhausted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        latency_scale: float = 1.0,
+        inner: httpx.BaseTransport | httpx.AsyncBaseTransport | None = None
+    ):
+        """inner is where record mode sends requests; the network by default."""
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.lock = threading.Lock()
+        self.exact: dict[str, list[dict]] = {}
+        self.routes: dict[str, list[dict]] = {}
+        self.positions: dict[str, int] = {}
+        self.sync_inner: httpx.BaseTransport | None = inner if isinstance(inner, httpx.BaseTransport) else None
+        self.async_inner: httpx.AsyncBaseTransport | None = inner if isinstance(inner, httpx.AsyncBaseTransport) else None
+
+        if mode == "replay":
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            print(f"Cassette not found: {self.path} (all requests will fail to connect)")
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self.exact.setdefault(entry["key"], []).append(entry)
+                self.routes.setdefault(entry["route"], []).append(entry)
+        print(f"Cassette loaded: {sum(len(v) for v in self.exact.values())} exchanges from {self.path}")
+
+    def append(self, entry: dict):
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _next(self, table: dict[str, list[dict]], key: str) -> dict | None:
+        entries = table.get(key)
+        if not entries:
+            return None
+        with self.lock:
+            position = self.positions.get(key, 0)
+            self.positions[key] = position + 1
+        return entries[position % len(entries)]
+
+    def _find(self, request: httpx.Request, body: bytes) -> dict:
+        url = str(request.url)
+        entry = self._next(self.exact, _request_key(request.method, url, body))
+        if entry is None:
+            entry = self._next(self.routes, "route:" + _route_key(request.method, url))
+        if entry is None:
+            raise httpx.ConnectError(f"No cassette entry for {request.method} {url}", request=request)
+        return entry
+
+    def _new_entry(self, request: httpx.Request, body: bytes, response: httpx.Response, ttfb: float) -> dict:
+        url = str(request.url)
+        return {
+            "key": _request_key(request.method, url, body),
+            "route": "route:" + _route_key(request.method, url),
+            "status": response.status_code,
+            "headers": [[k, v] for k, v in response.headers.multi_items() if k.lower() not in _SKIP_HEADERS],
+            "ttfb": round(ttfb, 4),
+            "chunks": [],
+        }
+
+    def _replay_response(self, entry: dict) -> httpx.Response:
+        return httpx.Response(
+            status_code=entry["status"],
+            headers=entry["headers"],
+            stream=_ReplayStream(entry["chunks"], entry["ttfb"], self.latency_scale),
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        if self.mode == "replay":
+            entry = self._find(request, body)
+            if self.latency_scale:
+                time.sleep(entry["ttfb"] * self.latency_scale)
+            return self._replay_response(entry)
+
+        if self.sync_inner is None:
+            self.sync_inner = httpx.HTTPTransport()
+        started = time.perf_counter()
+        response = self.sync_inner.handle_request(request)
+        entry = self._new_entry(request, body, response, time.perf_counter() - started)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(self, entry, response.stream, started),
+            extensions=response.extensions,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        if self.mode == "replay":
+            entry = self._find(request, body)
+            if self.latency_scale:
+                await asyncio.sleep(entry["ttfb"] * self.latency_scale)
+            return self._replay_response(entry)
+
+        if self.async_inner is None:
+            self.async_inner = httpx.AsyncHTTPTransport()
+        started = time.perf_counter()
+        response = await self.async_inner.handle_async_request(request)
+        entry = self._new_entry(request, body, response, time.perf_counter() - started)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(self, entry, response.stream, started),
+            extensions=response.extensions,
+        )
+
+    def close(self):
+        if self.sync_inner:
+            self.sync_inner.close()
+
+    async def aclose(self):
+        if self.async_inner:
+            await self.async_inner.aclose()
+
+
+def upstream_transport(name: str) -> CassetteTransport | None:
+    """
+    Cassette transport for the named upstream ("openrouter", "elevenlabs"),
+    or None when UPSTREAM_CASSETTE_MODE is unset so clients use the network normally.
+    """
+    if not UPSTREAM_CASSETTE_MODE:
+        return None
+    path = os.path.join(UPSTREAM_CASSETTE_DIR, f"{name}.jsonl")
+    print(f"Upstream '{name}' using cassette ({UPSTREAM_CASSETTE_MODE}): {path}")
+    return CassetteTransport(path, UPSTREAM_CASSETTE_MODE, UPSTREAM_LATENCY_SCALE)
@@ -7,6 +7,59 @@ load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "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")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemini-2.0-flash-001")
 
+# OpenRouter connection pool: HTTP/2 multiplexing, pool size, idle expiry and keep-alive ping interval (seconds, 0 = off)
+OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "true").lower() in ("1", "true", "yes")
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "10"))
+OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "120"))
+OPENROUTER_KEEPALIVE_INTERVAL = float(os.getenv("OPENROUTER_KEEPALIVE_INTERVAL", "45"))
+
+# Split each grid into concurrent smaller LLM calls (see CONTINUATION_SHARDS in word_generator.py)
+SHARDED_GENERATION = os.getenv("SHARDED_GENERATION", "false").lower() in ("1", "true", "yes")
+
+# Prefix spelling mode: word-frequency list, one "word count" pair per line
+LEXICON_PATH = os.getenv("LEXICON_PATH", os.path.join(os.path.dirname(__file__), "data", "lexicon.txt"))
+
+# Upstream record/replay for offline benchmarking: "record", "replay" or empty (live network)
+UPSTREAM_CASSETTE_MODE = os.getenv("UPSTREAM_CASSETTE_MODE", "")
+UPSTREAM_CASSETTE_DIR = os.getenv("UPSTREAM_CASSETTE_DIR", os.path.join(os.path.dirname(__file__), "cassettes"))
+UPSTREAM_LATENCY_SCALE = float(os.getenv("UPSTREAM_LATENCY_SCALE", "1.0"))
+
+# WebSocket fan-out (/ws/signals, /ws/transcription): per-client queue and slow-consumer policy
+BROADCAST_QUEUE_SIZE = int(os.getenv("BROADCAST_QUEUE_SIZE", "64"))
+BROADCAST_SLOW_CONSUMER = os.getenv("BROADCAST_SLOW_CONSUMER", "disconnect")  # disconnect, drop_oldest or drop_newest
+BROADCAST_SEND_TIMEOUT = float(os.getenv("BROADCAST_SEND_TIMEOUT", "5"))  # Seconds before a stuck send drops the client
+
+# State shared between uvicorn workers: "memory" (one worker) or sqlite:///path (four slashes for an absolute path)
+SHARED_STATE = os.getenv("SHARED_STATE", "memory")
+SHARED_POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", "0.05"))  # Fallback poll when a doorbell is missed
+UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", "1"))
+
+# Binary session log of gestures, predictions and speech ("" disables); see session_log.py
+SESSION_LOG_DIR = os.getenv("SESSION_LOG_DIR", os.path.join(os.path.dirname(__file__), "session_logs"))
+SESSION_LOG_MAX_MB = int(os.getenv("SESSION_LOG_MAX_MB", "16"))  # Segment size before rotating
+SESSION_LOG_KEEP = int(os.getenv("SESSION_LOG_KEEP", "50"))  # Segments kept per worker process
+
+# ElevenLabs text-to-speech
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "")  # e.g. http://localhost:8020 for fake_elevenlabs.py
+ELEVENLABS_INIT_TIMEOUT = float(os.getenv("ELEVENLABS_INIT_TIMEOUT", "10"))  # Seconds for the startup voice lookup
+TTS_MODEL_ID = os.getenv("TTS_MODEL_ID", "eleven_monolingual_v1")
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(__file__), "tts_cache"))
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "200"))  # 0 disables the cache
+
+# Voice clone uploads are spooled to disk and cloned in a background job
+VOICE_UPLOAD_MAX_MB = int(os.getenv("VOICE_UPLOAD_MAX_MB", "25"))
+
+# Multi-sentence speech is split and synthesized concurrently, streamed back in order
+TTS_CLAUSE_FANOUT = int(os.getenv("TTS_CLAUSE_FANOUT", "3"))
+TTS_CLAUSE_MAX_CHARS = int(os.getenv("TTS_CLAUSE_MAX_CHARS", "120"))  # Longer sentences split at , ; :
+
+# Pre-synthesize sentence completions for punctuated grid words. Off by default: every
+# prefetch spends ElevenLabs credits, whether or not the user picks that word
+TTS_SPECULATIVE = os.getenv("TTS_SPECULATIVE", "false").lower() in ("1", "true", "yes")
+TTS_SPECULATIVE_MAX = int(os.getenv("TTS_SPECULATIVE_MAX", "4"))  # Per grid
+TTS_SPECULATIVE_CONCURRENCY = int(os.getenv("TTS_SPECULATIVE_CONCURRENCY", "1"))
+
 # Default sentence starters (most common, ordered by frequency)
 DEFAULT_SENTENCE_STARTERS = [
     "I", "The", "It", "You", "We",
@@ -0,0 +1,156 @@
+"""
+Export or summarize session logs written by session_log.py.
+
+    python export_session_log.py                        # JSON lines for every segment in SESSION_LOG_DIR
+    python export_session_log.py logs/*.nxlog --format csv --output session.csv
+    python export_session_log.py --summary --since 2026-10-01
+
+Segments from several workers are merged in time order. The summary
+reports event counts, gesture intervals per device, prediction latency,
+and where selected words sat in the grid: a "words" request whose
+sentence extends the previous grid's sentence by one word means that
+word was selected from the previous grid.
+"""
+
+import argparse
+import csv
+import glob
+import heapq
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from config import SESSION_LOG_DIR
+from session_log import read_events
+
+CSV_COLUMNS = ("time", "kind", "device", "action", "sentence", "words", "ms", "text")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def segment_paths(paths: list[str]) -> list[str]:
+    found = []
+    for path in paths or [SESSION_LOG_DIR]:
+        if os.path.isdir(path):
+            found.extend(glob.glob(os.path.join(path, "session-*.nxlog")))
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+def merged_events(paths: list[str], since: float | None = None):
+    events = heapq.merge(*(read_events(path) for path in paths), key=lambda event: event["time"])
+    return (event for event in events if since is None or event["time"] >= since)
+
+
+def write_jsonl(events, out):
+    for event in events:
+        out.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def write_csv(events, out):
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS + ("fields",))
+    for event in events:
+        row = [event.get(column) for column in CSV_COLUMNS]
+        row[0] = datetime.fromtimestamp(event["time"]).isoformat(sep=" ", timespec="milliseconds")
+        row = [" ".join(value) if isinstance(value, list) else value for value in row]
+        rest = {k: v for k, v in event.items() if k not in CSV_COLUMNS}
+        writer.writerow(row + [json.dumps(rest, ensure_ascii=False)])
+
+
+def summarize(events) -> dict:
+    counts = Counter()
+    last_signal: dict[str, float] = {}
+    intervals: dict[str, list[float]] = defaultdict(list)
+    actions: dict[str, Counter] = defaultdict(Counter)
+    latency: dict[str, list[float]] = defaultdict(list)
+    selected_ranks = Counter()
+    refreshes_per_selection: list[int] = []
+    grid_sentence, grid_words, refreshes = None, [], 0
+    first = last = None
+
+    for event in events:
+        kind = event["kind"]
+        counts[kind] += 1
+        first = event["time"] if first is None else first
+        last = event["time"]
+
+        if kind == "signal":
+            device = event.get("device", "default")
+            actions[device][event.get("action")] += 1
+            if device in last_signal:
+                intervals[device].append(event["time"] - last_signal[device])
+            last_signal[device] = event["time"]
+        elif kind in ("words", "refresh"):
+            if event.get("ms") is not None:
+                latency[kind].append(event["ms"])
+            sentence = event.get("sentence") or []
+            if kind == "words" and grid_sentence is not None and sentence[:-1] == grid_sentence and sentence:
+                word = sentence[-1]
+                rank = grid_words.index(word) if word in grid_words else -1
+                selected_ranks["not in grid" if rank < 0 else rank] += 1
+                refreshes_per_selection.append(refreshes)
+            if kind == "words":
+                refreshes = 0
+            else:
+                refreshes += 1
+            grid_sentence, grid_words = sentence, event.get("words") or []
+
+    def spread(values: list[float], scale: float = 1.0) -> dict:
+        if not values:
+            return {"count": 0}
+        return {
+            "count": len(values),
+            "p50": round(percentile(values, 50) * scale, 1),
+            "p95": round(percentile(values, 95) * scale, 1),
+            "max": round(max(values) * scale, 1),
+        }
+
+    return {
+        "events": sum(counts.values()),
+        "span_s": round(last - first, 1) if first is not None else 0,
+        "by_kind": dict(counts),
+        "gestures": {
+            device: {"actions": dict(actions[device]), "interval_ms": spread(intervals[device], 1000)}
+            for device in actions
+        },
+        "prediction_ms": {kind: spread(values) for kind, values in latency.items()},
+        "selected_rank": dict(sorted(selected_ranks.items(), key=lambda item: (isinstance(item[0], str), item[0]))),
+        "refreshes_per_selection": spread(refreshes_per_selection),
+    }
+
+
+def main(args):
+    paths = segment_paths(args.paths)
+    if not paths:
+        sys.exit(f"No session logs found in {args.paths or SESSION_LOG_DIR}")
+    since = time.mktime(time.strptime(args.since, "%Y-%m-%d")) if args.since else None
+    events = merged_events(paths, since)
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.summary:
+            out.write(json.dumps(summarize(events), indent=2) + "\n")
+        elif args.format == "csv":
+            write_csv(events, out)
+        else:
+            write_jsonl(events, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="Segment files or directories (default: SESSION_LOG_DIR)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--summary", action="store_true", help="Print aggregate statistics instead of events")
+    parser.add_argument("--since", help="Only events on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--output", help="Write here instead of stdout")
+    main(parser.parse_args())
@@ -0,0 +1,152 @@
+"""
+Local stand-in for the ElevenLabs endpoints the backend uses, for latency testing.
+
+Implements GET /v1/voices, POST /v1/voices/add (instant voice cloning) and
+POST /v1/text-to-speech/{voice_id}[/stream]. Speech is returned as silent
+MP3 frames, paced by a configurable time-to-first-byte and chunk cadence;
+a configurable share of requests fail up front or are cut off mid-stream.
+
+    python fake_elevenlabs.py --port 8020 --ttfb-ms 300 --chunk-ms 100
+    ELEVENLABS_BASE_URL=http://localhost:8020 uvicorn main:app --port 8000
+
+GET /stats reports request counts and peak concurrent syntheses.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames, ~26ms of audio each
+MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+MP3_BYTES_PER_SECOND = 16000
+CHARS_PER_SECOND = 15  # Rough speaking rate used to size the audio
+
+settings = {
+    "ttfb_ms": 300.0,
+    "chunk_ms": 100.0,
+    "chunk_frames": 4,
+    "jitter": 0.2,
+    "failure_rate": 0.0,
+    "failure_status": 500,
+    "drop_rate": 0.0,
+    "clone_ms": 2000.0,
+}
+
+stats = {
+    "tts_requests": 0,
+    "tts_failed": 0,
+    "tts_dropped": 0,
+    "tts_active": 0,
+    "tts_peak_active": 0,
+    "bytes_sent": 0,
+    "voices_requests": 0,
+    "clone_requests": 0,
+}
+
+voices: list[dict] = [
+    {"voice_id": "fake-voice-1", "name": "Stand-in", "category": "premade"},
+]
+
+app = FastAPI(title="ElevenLabs stand-in")
+
+
+def _delay(ms: float) -> float:
+    jitter = settings["jitter"]
+    return max(0.0, ms * random.uniform(1 - jitter, 1 + jitter)) / 1000
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"detail": {"status": "stand_in_failure", "message": message}})
+
+
+@app.get("/v1/voices")
+async def get_voices():
+    stats["voices_requests"] += 1
+    return {"voices": voices}
+
+
+@app.post("/v1/voices/add")
+async def add_voice(request: Request):
+    stats["clone_requests"] += 1
+    form = await request.form()
+    await asyncio.sleep(_delay(settings["clone_ms"]))
+    if random.random() < settings["failure_rate"]:
+        return _error(settings["failure_status"], "Simulated clone failure")
+    voice = {"voice_id": f"fake-{uuid.uuid4().hex[:12]}", "name": str(form.get("name") or "clone"), "category": "cloned"}
+    voices.append(voice)
+    return {"voice_id": voice["voice_id"], "requires_verification": False}
+
+
+@app.post("/v1/text-to-speech/{voice_id}")
+@app.post("/v1/text-to-speech/{voice_id}/stream")
+async def text_to_speech(voice_id: str, request: Request):
+    body = await request.json()
+    text = body.get("text", "")
+    stats["tts_requests"] += 1
+
+    if random.random() < settings["failure_rate"]:
+        await asyncio.sleep(_delay(settings["ttfb_ms"]))
+        stats["tts_failed"] += 1
+        return _error(settings["failure_status"], "Simulated synthesis failure")
+
+    chunk = MP3_FRAME * settings["chunk_frames"]
+    total_bytes = len(text) / CHARS_PER_SECOND * MP3_BYTES_PER_SECOND
+    chunk_count = max(1, math.ceil(total_bytes / len(chunk)))
+    drop = random.random() < settings["drop_rate"]
+
+    # Time to first byte is spent before the response headers, as upstream does
+    await asyncio.sleep(_delay(settings["ttfb_ms"]))
+
+    async def audio():
+        stats["tts_active"] += 1
+        stats["tts_peak_active"] = max(stats["tts_peak_active"], stats["tts_active"])
+        try:
+            for i in range(chunk_count):
+                if i:
+                    await asyncio.sleep(_delay(settings["chunk_ms"]))
+                stats["bytes_sent"] += len(chunk)
+                yield chunk
+                if drop:
+                    stats["tts_dropped"] += 1
+                    raise ConnectionResetError("Simulated mid-stream disconnect")
+        finally:
+            stats["tts_active"] -= 1
+
+    return StreamingResponse(audio(), media_type="audio/mpeg")
+
+
+@app.get("/stats")
+async def get_stats():
+    return {"settings": settings, **stats}
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    for key in stats:
+        stats[key] = 0
+    return {"status": "reset", "at": time.time()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8020)
+    parser.add_argument("--ttfb-ms", type=float, default=settings["ttfb_ms"], help="Time to first audio byte")
+    parser.add_argument("--chunk-ms", type=float, default=settings["chunk_ms"], help="Gap between audio chunks")
+    parser.add_argument("--chunk-frames", type=int, default=settings["chunk_frames"], help="MP3 frames per chunk")
+    parser.add_argument("--jitter", type=float, default=settings["jitter"], help="Relative +/- jitter on every delay")
+    parser.add_argument("--failure-rate", type=float, default=settings["failure_rate"], help="Share of requests answered with an error")
+    parser.add_argument("--failure-status", type=int, default=settings["failure_status"], help="Status for failed requests, e.g. 429")
+    parser.add_argument("--drop-rate", type=float, default=settings["drop_rate"], help="Share of streams cut after the first chunk")
+    parser.add_argument("--clone-ms", type=float, default=settings["clone_ms"], help="Voice clone processing time")
+    args = parser.parse_args()
+
+    for key in settings:
+        settings[key] = getattr(args, key)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
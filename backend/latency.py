@@ -0,0 +1,111 @@
+"""
+End-to-end gesture latency tracing.
+
+Each gesture carries a trace id and monotonic stage timestamps from the
+LSL sample through detection, ingest, broadcast and the frontend's
+acknowledgment. Every process has its own monotonic clock, so the detector
+and each frontend estimate their offset to the backend clock (NTP-style,
+keeping the lowest round-trip sample) and stamps are mapped into backend
+time before the gaps between stages are recorded in histograms.
+
+The backend keeps no per-trace state: stamps travel with the broadcast and
+the frontend echoes them in its ack, so whichever worker receives the ack
+can record the whole trace (all workers share the host's monotonic clock).
+"""
+
+import time
+from collections import deque
+
+# Stage stamps in pipeline order; a latency is recorded for each adjacent pair present
+STAGES = ("sample", "detected", "sent", "received", "broadcast", "delivered", "rendered")
+SPANS = {
+    "end_to_end": ("sample", "rendered"),
+    "backend_to_screen": ("received", "rendered"),
+}
+
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+RECENT_SAMPLES = 2048
+
+
+def now() -> float:
+    """Backend clock for all stamps: monotonic seconds."""
+    return time.monotonic()
+
+
+def clock_reply(t0: float) -> dict:
+    """Answer to a {"type": "clock", "t0"} probe; the prober computes offset = t1 - (t0 + t2) / 2."""
+    return {"type": "clock", "t0": t0, "t1": now()}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.recent: deque[float] = deque(maxlen=RECENT_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.negative = 0  # Deltas below zero: a sign the clock offset estimate is off
+
+    def add(self, ms: float):
+        if ms < 0:
+            self.negative += 1
+            ms = 0.0
+        index = next((i for i, edge in enumerate(BUCKETS_MS) if ms <= edge), len(BUCKETS_MS))
+        self.counts[index] += 1
+        self.recent.append(ms)
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        labels = [f"<={edge}" for edge in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2),
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+            "max_ms": round(self.max, 2),
+            "negative": self.negative,
+            "buckets_ms": dict(zip(labels, self.counts)),
+        }
+
+
+class GestureTracer:
+    def __init__(self):
+        self.histograms: dict[str, Histogram] = {}
+        self.completed = 0
+
+    def complete(self, stamps: dict[str, float]):
+        """
+        Record a frontend acknowledgment: every stage stamp of one gesture, in
+        backend time. Each frontend showing the gesture acks it separately.
+        """
+        present = [stage for stage in STAGES if isinstance(stamps.get(stage), (int, float))]
+        for a, b in zip(present, present[1:]):
+            self._record(f"{a}->{b}", stamps[b] - stamps[a])
+        for name, (a, b) in SPANS.items():
+            if a in present and b in present:
+                self._record(name, stamps[b] - stamps[a])
+        self.completed += 1
+
+    def _record(self, name: str, seconds: float):
+        self.histograms.setdefault(name, Histogram()).add(seconds * 1000)
+
+    def stats(self) -> dict:
+        order = [f"{a}->{b}" for i, a in enumerate(STAGES) for b in STAGES[i + 1:]] + list(SPANS)
+        names = sorted(self.histograms, key=lambda n: order.index(n) if n in order else len(order))
+        return {
+            "completed": self.completed,
+            "stages": {name: self.histograms[name].summary() for name in names},
+        }
+
+
+# Global instance
+gesture_tracer = GestureTracer()
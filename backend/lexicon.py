@@ -0,0 +1,101 @@
+import bisect
+import heapq
+import math
+import os
+import re
+from config import (
+    LEXICON_PATH,
+    DEFAULT_SENTENCE_STARTERS,
+    DEFAULT_CONTINUATION_WORDS
+)
+
+CONTEXT_WEIGHT = 3.0  # Log-frequency bonus for words already seen in the conversation
+
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+class Lexicon:
+    """
+    Sorted prefix index over a word-frequency list.
+
+    Words are kept in one sorted list so every prefix maps to a contiguous
+    slice found with two bisects; candidates in that slice are ranked by
+    log-frequency plus a bonus for words that appear in the conversation.
+    """
+
+    def __init__(self):
+        self.words: list[str] = []
+        self.scores: list[float] = []
+        self.source: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def load(self, path: str | None = LEXICON_PATH, fallback_words: list[str] | None = None):
+        """
+        Load "word count" lines from path (one per line, any whitespace separator).
+        Falls back to the built-in word lists, ranked by list position, if the file is missing.
+        """
+        counts: dict[str, float] = {}
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if not parts:
+                        continue
+                    word = parts[0].lower()
+                    if not _WORD_RE.fullmatch(word):
+                        continue
+                    try:
+                        count = float(parts[1]) if len(parts) > 1 else 1.0
+                    except ValueError:
+                        continue
+                    counts[word] = counts.get(word, 0.0) + count
+            self.source = path
+        else:
+            # Zipf-style pseudo counts from list order so earlier words rank higher
+            builtin = list(DEFAULT_SENTENCE_STARTERS) + list(DEFAULT_CONTINUATION_WORDS) + list(fallback_words or [])
+            for rank, w in enumerate(builtin):
+                word = w.lower().rstrip('.!?')
+                if _WORD_RE.fullmatch(word):
+                    counts[word] = max(counts.get(word, 0.0), 1000.0 / (rank + 1))
+            self.source = "builtin"
+
+        ordered = sorted(counts.items())
+        self.words = [w for w, _ in ordered]
+        self.scores = [math.log(c + 1.0) for _, c in ordered]
+        print(f"Lexicon loaded: {len(self.words)} words from {self.source}")
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        lo = bisect.bisect_left(self.words, prefix)
+        hi = bisect.bisect_left(self.words, prefix + "\uffff", lo)
+        return lo, hi
+
+    def lookup(
+        self,
+        prefix: str,
+        limit: int,
+        exclude: set[str] | None = None,
+        context_words: set[str] | None = None
+    ) -> list[str]:
+        """Return up to limit words starting with prefix, best first."""
+        prefix = prefix.lower()
+        exclude = exclude or set()
+        context_words = context_words or set()
+
+        lo, hi = self._range(prefix)
+        candidates = (
+            (self.scores[i] + (CONTEXT_WEIGHT if self.words[i] in context_words else 0.0), self.words[i])
+            for i in range(lo, hi)
+            if self.words[i] not in exclude
+        )
+        return [w for _, w in heapq.nlargest(limit, candidates)]
+
+
+def context_tokens(texts: list[str]) -> set[str]:
+    """Lowercased word tokens from chat/sentence text, used to boost in-context words."""
+    tokens: set[str] = set()
+    for text in texts:
+        tokens.update(_WORD_RE.findall(text.lower()))
+    return tokens
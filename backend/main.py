@@ -1,72 +1,192 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from models import WordRequest, WordResponse, RefreshRequest, ResetBranchRequest
 from word_generator import word_generator
 from pydantic import BaseModel
-from elevenlabs import ElevenLabs
+from cassette import upstream_transport
+from audio_cache import audio_cache, cache_key, normalize_text
+from broadcast import signal_hub, transcription_hub, device_channel, DEFAULT_CHANNEL
+from latency import gesture_tracer, clock_reply, now
+from shared_state import shared_state
+from session_log import session_log
+from config import (
+    ELEVENLABS_BASE_URL,
+    ELEVENLABS_INIT_TIMEOUT,
+    TTS_MODEL_ID,
+    TTS_MAX_CONCURRENCY,
+    TTS_SPECULATIVE,
+    TTS_SPECULATIVE_MAX,
+    TTS_SPECULATIVE_CONCURRENCY,
+    TTS_CLAUSE_FANOUT,
+    TTS_CLAUSE_MAX_CHARS,
+    UVICORN_WORKERS,
+    VOICE_UPLOAD_MAX_MB
+)
+from typing import AsyncIterator, BinaryIO, TYPE_CHECKING
+import httpx
 import asyncio
+import importlib
+import time
 import json
-import io
 import base64
+import io
+import re
+import struct
 import os
+import uuid
+
+if TYPE_CHECKING:
+    from elevenlabs import AsyncElevenLabs
 
-connected_clients: list[WebSocket] = []
+# Startup is measured from module import, before the heavy SDK import moved to the background
+STARTUP_STARTED = time.perf_counter()
+startup_ms: int | None = None
+
+# name -> {"state": "pending" | "initializing" | "ready" | "failed", "init_ms", "error"}
+dependency_status: dict[str, dict] = {
+    "openrouter": {"state": "pending"},
+    "lexicon": {"state": "pending"},
+    "tts_cache": {"state": "pending"},
+    "elevenlabs": {"state": "pending"},
+    "default_voice": {"state": "pending"},
+}
+startup_tasks: list[asyncio.Task] = []
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "sk_30b0db719231579fe0bf060a65a80499fa6a780071f903b4")
-elevenlabs_client: ElevenLabs | None = None
+elevenlabs_client: "AsyncElevenLabs | None" = None
+
+# Bounds concurrent upstream syntheses; each holds one ElevenLabs stream open
+tts_semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENCY)
+# Speculative pre-synthesis gets at most this many of those slots
+speculative_semaphore = asyncio.Semaphore(TTS_SPECULATIVE_CONCURRENCY)
+speculative_keys: dict[str, set[str]] = {}  # Device channel -> keys of its grid's prefetches
+
+# Active voice lives in shared_state ("voice_id") so every worker speaks with the same voice;
+# a device that picked or cloned its own voice has "voice_id:<device>" (see voice_key).
+# "voice_generation" is bumped on every voice change; a clone job only activates its
+# voice if nothing changed since it was queued.
 
-current_voice_id: str | None = None
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # Multipart boundaries and the other form fields
+MAX_CLONE_JOBS = 50  # Finished jobs kept for status polling
+clone_jobs: list[str] = []  # Ids of jobs started by this worker, oldest first; status in shared_state
+clone_tasks: set[asyncio.Task] = set()
 
 class SignalRequest(BaseModel):
-    action: str  # "RIGHT", "DOWN", or "SELECT"
+    action: str  # "RIGHT", "DOWN", "SELECT", or "CORRECT_DOWN" (undo the last RIGHT, then DOWN)
     timestamp: float | None = None
+    sender: str | None = None  # With seq: lets retried gestures be recognized and dropped
+    seq: int | None = None
+    trace: str | None = None
+    stamps: dict[str, float] | None = None  # Detector stage times on its monotonic clock
+    clock_offset: float | None = None  # Backend clock minus detector clock
+    device: str | None = None  # Only /ws/signals clients of this device receive it
+    corrects: str | None = None  # CORRECT_DOWN: trace of the speculative RIGHT it undoes
 
 class TTSRequest(BaseModel):
     text: str
     voice_id: str | None = None
+    device: str | None = None  # Speaks with this device's voice when voice_id is not given
 
 class TranscriptionRequest(BaseModel):
     text: str
     speaker: str = "Other Person"
     timestamp: float | None = None
+    device: str | None = None  # Only /ws/transcription clients of this device receive it
+
+
+async def init_dependency(name: str, init):
+    """Run one startup step in the background, recording its state and duration for /api/ready."""
+    dependency_status[name] = {"state": "initializing"}
+    started = time.perf_counter()
+    try:
+        await init()
+        dependency_status[name] = {"state": "ready", "init_ms": int((time.perf_counter() - started) * 1000)}
+    except Exception as e:
+        print(f"Startup: {name} failed: {e}")
+        dependency_status[name] = {
+            "state": "failed",
+            "init_ms": int((time.perf_counter() - started) * 1000),
+            "error": str(e)
+        }
+
+
+async def init_elevenlabs():
+    """Import the ElevenLabs SDK off the event loop and build the client."""
+    global elevenlabs_client
+
+    print("Initializing ElevenLabs client...")
+    elevenlabs = await asyncio.to_thread(importlib.import_module, "elevenlabs")
+    elevenlabs_transport = upstream_transport("elevenlabs")
+    if elevenlabs_transport:
+        elevenlabs_client = elevenlabs.AsyncElevenLabs(
+            api_key=ELEVENLABS_API_KEY,
+            base_url=ELEVENLABS_BASE_URL or None,
+            httpx_client=httpx.AsyncClient(timeout=240, transport=elevenlabs_transport)
+        )
+    else:
+        elevenlabs_client = elevenlabs.AsyncElevenLabs(api_key=ELEVENLABS_API_KEY, base_url=ELEVENLABS_BASE_URL or None)
+    print("ElevenLabs client ready!")
+
+    await init_dependency("default_voice", load_default_voice)
+
+
+async def load_default_voice():
+    voices = await asyncio.wait_for(elevenlabs_client.voices.get_all(), ELEVENLABS_INIT_TIMEOUT)
+    voice_id = None
+    if hasattr(voices, "voices") and voices.voices:
+        voice_id = voices.voices[0].voice_id
+    elif isinstance(voices, list) and len(voices) > 0:
+        voice_id = voices[0].voice_id
+    if voice_id:
+        # A voice chosen or cloned while we were loading (or by another worker) takes precedence
+        if active_voice_id() is None:
+            await shared_state.set("voice_id", voice_id)
+        print(f"Default ElevenLabs voice set to: {active_voice_id()}")
+    else:
+        print("No ElevenLabs voices found; TTS will require explicit voice_id.")
+
+
+async def init_openrouter():
+    word_generator.load_model()
+    word_generator.start_warm_up()
 
-# Store connected transcription clients (frontends listening for other people's speech)
-transcription_clients: list[WebSocket] = []
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global elevenlabs_client, current_voice_id
+    global startup_ms
+
+    # Cross-worker broadcasts arrive here and fan out to this worker's WebSocket clients
+    await shared_state.start()
+    session_log.start()
+    # The topic of each message is its device channel
+    shared_state.subscribe("signals", signal_hub.publish)
+    shared_state.subscribe("transcription", transcription_hub.publish)
 
-    # Startup - initialize OpenRouter client
+    # Only cheap, local setup happens before we accept connections; SDK imports,
+    # file indexing and network calls run as background tasks reported by /api/ready.
     print("Starting up - initializing OpenRouter client...")
-    word_generator.load_model()
+    await init_dependency("openrouter", init_openrouter)
     print("OpenRouter client ready!")
 
-    print("Initializing ElevenLabs client...")
-    elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
-    print("ElevenLabs client ready!")
+    startup_tasks.extend([
+        asyncio.create_task(init_dependency("lexicon", lambda: asyncio.to_thread(word_generator.load_lexicon))),
+        asyncio.create_task(init_dependency("tts_cache", audio_cache.load)),
+        asyncio.create_task(init_dependency("elevenlabs", init_elevenlabs)),
+    ])
 
-    try:
-        voices = elevenlabs_client.voices.get_all()
-        voice_id = None
-        if hasattr(voices, "voices") and voices.voices:
-            voice_id = voices.voices[0].voice_id
-        elif isinstance(voices, list) and len(voices) > 0:
-            voice_id = voices[0].voice_id
-        if voice_id:
-            current_voice_id = voice_id
-            print(f"Default ElevenLabs voice set to: {current_voice_id}")
-        else:
-            print("No ElevenLabs voices found; TTS will require explicit voice_id.")
-    except Exception as e:
-        print(f"Failed to load default ElevenLabs voice: {e}")
+    startup_ms = int((time.perf_counter() - STARTUP_STARTED) * 1000)
+    print(f"Accepting connections {startup_ms}ms after import")
 
     yield
 
     # Shutdown
+    for task in startup_tasks:
+        task.cancel()
     await word_generator.close()
+    await shared_state.close()
+    session_log.close()
 
 app = FastAPI(
     title="Jaw-Clench Word Generator API",
@@ -76,6 +196,26 @@ app = FastAPI(
 )
 
 # CORS middleware for frontend
+class UploadLimit:
+    """
+    Reject an oversized voice sample from its Content-Length, before Starlette
+    reads and spools the body. Added before CORS so the 413 carries CORS headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/api/clone-voice":
+            length = dict(scope["headers"]).get(b"content-length", b"")
+            if length.isdigit() and int(length) > VOICE_UPLOAD_MAX_MB * 1024 * 1024 + UPLOAD_FORM_OVERHEAD:
+                response = JSONResponse({"detail": f"Audio sample larger than {VOICE_UPLOAD_MAX_MB} MB"}, status_code=413)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(UploadLimit)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:3000"],
@@ -88,19 +228,81 @@ app.add_middleware(
 async def root():
     return {"message": "Jaw-Clench Word Generator API", "status": "running"}
 
+# One word session at a time per worker: a handler restores the shared session into
+# the single word_generator and awaits the LLM, so another could not interleave
+word_session_lock = asyncio.Lock()
+
+
+@asynccontextmanager
+async def word_session():
+    """
+    With several workers, load the word generator's session (used and excluded
+    words, caches, two-step tree) from shared_state before a handler and save
+    the fields it changed afterwards, so the next request can land on any worker.
+    A field another worker saved in the meantime keeps that worker's value.
+    """
+    if not shared_state.shared:
+        yield
+        return
+    async with word_session_lock:
+        keys = {field: f"words:{field}" for field in word_generator.SESSION_FIELDS}
+        loaded = {field: shared_state.get(key) for field, key in keys.items()}
+        word_generator.restore_session({field: value for field, value in loaded.items() if value is not None})
+        before = word_generator.session_state()
+        try:
+            yield
+        finally:
+            after = word_generator.session_state()
+            conflicts = await shared_state.compare_and_set({
+                keys[field]: (loaded[field], after[field]) for field in keys if after[field] != before[field]
+            })
+            if conflicts:
+                print(f"Word session changed by another worker, kept its {', '.join(conflicts)}")
+
+
+def log_prediction(kind: str, request, words: list[str], duration_ms: int | None = None, **fields):
+    """Session-log a prediction call with the sentence context it was made in."""
+    session_log.record(
+        kind,
+        sentence=request.current_sentence,
+        sentence_start=request.is_sentence_start,
+        prefix=getattr(request, "prefix", None),
+        history=len(request.chat_history),
+        words=words,
+        ms=duration_ms,
+        **fields
+    )
+
+
 @app.post("/api/words", response_model=WordResponse)
 async def get_words(request: WordRequest):
     """
     Generate 24 contextual words based on chat history and current sentence.
     Returns both display words and cached words (different sets, no duplicates).
     Words are ordered by likelihood (index 0 = most likely).
+    If a prefix is given, words come from the local lexicon instead of the LLM.
     """
+    async with word_session():
+        return await _get_words(request)
+
+
+async def _get_words(request: WordRequest) -> WordResponse:
     try:
-        display_words, cached_words, duration_ms = await word_generator.generate_initial_words(
-            chat_history=request.chat_history,
-            current_sentence=request.current_sentence,
-            is_sentence_start=request.is_sentence_start
-        )
+        if request.prefix:
+            display_words, cached_words, duration_ms = word_generator.generate_prefix_words(
+                chat_history=request.chat_history,
+                current_sentence=request.current_sentence,
+                is_sentence_start=request.is_sentence_start,
+                prefix=request.prefix
+            )
+        else:
+            display_words, cached_words, duration_ms = await word_generator.generate_initial_words(
+                chat_history=request.chat_history,
+                current_sentence=request.current_sentence,
+                is_sentence_start=request.is_sentence_start
+            )
+        speculate_sentence_endings(request.current_sentence, display_words, request.device)
+        log_prediction("words", request, display_words, duration_ms, cached=len(cached_words))
         return WordResponse(
             words=display_words, 
             cached_words=cached_words, 
@@ -115,14 +317,30 @@ async def refresh_words(request: RefreshRequest, background_tasks: BackgroundTas
     Generate new words excluding previously shown words in this layer.
     Each refresh shows completely different words until a word is selected.
     """
-    try:
-        display_words, _, duration_ms = await word_generator.generate_initial_words(
-            chat_history=request.chat_history,
-            current_sentence=request.current_sentence,
-            is_sentence_start=request.is_sentence_start,
-            is_refresh=True  # Don't clear tracking, just add to exclusions
-        )
+    async with word_session():
+        return await _refresh_words(request)
+
 
+async def _refresh_words(request: RefreshRequest) -> WordResponse:
+    try:
+        if request.prefix:
+            display_words, _, duration_ms = word_generator.generate_prefix_words(
+                chat_history=request.chat_history,
+                current_sentence=request.current_sentence,
+                is_sentence_start=request.is_sentence_start,
+                prefix=request.prefix,
+                is_refresh=True
+            )
+        else:
+            display_words, _, duration_ms = await word_generator.generate_initial_words(
+                chat_history=request.chat_history,
+                current_sentence=request.current_sentence,
+                is_sentence_start=request.is_sentence_start,
+                is_refresh=True  # Don't clear tracking, just add to exclusions
+            )
+
+        speculate_sentence_endings(request.current_sentence, display_words, request.device)
+        log_prediction("refresh", request, display_words, duration_ms)
         return WordResponse(
             words=display_words,
             cached_words=[],
@@ -136,12 +354,18 @@ async def generate_cache(request: WordRequest):
     """
     Generate new cache in background. Called by frontend while user navigates.
     """
+    async with word_session():
+        return await _generate_cache(request)
+
+
+async def _generate_cache(request: WordRequest) -> dict:
     try:
         cache_words = await word_generator.generate_cache_background(
             chat_history=request.chat_history,
             current_sentence=request.current_sentence,
             is_sentence_start=request.is_sentence_start
         )
+        log_prediction("generate_cache", request, cache_words)
         return {"cached_words": cache_words, "status": "generated"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -149,19 +373,27 @@ async def generate_cache(request: WordRequest):
 @app.get("/api/cache")
 async def get_cache():
     """Get current cached words without regenerating."""
-    return {
-        "cached_words": word_generator.get_cached_words(),
-        "used_words": word_generator.get_used_words()
-    }
+    async with word_session():
+        return {
+            "cached_words": word_generator.get_cached_words(),
+            "used_words": word_generator.get_used_words()
+        }
 
 @app.post("/api/clear-used")
 async def clear_used_words():
     """Clear used words tracking (called when starting new sentence)."""
-    word_generator.clear_used_words()
+    async with word_session():
+        word_generator.clear_used_words()
+    session_log.record("clear_used")
     return {"status": "cleared"}
 
 @app.post("/api/reset-branch")
 async def reset_branch(request: ResetBranchRequest):
+    async with word_session():
+        return await _reset_branch(request)
+
+
+async def _reset_branch(request: ResetBranchRequest) -> dict:
     try:
         words = await word_generator.reset_two_step_branch(
             chat_history=request.chat_history,
@@ -169,6 +401,7 @@ async def reset_branch(request: ResetBranchRequest):
             is_sentence_start=request.is_sentence_start,
             first_word=request.first_word
         )
+        log_prediction("reset_branch", request, words, first_word=request.first_word)
         return {"words": words}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -180,51 +413,310 @@ async def health_check():
         "model_loaded": word_generator.is_loaded
     }
 
+@app.get("/api/ready")
+async def readiness():
+    """
+    Startup state of each dependency. Signals and predictions are served as soon as
+    OpenRouter is ready (200); TTS waits for "elevenlabs", prefix mode for "lexicon".
+    """
+    ready = dependency_status["openrouter"]["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "startup_ms": startup_ms,
+            "uptime_ms": int((time.perf_counter() - STARTUP_STARTED) * 1000),
+            "dependencies": dependency_status,
+            "shared_state": shared_state.stats()
+        }
+    )
+
+
+@app.get("/api/connection-stats")
+async def connection_stats():
+    """OpenRouter connection reuse and cold-connect timings."""
+    return word_generator.get_connection_stats()
+
+
+# ============ PREDICTION RPC (one WebSocket instead of per-call POSTs) ============
+
+# op -> (request model, handler). Handlers are the HTTP endpoints above, so both paths behave the same.
+PREDICT_OPS = {
+    "words": (WordRequest, get_words),
+    "refresh": (RefreshRequest, lambda request: refresh_words(request, BackgroundTasks())),
+    "generate_cache": (WordRequest, generate_cache),
+    "reset_branch": (ResetBranchRequest, reset_branch),
+}
+
+# Ops that replace the grid: a newer one cancels any still in flight
+GRID_OPS = {"words", "refresh"}
+
+
+@app.websocket("/ws/predict")
+async def predict_websocket(websocket: WebSocket):
+    """
+    Multiplexed prediction channel.
+    Receives: {"id": "1", "op": "words" | "refresh" | "generate_cache" | "reset_branch", "params": {...}}
+              {"id": "1", "op": "cancel"} or "ping"
+    Returns:  {"id": "1", "op": "words", "result": {...}} or {"id": "1", "op": "words", "error": "..."}
+    Pushes:   {"id": "1", "op": "words", "cancelled": true} when superseded by a newer grid request
+              {"op": "cache", "result": {...}} after "words" with params.prefetch_cache = true
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+    in_flight: dict[str, asyncio.Task] = {}
+    grid_request_id: str | None = None
+    connected = True
+
+    async def send(message: dict | str):
+        # Responses from concurrent tasks share one socket; drop them once the client is gone
+        if not connected:
+            return
+        async with send_lock:
+            await websocket.send_text(message if isinstance(message, str) else json.dumps(message))
+
+    async def run(request_id: str, op: str, params: dict):
+        model, handler = PREDICT_OPS[op]
+        prefetch_cache = bool(params.pop("prefetch_cache", False))
+        try:
+            request = model(**params)
+            result = await handler(request)
+            if isinstance(result, BaseModel):
+                result = result.model_dump()
+            await send({"id": request_id, "op": op, "result": result})
+        except asyncio.CancelledError:
+            await send({"id": request_id, "op": op, "cancelled": True})
+            raise
+        except HTTPException as e:
+            await send({"id": request_id, "op": op, "error": e.detail})
+            return
+        except Exception as e:
+            await send({"id": request_id, "op": op, "error": str(e)})
+            return
+        finally:
+            in_flight.pop(request_id, None)
+
+        if prefetch_cache:
+            try:
+                cache = await generate_cache(WordRequest(**params))
+                await send({"op": "cache", "result": cache})
+            except Exception as e:
+                print(f"Predict WebSocket cache push failed: {e}")
+
+    try:
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await send("pong")
+                continue
+
+            try:
+                message = json.loads(data)
+                request_id = str(message["id"])
+                op = message["op"]
+            except (ValueError, KeyError, TypeError):
+                await send({"error": "Expected {\"id\", \"op\", \"params\"}"})
+                continue
+
+            if op == "cancel":
+                task = in_flight.get(request_id)
+                if task:
+                    task.cancel()
+                continue
+
+            if op not in PREDICT_OPS:
+                await send({"id": request_id, "op": op, "error": f"Unknown op: {op}"})
+                continue
+
+            if op in GRID_OPS:
+                previous = in_flight.get(grid_request_id) if grid_request_id else None
+                if previous:
+                    previous.cancel()
+                grid_request_id = request_id
+
+            in_flight[request_id] = asyncio.create_task(run(request_id, op, dict(message.get("params") or {})))
+
+    except WebSocketDisconnect:
+        print("Predict WebSocket client disconnected")
+    finally:
+        connected = False
+        for task in list(in_flight.values()):
+            task.cancel()
+
 
 # ============ SIGNAL HANDLING (for ClenchDetection.py) ============
 
 @app.websocket("/ws/signals")
-async def websocket_signals(websocket: WebSocket):
-    """WebSocket endpoint for frontend to receive signals from ClenchDetection.py"""
+async def websocket_signals(websocket: WebSocket, device: str | None = None):
+    """
+    WebSocket endpoint for frontend to receive signals from ClenchDetection.py.
+    ?device=<id> receives only that device's gestures; without it, the default channel's.
+    """
     await websocket.accept()
-    connected_clients.append(websocket)
-    print(f"WebSocket client connected. Total clients: {len(connected_clients)}")
+    subscriber = signal_hub.subscribe(websocket, device_channel(device))
+    print(f"WebSocket client connected to '{subscriber.channel}'. Total clients: {len(signal_hub)}")
     try:
         while True:
             # Keep connection alive, wait for messages (ping/pong)
             data = await websocket.receive_text()
-            # Echo back for keepalive
+            # Echo back for keepalive, through the client's queue so its writer stays the only sender
             if data == "ping":
-                await websocket.send_text("pong")
+                subscriber.send("pong")
+                continue
+            try:
+                message = json.loads(data)
+            except ValueError:
+                continue
+            reply = handle_trace_message(message)
+            if reply:
+                subscriber.send(json.dumps(reply))
     except WebSocketDisconnect:
-        connected_clients.remove(websocket)
-        print(f"WebSocket client disconnected. Total clients: {len(connected_clients)}")
+        pass
+    finally:
+        signal_hub.unsubscribe(subscriber)
+        print(f"WebSocket client disconnected. Total clients: {len(signal_hub)}")
 
 
 @app.post("/api/signal")
 async def receive_signal(request: SignalRequest):
     """
-    Receive signals from ClenchDetection.py and broadcast to all connected frontends.
-    Actions: RIGHT, DOWN, SELECT
+    Receive signals from ClenchDetection.py and broadcast to the frontends of request.device.
+    Actions: RIGHT, DOWN, SELECT, CORRECT_DOWN (speculative RIGHT was half of a double clench)
     """
+    received = now()
     action = request.action.upper()
+    notified = await publish_signal(
+        action, request.timestamp, request.sender, request.seq,
+        request.trace, request.stamps, request.clock_offset, received, request.device, request.corrects
+    )
+    return {"status": "ok", "action": action, **delivery(notified)}
+
+
+def delivery(notified: int) -> dict:
+    """Response field for a publish: this process's clients, or with shared state the workers woken."""
+    return {"workers_notified": notified} if shared_state.shared else {"clients_notified": notified}
+
+
+async def publish_signal(
+    action: str,
+    timestamp: float | None,
+    sender: str | None = None,
+    seq: int | None = None,
+    trace: str | None = None,
+    stamps: dict[str, float] | None = None,
+    clock_offset: float | None = None,
+    received: float | None = None,
+    device: str | None = None,
+    corrects: str | None = None
+) -> int:
+    """
+    Broadcast a gesture to the frontends unless this sender's seq was already applied.
+    Detector stamps are moved onto the backend clock with clock_offset and travel
+    with the gesture; frontends echo them in their ack (see latency.py), so any
+    worker can record the trace. Returns the local client count, or the number
+    of workers woken when the gesture went out through shared state.
+    """
+    # Highest seq applied per detector process lives in shared state: at-least-once
+    # senders retry, possibly through another worker
+    if sender and seq is not None and not await shared_state.advance(f"ingest_seq:{sender}", seq):
+        print(f"Duplicate signal #{seq} from {sender[:8]} ignored")
+        return 0
+
     print(f"Received signal: {action}")
+    trace = trace or uuid.uuid4().hex[:12]
+    session_log.record(
+        "signal", action=action, device=device_channel(device), timestamp=timestamp,
+        sender=sender, seq=seq, trace=trace, corrects=corrects
+    )
+    backend_stamps = {}
+    if stamps and clock_offset is not None:
+        backend_stamps.update({stage: t + clock_offset for stage, t in stamps.items()})
+    backend_stamps["received"] = received if received is not None else now()
+    backend_stamps["broadcast"] = now()
+
+    # Queued per client of the device's channel; returns without waiting for any socket
+    message = {"action": action, "timestamp": timestamp, "trace": trace, "stamps": backend_stamps}
+    if corrects:
+        message["corrects"] = corrects
+    return await shared_state.publish("signals", json.dumps(message), device_channel(device))
+
+
+def handle_trace_message(message: dict) -> dict | None:
+    """Clock probes and frontend acks on /ws/signals; returns the reply to send, if any."""
+    if message.get("type") == "clock":
+        return clock_reply(message.get("t0"))
+    if message.get("type") == "ack" and message.get("clock_offset") is not None:
+        offset = message["clock_offset"]
+        stamps = dict(message.get("stamps") or {})
+        stamps.update({stage: message[stage] + offset for stage in ("delivered", "rendered") if stage in message})
+        gesture_tracer.complete(stamps)
+    return None
+
+
+@app.get("/api/latency")
+async def latency_stats():
+    """Per-stage gesture latency histograms (ms), from LSL sample to frontend render, for this worker."""
+    return gesture_tracer.stats()
+
+
+@app.websocket("/ws/ingest")
+async def ingest_websocket(websocket: WebSocket):
+    """
+    Persistent gesture channel for ClenchDetection (see Signal_Processing/signal_sender.py).
+    Sender opens with {"type": "hello", "sender": id, "device": id} and gets {"type": "hello", "last_seq": n};
+    then sends {"seq", "action", "timestamp"} and gets {"ack": seq} once it is broadcast.
+    Gestures are resent until acked, and seq <= last_seq are acked without rebroadcasting.
+    Gestures may carry "trace", "stamps" and "clock_offset"; {"type": "clock", "t0"}
+    probes are answered with the backend clock for offset estimation.
+    """
+    await websocket.accept()
+    sender = None
+    device = None
+    print("Ingest client connected")
 
-    # Broadcast to all connected WebSocket clients
-    disconnected = []
-    for client in connected_clients:
-        try:
-            await client.send_text(json.dumps({"action": action, "timestamp": request.timestamp}))
-        except Exception as e:
-            print(f"Failed to send to client: {e}")
-            disconnected.append(client)
+    try:
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+                continue
+
+            received = now()
+            message = json.loads(data)
+            if message.get("type") == "clock":
+                await websocket.send_text(json.dumps(clock_reply(message.get("t0"))))
+                continue
+            if message.get("type") == "hello":
+                sender = str(message.get("sender") or "") or None
+                device = str(message.get("device") or "") or None
+                await websocket.send_text(json.dumps({
+                    "type": "hello",
+                    "last_seq": shared_state.get(f"ingest_seq:{sender}", 0) if sender else 0
+                }))
+                continue
+
+            seq = message.get("seq")
+            await publish_signal(
+                str(message.get("action", "")).upper(), message.get("timestamp"), sender, seq,
+                message.get("trace"), message.get("stamps"), message.get("clock_offset"), received, device,
+                str(message.get("corrects") or "") or None
+            )
+            await websocket.send_text(json.dumps({"ack": seq}))
+
+    except WebSocketDisconnect:
+        print("Ingest client disconnected")
 
-    # Clean up disconnected clients
-    for client in disconnected:
-        if client in connected_clients:
-            connected_clients.remove(client)
 
-    return {"status": "ok", "action": action, "clients_notified": len(connected_clients)}
+@app.get("/api/session-log")
+async def session_log_stats():
+    """Session log writer: current segment, records written, queued and dropped."""
+    return session_log.stats()
+
+
+@app.get("/api/broadcast-stats")
+async def broadcast_stats():
+    """Fan-out queues for /ws/signals and /ws/transcription."""
+    return {"signals": signal_hub.stats(), "transcription": transcription_hub.stats()}
 
 
 # Also support the /api/process endpoint that ClenchDetection.py currently uses
@@ -236,83 +728,299 @@ async def process_signal(request: SignalRequest):
 
 # ============ ELEVENLABS TEXT-TO-SPEECH ============
 
-@app.post("/api/clone-voice")
-async def clone_voice(name: str = Form(...), audio_file: UploadFile = File(...)):
+def voice_key(name: str, device: str | None = None) -> str:
+    """Shared-state key of a voice setting; the default channel uses the unscoped key."""
+    channel = device_channel(device)
+    return name if channel == DEFAULT_CHANNEL else f"{name}:{channel}"
+
+
+def active_voice_id(device: str | None = None) -> str | None:
+    """The device's voice, falling back to the default voice."""
+    return shared_state.get(voice_key("voice_id", device)) or shared_state.get("voice_id")
+
+
+async def select_voice(voice_id: str, device: str | None = None):
+    """Make voice_id the device's TTS voice. Requests already speaking keep the voice they started with."""
+    await shared_state.set(voice_key("voice_id", device), voice_id)
+    await shared_state.incr(voice_key("voice_generation", device))
+
+
+async def save_clone_job(job: dict):
+    await shared_state.set(f"clone_job:{job['job_id']}", job)
+
+
+def take_upload(upload: UploadFile) -> BinaryIO:
     """
-    Upload audio sample to clone user's voice.
-    Returns voice_id to use for TTS.
+    Take over the temporary file Starlette already spooled the upload into, so the
+    clone job can read it after the response without a second copy. Starlette
+    closes the form's files once the response is sent; it now closes an empty one.
     """
-    global current_voice_id
+    spooled = upload.file
+    upload.file = io.BytesIO()
+    return spooled
 
-    if not elevenlabs_client:
-        raise HTTPException(status_code=500, detail="ElevenLabs client not initialized")
 
+async def run_clone_job(job: dict, audio: BinaryIO):
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    await save_clone_job(job)
     try:
-        audio_bytes = await audio_file.read()
-        buffer = io.BytesIO(audio_bytes)
-        buffer.name = audio_file.filename or f"{name}.mp3"
+        await asyncio.to_thread(audio.seek, 0)
+        voice = await elevenlabs_client.voices.ivc.create(name=job["name"], files=[(job["filename"], audio)])
+        job["voice_id"] = voice.voice_id
+        print(f"Voice cloned successfully: {voice.voice_id}")
 
-        voice = elevenlabs_client.voices.ivc.create(
-            name=name,
-            files=[buffer]
-        )
+        # Switch only if no other voice was selected (or cloned) after this upload
+        job["activated"] = shared_state.get(voice_key("voice_generation", job["device"]), 0) == job["generation"]
+        if job["activated"]:
+            await select_voice(voice.voice_id, job["device"])
+        job["status"] = "succeeded"
+    except Exception as e:
+        print(f"Voice cloning error: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = time.time()
+        await save_clone_job(job)
+        await asyncio.to_thread(audio.close)  # Deletes the temporary file
+
+
+@app.post("/api/clone-voice", status_code=202)
+async def clone_voice(
+    name: str = Form(...),
+    audio_file: UploadFile = File(...),
+    device: str | None = Form(None)
+):
+    """
+    Upload audio sample to clone user's voice.
+    Oversized samples are refused from Content-Length before the body is read.
+    The sample is cloned in the background from the file Starlette spooled it to; poll
+    /api/clone-voice/{job_id} for the voice_id. The new voice becomes
+    the device's voice when the job succeeds unless another was chosen meanwhile.
+    """
+    if not elevenlabs_client:
+        raise HTTPException(status_code=503, detail=f"ElevenLabs client not ready ({dependency_status['elevenlabs']['state']})")
+
+    # Uploads without a Content-Length (chunked) can only be checked once received
+    size = audio_file.size or 0
+    if size > VOICE_UPLOAD_MAX_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Audio sample larger than {VOICE_UPLOAD_MAX_MB} MB")
+    audio = take_upload(audio_file)
+
+    # Queuing a clone counts as a voice choice, superseding earlier clones still running
+    generation = await shared_state.incr(voice_key("voice_generation", device))
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "name": name,
+        "filename": audio_file.filename or f"{name}.mp3",
+        "device": device_channel(device),
+        "status": "queued",
+        "bytes": size,
+        "generation": generation,
+        "voice_id": None,
+        "activated": False,
+        "error": None,
+        "created_at": time.time(),
+    }
+    await save_clone_job(job)
+    clone_jobs.append(job["job_id"])
+    while len(clone_jobs) > MAX_CLONE_JOBS:
+        oldest = next((j for j in clone_jobs
+                       if shared_state.get(f"clone_job:{j}", {}).get("status") in ("succeeded", "failed")), None)
+        if oldest is None:
+            break
+        clone_jobs.remove(oldest)
+        await shared_state.delete(f"clone_job:{oldest}")
 
-        print(f"Voice cloned successfully: {voice.voice_id}")
+    task = asyncio.create_task(run_clone_job(job, audio))
+    clone_tasks.add(task)
+    task.add_done_callback(clone_tasks.discard)
 
-        current_voice_id = voice.voice_id
+    print(f"Voice clone job {job['job_id']} queued: '{name}', {size // 1024} KB")
+    return {"status": "queued", "job_id": job["job_id"], "name": name}
 
-        return {
-            "status": "success",
-            "voice_id": voice.voice_id,
-            "name": name
-        }
 
-    except Exception as e:
-        print(f"Voice cloning error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/clone-voice/{job_id}")
+async def clone_voice_status(job_id: str):
+    """Status of a clone job: queued, running, succeeded (with voice_id) or failed (with error)."""
+    job = shared_state.get(f"clone_job:{job_id}")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown clone job")
+    return {k: v for k, v in job.items() if k != "generation"}
 
 
 @app.post("/api/set-voice")
-async def set_voice(voice_id: str):
-    """Set the active voice for TTS."""
-    global current_voice_id
-    current_voice_id = voice_id
-    print(f"Active voice set to: {voice_id}")
+async def set_voice(voice_id: str, device: str | None = None):
+    """Set the active voice for TTS on a device (the default voice when no device is given)."""
+    await select_voice(voice_id, device)
+    print(f"Active voice for '{device_channel(device)}' set to: {voice_id}")
     return {"status": "success", "voice_id": voice_id}
 
 
 @app.get("/api/get-voice")
-async def get_voice():
-    """Get the current active voice_id."""
-    return {"voice_id": current_voice_id}
+async def get_voice(device: str | None = None):
+    """Get the active voice_id of a device."""
+    return {"voice_id": active_voice_id(device)}
+
+
+async def synthesize(text: str, voice_id: str) -> AsyncIterator[bytes]:
+    """Stream MP3 chunks from ElevenLabs as they arrive, without blocking the event loop."""
+    async with tts_semaphore:
+        async for chunk in elevenlabs_client.text_to_speech.convert(
+            voice_id=voice_id,
+            text=text,
+            model_id=TTS_MODEL_ID
+        ):
+            if chunk:
+                yield chunk
+
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+CLAUSE_BOUNDARY = re.compile(r"(?<=[,;:])\s+")
+MIN_CLAUSE_CHARS = 12  # Shorter trailing fragments are merged into the previous clause
+
+
+def split_clauses(text: str) -> list[str]:
+    """Split text into sentences, and overly long sentences into clauses, for parallel synthesis."""
+    parts: list[str] = []
+    for sentence in SENTENCE_BOUNDARY.split(normalize_text(text)):
+        if len(sentence) > TTS_CLAUSE_MAX_CHARS:
+            parts.extend(CLAUSE_BOUNDARY.split(sentence))
+        else:
+            parts.append(sentence)
+
+    clauses: list[str] = []
+    for part in parts:
+        if clauses and len(part) < MIN_CLAUSE_CHARS:
+            clauses[-1] = f"{clauses[-1]} {part}"
+        elif part:
+            clauses.append(part)
+    return clauses or [text]
+
+
+async def speech_stream(text: str, voice_id: str) -> AsyncIterator[bytes]:
+    """
+    Audio for text, clause by clause. Up to TTS_CLAUSE_FANOUT clauses are synthesized
+    concurrently (each through the audio cache) and their chunks are yielded in order,
+    so the first clause plays while later ones are still being generated.
+    """
+    clauses = split_clauses(text)
+    if len(clauses) == 1:
+        async for chunk in audio_cache.stream(voice_id, TTS_MODEL_ID, clauses[0], synthesize):
+            yield chunk
+        return
+
+    fanout = asyncio.Semaphore(TTS_CLAUSE_FANOUT)
+    queues: list[asyncio.Queue] = [asyncio.Queue() for _ in clauses]
+
+    async def fill(clause: str, queue: asyncio.Queue):
+        try:
+            async with fanout:
+                async for chunk in audio_cache.stream(voice_id, TTS_MODEL_ID, clause, synthesize):
+                    queue.put_nowait(chunk)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    tasks = [asyncio.create_task(fill(clause, queue)) for clause, queue in zip(clauses, queues)]
+    try:
+        for queue in queues:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def start_audio_stream(text: str, voice_id: str) -> AsyncIterator[bytes]:
+    """
+    Start synthesis and wait for the first chunk, so upstream errors still surface
+    before the response starts; the rest is forwarded as it arrives.
+    """
+    audio = speech_stream(text, voice_id)
+    try:
+        first_chunk = await anext(audio, b"")
+    except Exception:
+        await audio.aclose()
+        raise
+
+    async def forward():
+        try:
+            yield first_chunk
+            async for chunk in audio:
+                yield chunk
+        finally:
+            await audio.aclose()
+
+    return forward()
+
+
+def speculate_sentence_endings(current_sentence: list[str], words: list[str], device: str | None = None):
+    """
+    Pre-synthesize the sentence for each sentence-ending word on the grid into the audio cache,
+    in the device's voice, so selecting one plays from disk. Speculation for the device's
+    previous grid that hasn't been picked up by a real request is cancelled.
+    """
+    voice_id = active_voice_id(device)
+    if not TTS_SPECULATIVE or not elevenlabs_client or not voice_id:
+        return
+
+    keys: set[str] = set()
+    for word in words:
+        if len(keys) >= TTS_SPECULATIVE_MAX:
+            break
+        if not word.endswith(('.', '!', '?')):
+            continue
+        # Prefetch the same clauses speech_stream will request
+        for clause in split_clauses(" ".join(current_sentence + [word])):
+            keys.add(cache_key(voice_id, TTS_MODEL_ID, clause))
+            audio_cache.prefetch(voice_id, TTS_MODEL_ID, clause, synthesize, speculative_semaphore)
+
+    channel = device_channel(device)
+    # Another device on the same voice may still want the same sentence
+    elsewhere = set().union(*(other for name, other in speculative_keys.items() if name != channel))
+    for key in speculative_keys.get(channel, set()) - keys - elsewhere:
+        audio_cache.cancel_prefetch(key)
+    speculative_keys[channel] = keys
 
 
 @app.post("/api/text-to-speech")
 async def text_to_speech(request: TTSRequest):
     """
     Convert text to speech using cloned voice.
-    Returns audio as streaming response.
+    Returns audio as streaming response; playback can start on the first chunk.
     """
     if not elevenlabs_client:
-        raise HTTPException(status_code=500, detail="ElevenLabs client not initialized")
+        raise HTTPException(status_code=503, detail=f"ElevenLabs client not ready ({dependency_status['elevenlabs']['state']})")
 
-    voice_id = request.voice_id or current_voice_id
+    voice_id = request.voice_id or active_voice_id(request.device)
     if not voice_id:
         raise HTTPException(status_code=400, detail="No voice_id provided or set")
 
     try:
         print(f"TTS: '{request.text}' with voice_id: {voice_id}")
 
-        audio_generator = elevenlabs_client.text_to_speech.convert(
-            voice_id=voice_id,
-            text=request.text,
-            model_id="eleven_monolingual_v1"
+        cached_path = audio_cache.lookup(voice_id, TTS_MODEL_ID, request.text)
+        session_log.record(
+            "speak", text=request.text, voice_id=voice_id, device=device_channel(request.device),
+            cached=cached_path is not None, via="http"
         )
+        if cached_path:
+            return FileResponse(
+                cached_path,
+                media_type="audio/mpeg",
+                headers={"Content-Disposition": "inline; filename=speech.mp3"}
+            )
 
-        audio_bytes = b"".join(audio_generator)
+        audio_stream = await start_audio_stream(request.text, voice_id)
 
         return StreamingResponse(
-            io.BytesIO(audio_bytes),
+            audio_stream,
             media_type="audio/mpeg",
             headers={"Content-Disposition": "inline; filename=speech.mp3"}
         )
@@ -322,6 +1030,12 @@ async def text_to_speech(request: TTSRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/tts-cache")
+async def tts_cache_stats():
+    """TTS audio cache size and hit/miss counts."""
+    return audio_cache.stats()
+
+
 @app.post("/api/speak-sentence")
 async def speak_sentence(request: TTSRequest):
     """
@@ -334,36 +1048,37 @@ async def speak_sentence(request: TTSRequest):
 # ============ TRANSCRIPTION (Listen to others) ============
 
 @app.websocket("/ws/transcription")
-async def transcription_websocket(websocket: WebSocket):
+async def transcription_websocket(websocket: WebSocket, device: str | None = None):
     """
     WebSocket for receiving real-time transcription of other people's speech.
-    Frontend connects here to receive transcribed text as chat messages.
+    Frontend connects here (?device=<id>) to receive its device's transcribed text as chat messages.
     """
     await websocket.accept()
-    transcription_clients.append(websocket)
-    print(f"Transcription client connected. Total: {len(transcription_clients)}")
+    subscriber = transcription_hub.subscribe(websocket, device_channel(device))
+    print(f"Transcription client connected to '{subscriber.channel}'. Total: {len(transcription_hub)}")
 
     try:
         while True:
             # Keep connection alive
             data = await websocket.receive_text()
             if data == "ping":
-                await websocket.send_text("pong")
+                subscriber.send("pong")
     except WebSocketDisconnect:
-        if websocket in transcription_clients:
-            transcription_clients.remove(websocket)
-        print(f"Transcription client disconnected. Total: {len(transcription_clients)}")
+        pass
+    finally:
+        transcription_hub.unsubscribe(subscriber)
+        print(f"Transcription client disconnected. Total: {len(transcription_hub)}")
 
 
 @app.post("/api/transcription")
 async def receive_transcription(request: TranscriptionRequest):
     """
-    Receive transcribed speech from microphone and broadcast to all frontends.
+    Receive transcribed speech from microphone and broadcast to the frontends of request.device.
     This adds messages from 'other people' to the chat.
     """
     print(f"Transcription received from '{request.speaker}': {request.text}")
 
-    # Broadcast to all connected transcription clients
+    # Serialized once, queued for every transcription client of the device
     message = json.dumps({
         "type": "transcription",
         "text": request.text,
@@ -371,31 +1086,34 @@ async def receive_transcription(request: TranscriptionRequest):
         "timestamp": request.timestamp,
         "isUser": False
     })
+    notified = await shared_state.publish("transcription", message, device_channel(request.device))
 
-    disconnected = []
-    for client in transcription_clients:
-        try:
-            await client.send_text(message)
-        except Exception as e:
-            print(f"Failed to send transcription: {e}")
-            disconnected.append(client)
+    return {"status": "ok", **delivery(notified)}
 
-    for client in disconnected:
-        if client in transcription_clients:
-            transcription_clients.remove(client)
 
-    return {"status": "ok", "clients_notified": len(transcription_clients)}
+# Binary /ws/speak framing: [utterance id: uint32][seq: uint16][flags: uint8] + raw MP3 bytes
+SPEAK_BINARY_SUBPROTOCOL = "tts-binary.v1"
+SPEAK_FRAME_HEADER = struct.Struct(">IHB")
+SPEAK_FLAG_END = 0x01
 
 
 @app.websocket("/ws/speak")
-async def speak_websocket(websocket: WebSocket):
+async def speak_websocket(websocket: WebSocket, device: str | None = None):
     """
-    WebSocket for real-time TTS.
-    Receives: {"text": "sentence", "voice_id": "optional"}
+    WebSocket for real-time TTS, speaking with the voice of ?device=<id> unless a message names one.
+    Receives: {"text": "sentence", "voice_id": "optional", "stream": false, "format": "json"}
     Returns: {"audio": "base64_audio", "text": "sentence"}
+    With "stream": true, returns one {"audio": "base64_chunk", "text", "seq"} per upstream
+    chunk as it arrives, then {"done": true, "text", "chunks"}.
+
+    Binary mode (subprotocol "tts-binary.v1", or "format": "binary" per message):
+    a JSON header {"type": "start", "utterance", "text", "mime"} followed by binary frames
+    packed as SPEAK_FRAME_HEADER + audio, the last one empty with SPEAK_FLAG_END set.
     """
-    await websocket.accept()
-    print("Speech WebSocket client connected")
+    binary_default = SPEAK_BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=SPEAK_BINARY_SUBPROTOCOL if binary_default else None)
+    print(f"Speech WebSocket client connected ({'binary' if binary_default else 'json'})")
+    utterance_id = 0
 
     try:
         while True:
@@ -403,7 +1121,8 @@ async def speak_websocket(websocket: WebSocket):
             sentence_data = json.loads(data)
 
             text = sentence_data.get("text")
-            voice_id = sentence_data.get("voice_id") or current_voice_id
+            voice_id = sentence_data.get("voice_id") or active_voice_id(device)
+            binary = sentence_data.get("format", "binary" if binary_default else "json") == "binary"
 
             if not voice_id:
                 await websocket.send_text(json.dumps({"error": "No voice_id set"}))
@@ -415,14 +1134,44 @@ async def speak_websocket(websocket: WebSocket):
 
             print(f"Speaking via WebSocket: '{text}'")
 
-            try:
-                audio_generator = elevenlabs_client.text_to_speech.convert(
-                    voice_id=voice_id,
-                    text=text,
-                    model_id="eleven_monolingual_v1"
-                )
+            if not elevenlabs_client:
+                await websocket.send_text(json.dumps({"error": "ElevenLabs client not initialized"}))
+                continue
+
+            utterance_id = (utterance_id + 1) % 2**32
+            session_log.record(
+                "speak", text=text, voice_id=voice_id, device=device_channel(device),
+                via="ws-binary" if binary else "ws"
+            )
 
-                audio_bytes = b"".join(audio_generator)
+            try:
+                if binary:
+                    await websocket.send_text(json.dumps({
+                        "type": "start",
+                        "utterance": utterance_id,
+                        "text": text,
+                        "mime": "audio/mpeg"
+                    }))
+                    seq = 0
+                    async for chunk in speech_stream(text, voice_id):
+                        await websocket.send_bytes(SPEAK_FRAME_HEADER.pack(utterance_id, seq % 2**16, 0) + chunk)
+                        seq += 1
+                    await websocket.send_bytes(SPEAK_FRAME_HEADER.pack(utterance_id, seq % 2**16, SPEAK_FLAG_END))
+                    continue
+
+                if sentence_data.get("stream"):
+                    seq = 0
+                    async for chunk in speech_stream(text, voice_id):
+                        await websocket.send_text(json.dumps({
+                            "audio": base64.b64encode(chunk).decode('utf-8'),
+                            "text": text,
+                            "seq": seq
+                        }))
+                        seq += 1
+                    await websocket.send_text(json.dumps({"done": True, "text": text, "chunks": seq}))
+                    continue
+
+                audio_bytes = b"".join([chunk async for chunk in speech_stream(text, voice_id)])
                 audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
 
                 await websocket.send_text(json.dumps({
@@ -430,8 +1179,13 @@ async def speak_websocket(websocket: WebSocket):
                     "text": text
                 }))
 
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
-                await websocket.send_text(json.dumps({"error": str(e)}))
+                error = {"error": str(e)}
+                if binary:
+                    error.update({"type": "error", "utterance": utterance_id})
+                await websocket.send_text(json.dumps(error))
 
     except WebSocketDisconnect:
         print("Speech WebSocket client disconnected")
@@ -439,4 +1193,5 @@ async def speak_websocket(websocket: WebSocket):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # More than one worker needs SHARED_STATE=sqlite:///... so they see each other's state
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=UVICORN_WORKERS)
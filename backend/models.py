@@ -9,6 +9,8 @@ class WordRequest(BaseModel):
     chat_history: list[ChatMessage] = []
     current_sentence: list[str] = []
     is_sentence_start: bool = True
+    prefix: str | None = None  # Leading letters chosen in spelling mode (served from the local lexicon)
+    device: str | None = None  # Grid speculation speaks with this device's voice
 
 class WordResponse(BaseModel):
     words: list[str]
@@ -20,6 +22,8 @@ class RefreshRequest(BaseModel):
     chat_history: list[ChatMessage] = []
     current_sentence: list[str] = []
     is_sentence_start: bool = True
+    prefix: str | None = None
+    device: str | None = None
 
 class ResetBranchRequest(BaseModel):
     chat_history: list[ChatMessage] = []
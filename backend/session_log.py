@@ -0,0 +1,187 @@
+"""
+Append-only session log of gestures, predictions and speech.
+
+record() only packs the event and puts it on a bounded queue; a writer
+thread batches queued events into the current segment file, so logging
+never waits on disk in the request path. When the queue is full events
+are dropped and counted rather than blocking.
+
+Segments live in SESSION_LOG_DIR as session-<start>-<pid>-<n>.nxlog (one
+writer per worker process) and rotate at SESSION_LOG_MAX_MB; each worker
+deletes its own oldest segments beyond SESSION_LOG_KEEP. Each segment starts with MAGIC and
+holds length-prefixed records:
+
+    uint32 length | float64 unix time | uint8 event kind | payload
+
+with the payload as compact UTF-8 JSON. Read segments back with
+read_events(), or export them with export_session_log.py.
+"""
+
+import glob
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Any, Iterator
+from config import SESSION_LOG_DIR, SESSION_LOG_MAX_MB, SESSION_LOG_KEEP
+
+MAGIC = b"NXSLOG\x01\n"
+RECORD_HEADER = struct.Struct("<IdB")  # Length of what follows the length field, time, kind
+QUEUE_SIZE = 10000
+BATCH_SIZE = 256
+
+# Event kinds are stored as one byte; append new kinds, never renumber
+EVENT_KINDS = ("signal", "words", "refresh", "generate_cache", "reset_branch", "clear_used", "speak")
+KIND_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS, start=1)}
+
+
+def pack_record(kind: str, fields: dict, at: float | None = None) -> bytes:
+    payload = json.dumps(fields, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    length = RECORD_HEADER.size - 4 + len(payload)
+    return RECORD_HEADER.pack(length, time.time() if at is None else at, KIND_CODES[kind]) + payload
+
+
+class SessionLog:
+    def __init__(self, directory: str = SESSION_LOG_DIR, max_mb: int = SESSION_LOG_MAX_MB, keep: int = SESSION_LOG_KEEP):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.keep = keep
+        self.queue: queue.Queue[bytes | None] = queue.Queue(maxsize=QUEUE_SIZE)
+        self.thread: threading.Thread | None = None
+        self.file = None
+        self.path: str | None = None
+        self.size = 0
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.segments = 0  # Segments opened; numbers the file names, so none is reopened
+        self.rotations = 0
+        self.write_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def start(self):
+        if not self.enabled or self.thread:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+        self.thread.start()
+
+    def close(self, timeout: float = 2.0):
+        """Write out what is queued, then stop the writer."""
+        if not self.thread:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=timeout)
+        self.thread = None
+
+    def record(self, kind: str, **fields: Any):
+        """Queue one event. Never blocks; drops the event if the writer is behind."""
+        if not self.thread:
+            return
+        try:
+            self.queue.put_nowait(pack_record(kind, fields))
+            self.recorded += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while batch[-1] is not None and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            records = [record for record in batch if record is not None]
+            if records:
+                self._write(b"".join(records), len(records))
+            if stop:
+                break
+        self._close_file()
+
+    def _write(self, data: bytes, count: int):
+        try:
+            if self.file is None or self.size + len(data) > self.max_bytes:
+                self._rotate()
+            self.file.write(data)
+            self.file.flush()
+            self.size += len(data)
+            self.written += count
+        except OSError as e:
+            print(f"Session log write failed: {e}")
+            self.write_errors += 1
+            self._close_file()  # The next batch starts a new segment
+
+    def _close_file(self):
+        try:
+            if self.file:
+                self.file.close()
+        except OSError:
+            pass
+        self.file = None
+
+    def _rotate(self):
+        if self.file:
+            self._close_file()
+            self.rotations += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        pid = str(os.getpid())
+        self.segments += 1
+        self.path = os.path.join(self.directory, f"session-{stamp}-{pid}-{self.segments:04d}.nxlog")
+        self.file = open(self.path, "xb")
+        self.file.write(MAGIC)
+        self.size = len(MAGIC)
+
+        # Other workers share the directory and prune their own segments
+        segments = sorted(
+            (path for path in glob.glob(os.path.join(self.directory, "session-*.nxlog"))
+             if os.path.basename(path).rsplit("-", 2)[1] == pid),
+            key=os.path.getmtime
+        )
+        for old in segments[:max(0, len(segments) - self.keep)]:
+            if old != self.path:
+                os.remove(old)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "current_file": self.path,
+            "current_bytes": self.size,
+            "recorded": self.recorded,
+            "written": self.written,
+            "queued": self.queue.qsize(),
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+        }
+
+
+def read_events(path: str) -> Iterator[dict]:
+    """Yield {"time", "kind", **fields} for each record of a segment; stops at a truncated tail."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, at, code = RECORD_HEADER.unpack(header)
+            payload = f.read(length - (RECORD_HEADER.size - 4))
+            if len(payload) < length - (RECORD_HEADER.size - 4):
+                return  # Segment still being written, or cut short by a crash
+            kind = EVENT_KINDS[code - 1] if 0 < code <= len(EVENT_KINDS) else f"unknown_{code}"
+            yield {"time": at, "kind": kind, **json.loads(payload)}
+
+
+# Global instance
+session_log = SessionLog()
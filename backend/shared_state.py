@@ -0,0 +1,362 @@
+"""
+State and broadcasts shared between uvicorn workers.
+
+SHARED_STATE selects the backend:
+
+    memory              - one process (the default); publish() calls handlers directly
+    sqlite:///path.db   - any number of workers on one host
+
+The SQLite backend keeps a key/value table and an append-only event log.
+Every worker mirrors the key/values in memory, so reads never touch the
+database, and applies events in log order. Each worker binds a Unix
+datagram socket in <path>.bells/; a publisher appends to the log and then
+sends one byte to every socket there, so other workers wake immediately
+instead of waiting for the next poll. All database work runs on one
+writer thread, so a busy lock held by another worker never stalls the
+event loop; the write methods are coroutines for that reason.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable
+from config import SHARED_STATE, SHARED_POLL_INTERVAL
+
+KV_CHANNEL = "__kv__"
+EVENT_RETENTION = 60.0  # Seconds of event log kept for workers that fall behind
+TRIM_INTERVAL = 10.0
+
+
+class MemoryState:
+    """Single-process state. Values must be JSON-serializable so backends are interchangeable."""
+
+    shared = False
+
+    def __init__(self):
+        self.values: dict[str, Any] = {}
+        self.handlers: dict[str, Callable[[str, str], Any]] = {}
+
+    def subscribe(self, channel: str, handler: Callable[[str, str], Any]):
+        """Call handler(message, topic) for every message published on channel, by any worker."""
+        self.handlers[channel] = handler
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def publish(self, channel: str, message: str, topic: str = "") -> int:
+        """
+        Deliver message to channel's handler, with topic (e.g. a device id) for
+        routing within the channel. Returns how many receivers were notified:
+        the handler's count (clients) in-process, workers with a shared backend.
+        """
+        handler = self.handlers.get(channel)
+        return handler(message, topic) if handler else 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+    async def set(self, key: str, value: Any):
+        self.values[key] = value
+
+    async def delete(self, key: str):
+        self.values.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        """Atomically add one and return the new value."""
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    async def advance(self, key: str, value: int) -> bool:
+        """Atomically raise key to value if it is currently lower (or unset). Returns whether it moved."""
+        if int(self.values.get(key, 0)) >= value:
+            return False
+        self.values[key] = value
+        return True
+
+    async def compare_and_set(self, changes: dict[str, tuple[Any, Any]]) -> list[str]:
+        """
+        Atomically set each key of changes = {key: (expected, value)} whose current
+        value (None when unset) is still expected. Returns the keys left alone
+        because someone else changed them first.
+        """
+        conflicts = [key for key, (expected, _) in changes.items() if self.values.get(key) != expected]
+        for key, (_, value) in changes.items():
+            if key not in conflicts:
+                self.values[key] = value
+        return conflicts
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self.values)}
+
+
+class SqliteState(MemoryState):
+    shared = True
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.doorbell_dir = path + ".bells"
+        self.doorbell_path = os.path.join(self.doorbell_dir, f"{os.getpid()}.sock")
+        self.db: sqlite3.Connection | None = None
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-state")
+        self.doorbell: socket.socket | None = None
+        self.wakeup = asyncio.Event()
+        self.reader: asyncio.Task | None = None
+        self.cursor = 0
+        self.last_trim = 0.0
+        self.published = 0
+        self.applied = 0
+
+    async def start(self):
+        os.makedirs(self.doorbell_dir, exist_ok=True)
+        await self._run(self._open)
+
+        if os.path.exists(self.doorbell_path):
+            os.remove(self.doorbell_path)
+        self.doorbell = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.doorbell.bind(self.doorbell_path)
+        self.doorbell.setblocking(False)
+        asyncio.get_running_loop().add_reader(self.doorbell, self._ring_received)
+
+        self.reader = asyncio.create_task(self._read_loop())
+        print(f"Shared state: {self.path} ({len(self.values)} keys, worker {os.getpid()})")
+
+    def _open(self):
+        self.db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA busy_timeout=2000")
+        self.db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS events "
+            "(id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, data TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self.values = {key: json.loads(value) for key, value in self.db.execute("SELECT key, value FROM kv")}
+        self.cursor = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    async def close(self):
+        if self.reader:
+            self.reader.cancel()
+        if self.doorbell:
+            asyncio.get_running_loop().remove_reader(self.doorbell)
+            self.doorbell.close()
+            try:
+                os.remove(self.doorbell_path)
+            except FileNotFoundError:
+                pass
+        if self.db:
+            await self._run(self.db.close)
+        self.writer.shutdown()
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) on the writer thread, the only thread that touches the database."""
+        return await asyncio.get_running_loop().run_in_executor(self.writer, fn, *args)
+
+    def _ring_received(self):
+        try:
+            while self.doorbell.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+        self.wakeup.set()
+
+    def _ring_all(self) -> int:
+        rung = 0
+        for name in os.listdir(self.doorbell_dir):
+            path = os.path.join(self.doorbell_dir, name)
+            try:
+                self.doorbell.sendto(b"\0", path)
+                rung += 1
+            except BlockingIOError:
+                rung += 1  # Its buffer is full of rings, so it is waking up anyway
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket left behind by a worker that exited without cleaning up
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return rung
+
+    async def _read_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), SHARED_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                self._apply_events(await self._run(self._read_events, self.cursor))
+            except sqlite3.Error as e:
+                print(f"Shared state read failed: {e}")
+
+    def _read_events(self, cursor: int) -> list[tuple[int, str, str]]:
+        # Writer thread
+        rows = self.db.execute(
+            "SELECT id, channel, data FROM events WHERE id > ? ORDER BY id", (cursor,)
+        ).fetchall()
+        if time.time() - self.last_trim > TRIM_INTERVAL:
+            self.last_trim = time.time()
+            self.db.execute("DELETE FROM events WHERE created < ?", (time.time() - EVENT_RETENTION,))
+        return rows
+
+    def _apply_events(self, rows: list[tuple[int, str, str]]):
+        for event_id, channel, data in rows:
+            self.cursor = event_id
+            self.applied += 1
+            if channel == KV_CHANNEL:
+                key, present, value = json.loads(data)
+                if present:
+                    self.values[key] = value
+                else:
+                    self.values.pop(key, None)
+                continue
+            channel, _, topic = channel.partition(":")
+            handler = self.handlers.get(channel)
+            if handler:
+                try:
+                    handler(data, topic)
+                except Exception as e:
+                    print(f"Shared state handler for '{channel}' failed: {e}")
+
+    # The _write_* methods run on the writer thread, each as one transaction that
+    # also logs the change; the coroutines then update this worker's mirror.
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so reads inside see what the writes replace
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def _log(self, channel: str, data: str):
+        self.db.execute("INSERT INTO events (channel, data, created) VALUES (?, ?, ?)", (channel, data, time.time()))
+        self.published += 1
+
+    def _log_kv(self, key: str, value: Any, present: bool = True):
+        self._log(KV_CHANNEL, json.dumps([key, present, value]))
+
+    def _write_event(self, channel: str, data: str) -> int:
+        self._log(channel, data)
+        return self._ring_all()
+
+    def _write_set(self, key: str, value: Any):
+        with self._transaction():
+            self.db.execute(
+                "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value))
+            )
+            self._log_kv(key, value)
+        self._ring_all()
+
+    def _write_delete(self, key: str):
+        with self._transaction():
+            self.db.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._log_kv(key, None, present=False)
+        self._ring_all()
+
+    def _write_incr(self, key: str) -> int:
+        with self._transaction():
+            value = int(self.db.execute(
+                "INSERT INTO kv (key, value) VALUES (?, '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 RETURNING value",
+                (key,)
+            ).fetchone()[0])
+            self._log_kv(key, value)
+        self._ring_all()
+        return value
+
+    def _write_advance(self, key: str, value: int) -> bool:
+        with self._transaction():
+            cursor = self.db.execute(
+                "INSERT INTO kv (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value "
+                "WHERE CAST(kv.value AS INTEGER) < CAST(excluded.value AS INTEGER)",
+                (key, json.dumps(value))
+            )
+            if cursor.rowcount != 1:
+                return False
+            self._log_kv(key, value)
+        self._ring_all()
+        return True
+
+    def _write_compare_and_set(self, changes: dict[str, tuple[Any, Any]]) -> list[str]:
+        conflicts = []
+        with self._transaction():
+            for key, (expected, value) in changes.items():
+                row = self.db.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+                if (json.loads(row[0]) if row else None) != expected:
+                    conflicts.append(key)
+                    continue
+                self.db.execute(
+                    "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (key, json.dumps(value))
+                )
+                self._log_kv(key, value)
+        self._ring_all()
+        return conflicts
+
+    async def publish(self, channel: str, message: str, topic: str = "") -> int:
+        # Our own handlers run from the read loop too, so every worker sees one order
+        return await self._run(self._write_event, f"{channel}:{topic}" if topic else channel, message)
+
+    async def set(self, key: str, value: Any):
+        await self._run(self._write_set, key, value)
+        self.values[key] = value
+
+    async def delete(self, key: str):
+        await self._run(self._write_delete, key)
+        self.values.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = await self._run(self._write_incr, key)
+        self.values[key] = value
+        return value
+
+    async def advance(self, key: str, value: int) -> bool:
+        if not await self._run(self._write_advance, key, value):
+            return False
+        self.values[key] = value
+        return True
+
+    async def compare_and_set(self, changes: dict[str, tuple[Any, Any]]) -> list[str]:
+        conflicts = await self._run(self._write_compare_and_set, changes)
+        for key, (_, value) in changes.items():
+            if key not in conflicts:
+                self.values[key] = value
+        return conflicts
+
+    def stats(self) -> dict:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "worker": os.getpid(),
+            "workers": len(os.listdir(self.doorbell_dir)),
+            "keys": len(self.values),
+            "cursor": self.cursor,
+            "published": self.published,
+            "applied": self.applied,
+        }
+
+
+def create_state(url: str) -> MemoryState:
+    if url in ("", "memory"):
+        return MemoryState()
+    if url.startswith("sqlite:///"):
+        return SqliteState(url[len("sqlite:///"):])
+    raise ValueError(f"Unknown SHARED_STATE backend: {url}")
+
+
+# Global instance
+shared_state = create_state(SHARED_STATE)
@@ -0,0 +1,75 @@
+import asyncio
+import os
+from audio_cache import AudioCache
+
+
+def write(directory, key, size, mtime):
+    path = os.path.join(directory, f"{key}.mp3")
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_load_indexes_files_oldest_first(tmp_path):
+    write(tmp_path, "b", 10, 200)
+    write(tmp_path, "a", 20, 100)
+    cache = AudioCache(str(tmp_path), max_bytes=1000)
+    asyncio.run(cache.load())
+    assert list(cache.entries) == ["a", "b"]
+    assert cache.total_bytes == 30
+
+
+def test_load_keeps_entries_added_during_the_scan(tmp_path):
+    write(tmp_path, "old", 10, 100)
+    write(tmp_path, "new", 15, 200)
+    cache = AudioCache(str(tmp_path), max_bytes=1000)
+
+    async def run():
+        # A synthesis stored "new" on the loop before the scan was merged
+        cache.entries["new"] = 15
+        cache.total_bytes = 15
+        await cache.load()
+
+    asyncio.run(run())
+    assert list(cache.entries) == ["old", "new"]
+    assert cache.total_bytes == 25  # "new" counted once
+
+
+def test_load_evicts_beyond_the_cap(tmp_path):
+    for i in range(5):
+        write(tmp_path, f"k{i}", 100, 100 + i)
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    asyncio.run(cache.load())
+    assert list(cache.entries) == ["k3", "k4"]
+    assert sorted(os.listdir(tmp_path)) == ["k3.mp3", "k4.mp3"]
+
+
+def test_streamed_prefetch_skips_the_slot_queue(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=1000)
+    started = []
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def synthesize(text, voice_id):
+            started.append(text)
+            await gate.wait()
+            yield text.encode()
+
+        slots = asyncio.Semaphore(1)
+        for text in "ABCD":
+            cache.prefetch("voice", "model", text, synthesize, slots)
+        await asyncio.sleep(0.01)
+        assert started == ["A"]  # B, C, D queued for the slot
+
+        listener = asyncio.create_task(anext(cache.stream("voice", "model", "D", synthesize)))
+        await asyncio.sleep(0.01)
+        assert started == ["A", "D"]
+        gate.set()
+        assert await listener == b"D"
+        while cache.inflight:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert started == ["A", "D", "B", "C"]
+    assert len(cache.entries) == 4
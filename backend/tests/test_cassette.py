@@ -0,0 +1,92 @@
+import asyncio
+import base64
+import json
+import httpx
+import pytest
+import cassette
+from cassette import CassetteTransport, _request_key
+
+URL = "https://api.example.com/v1/chat"
+
+
+def entry(body: bytes, text: str, ttfb: float = 0.1, gaps: tuple[float, ...] = (0.2,)) -> dict:
+    offset, chunks = ttfb, []
+    for gap in gaps:
+        offset += gap
+        chunks.append([offset, base64.b64encode(text.encode()).decode("ascii")])
+    return {
+        "key": _request_key("POST", URL, body),
+        "route": "route:POST /v1/chat",
+        "status": 200,
+        "headers": [["content-type", "text/plain"]],
+        "ttfb": ttfb,
+        "chunks": chunks,
+    }
+
+
+def write_cassette(tmp_path, *entries) -> str:
+    path = tmp_path / "upstream.jsonl"
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+    return str(path)
+
+
+def post(transport, body: bytes) -> str:
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.post(URL, content=body)
+            return response.text
+    return asyncio.run(run())
+
+
+def test_exact_match_before_route_fallback(tmp_path):
+    transport = CassetteTransport(write_cassette(tmp_path, entry(b"a", "for a"), entry(b"b", "for b")), latency_scale=0)
+    assert post(transport, b"b") == "for b"
+    assert post(transport, b"a") == "for a"
+    # An unrecorded body gets the route's entries in recorded order
+    assert post(transport, b"new prompt") == "for a"
+
+
+def test_entries_cycle_when_exhausted(tmp_path):
+    transport = CassetteTransport(write_cassette(tmp_path, entry(b"x", "first"), entry(b"x", "second")), latency_scale=0)
+    assert [post(transport, b"x") for _ in range(3)] == ["first", "second", "first"]
+
+
+def test_no_match_raises_connect_error(tmp_path):
+    transport = CassetteTransport(write_cassette(tmp_path, entry(b"x", "hi")), latency_scale=0)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get("https://api.example.com/v1/other")
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(run())
+
+
+@pytest.mark.parametrize("scale, expected", [(0, []), (0.5, [0.05, 0.1, 0.05])])
+def test_latency_is_scaled(tmp_path, monkeypatch, scale, expected):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(cassette.asyncio, "sleep", fake_sleep)
+    path = write_cassette(tmp_path, entry(b"x", "ab", ttfb=0.1, gaps=(0.2, 0.1)))
+    assert post(CassetteTransport(path, latency_scale=scale), b"x") == "abab"
+    assert sleeps == pytest.approx(expected)
+
+
+def test_record_then_replay(tmp_path):
+    def upstream(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(201, headers={"x-upstream": "yes"}, content=b"echo " + request.content)
+
+    path = str(tmp_path / "recorded.jsonl")
+    assert post(CassetteTransport(path, "record", inner=httpx.MockTransport(upstream)), b"hello") == "echo hello"
+
+    replay = CassetteTransport(path, latency_scale=0)
+
+    async def run():
+        async with httpx.AsyncClient(transport=replay) as client:
+            return await client.post(URL, content=b"hello")
+
+    response = asyncio.run(run())
+    assert (response.status_code, response.headers["x-upstream"], response.text) == (201, "yes", "echo hello")
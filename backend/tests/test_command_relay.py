@@ -0,0 +1,126 @@
+import asyncio
+import json
+from broadcast import BroadcastHub
+from transcription_main import CommandRelay
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.close_code: int | None = None
+
+    async def send_text(self, message: str):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def flush():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def actions(websocket: FakeWebSocket) -> list:
+    return [message.get("action") or message["type"] for message in websocket.sent]
+
+
+def publish(relay: CommandRelay, *commands: str):
+    for command in commands:
+        relay.publish(command, None)
+
+
+def test_new_client_starts_from_now():
+    async def run():
+        relay = CommandRelay()
+        publish(relay, "right", "down")
+        websocket = FakeWebSocket()
+        relay.connect(websocket, "tablet", None, None)
+        publish(relay, "select")
+        await flush()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert websocket.sent[0]["resume_from"] == 2
+    assert actions(websocket) == ["hello", "select"]
+
+
+def test_reconnect_resumes_after_the_clients_last_ack():
+    async def run():
+        relay = CommandRelay()
+        first = FakeWebSocket()
+        subscriber = relay.connect(first, "tablet", None, None)
+        publish(relay, "right", "down")
+        relay.ack("tablet", 1)
+        relay.hub.unsubscribe(subscriber)
+        publish(relay, "select")
+        second = FakeWebSocket()
+        relay.connect(second, "tablet", None, None)
+        await flush()
+        return second
+
+    websocket = asyncio.run(run())
+    assert actions(websocket) == ["hello", "down", "select"]
+    assert [message.get("seq") for message in websocket.sent[1:]] == [2, 3]
+
+
+def test_last_seq_from_another_epoch_replays_everything_buffered():
+    async def run():
+        relay = CommandRelay()
+        publish(relay, "right", "down")
+        websocket = FakeWebSocket()
+        relay.connect(websocket, None, 5, "restarted")
+        await flush()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert websocket.sent[0]["resume_from"] == 0
+    assert actions(websocket) == ["hello", "right", "down"]
+
+
+def test_gap_once_the_ring_has_wrapped():
+    async def run():
+        relay = CommandRelay(replay_size=2)
+        publish(relay, "right", "right", "down", "select")
+        websocket = FakeWebSocket()
+        relay.connect(websocket, None, 0, relay.epoch)
+        await flush()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert actions(websocket) == ["hello", "gap", "down", "select"]
+    assert (websocket.sent[1]["from"], websocket.sent[1]["to"]) == (1, 2)
+
+
+def test_replay_is_queued_before_live_commands():
+    async def run():
+        relay = CommandRelay()
+        publish(relay, "right", "down")
+        websocket = FakeWebSocket()
+        relay.connect(websocket, None, 0, relay.epoch)
+        publish(relay, "select")  # Before the writer has sent anything
+        await flush()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert actions(websocket) == ["hello", "right", "down", "select"]
+
+
+def test_full_queue_disconnects_rather_than_dropping_commands(monkeypatch):
+    # As if BROADCAST_SLOW_CONSUMER=drop_oldest: the hubs' default policy
+    queue_size, _, send_timeout = BroadcastHub.__init__.__defaults__
+    monkeypatch.setattr(BroadcastHub.__init__, "__defaults__", (queue_size, "drop_oldest", send_timeout))
+
+    async def run():
+        relay = CommandRelay(replay_size=1)
+        relay.hub.queue_size = 1
+        websocket = FakeWebSocket()
+        subscriber = relay.connect(websocket, None, None, None)  # Queues the hello
+        publish(relay, "right")
+        await flush()
+        return relay, subscriber, websocket
+
+    relay, subscriber, websocket = asyncio.run(run())
+    assert relay.hub.policy == "disconnect"
+    assert subscriber.closed and relay.hub.dropped == 0
+    assert websocket.close_code == 1013
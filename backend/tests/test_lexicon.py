@@ -0,0 +1,91 @@
+import pytest
+from lexicon import Lexicon
+from word_generator import WORD_COUNT, WordGenerator
+
+WORDS = {
+    "the": 5000, "then": 900, "there": 1200, "they": 3000, "thermal": 5,
+    "to": 4000, "top": 200, "water": 300, "watch": 250, "wat": 1, "don't": 400, "done": 100,
+}
+
+
+@pytest.fixture
+def lexicon(tmp_path):
+    path = tmp_path / "lexicon.txt"
+    path.write_text("".join(f"{word} {count}\n" for word, count in WORDS.items()) + "bad-word 10\n123 10\n")
+    lexicon = Lexicon()
+    lexicon.load(str(path))
+    return lexicon
+
+
+def matches(lexicon, prefix):
+    lo, hi = lexicon._range(prefix)
+    return lexicon.words[lo:hi]
+
+
+def test_load_skips_invalid_lines(lexicon):
+    assert len(lexicon) == len(WORDS)
+    assert lexicon.words == sorted(WORDS)
+
+
+@pytest.mark.parametrize("prefix", ["", "t", "th", "the", "ther", "thermal", "wat", "don", "don'", "x", "zzz", "a"])
+def test_range_is_exactly_the_words_with_prefix(lexicon, prefix):
+    assert matches(lexicon, prefix) == sorted(w for w in WORDS if w.startswith(prefix))
+
+
+def test_range_is_empty_past_the_last_word(lexicon):
+    lo, hi = lexicon._range("zz")
+    assert lo == hi == len(lexicon)
+
+
+def test_lookup_ranks_by_frequency(lexicon):
+    assert lexicon.lookup("th", 10) == ["the", "they", "there", "then", "thermal"]
+    assert lexicon.lookup("th", 2) == ["the", "they"]
+
+
+def test_lookup_is_case_insensitive(lexicon):
+    assert lexicon.lookup("WAT", 3) == ["water", "watch", "wat"]
+
+
+def test_lookup_boosts_context_words(lexicon):
+    # log(1201) + CONTEXT_WEIGHT outranks log(5001)
+    assert lexicon.lookup("th", 2, context_words={"there"}) == ["there", "the"]
+
+
+def test_lookup_excludes(lexicon):
+    assert lexicon.lookup("th", 10, exclude={"the", "they"}) == ["there", "then", "thermal"]
+
+
+def test_missing_file_falls_back_to_builtin_words(tmp_path):
+    lexicon = Lexicon()
+    lexicon.load(str(tmp_path / "missing.txt"), fallback_words=["zebra"])
+    assert lexicon.source == "builtin"
+    assert "zebra" in lexicon.words
+
+
+def test_prefix_words_only_match_the_prefix(lexicon):
+    generator = WordGenerator()
+    generator.lexicon = lexicon
+    words, cached, _ = generator.generate_prefix_words([], [], False, "wat")
+    assert words == ["water", "watch", "wat"]
+    assert cached == []
+
+    # Refresh pages past what was shown; nothing left means an empty grid, not unrelated words
+    words, _, _ = generator.generate_prefix_words([], [], False, "wat", is_refresh=True)
+    assert words == []
+
+
+def test_prefix_words_capitalized_at_sentence_start(lexicon):
+    generator = WordGenerator()
+    generator.lexicon = lexicon
+    words, _, _ = generator.generate_prefix_words([], [], True, "th")
+    assert words == ["The", "They", "There", "Then", "Thermal"]
+    assert len(words) <= WORD_COUNT
+
+
+def test_shipped_lexicon_is_loaded_by_default():
+    lexicon = Lexicon()
+    lexicon.load()
+    assert lexicon.source.endswith("lexicon.txt")
+    assert len(lexicon) >= 20000
+    assert all(word.startswith("wat") for word in lexicon.lookup("wat", WORD_COUNT))
+    assert len(lexicon.lookup("wat", WORD_COUNT)) == WORD_COUNT
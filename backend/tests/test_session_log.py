@@ -0,0 +1,41 @@
+import os
+from session_log import MAGIC, SessionLog, pack_record, read_events
+
+
+class FailingFile:
+    def write(self, data):
+        raise OSError("disk full")
+
+    def close(self):
+        pass
+
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".nxlog"))
+
+
+def test_rotation_prunes_only_this_workers_segments(tmp_path):
+    other = tmp_path / "session-20260101-000000-1-0001.nxlog"
+    other.write_bytes(MAGIC)
+    log = SessionLog(str(tmp_path), max_mb=1, keep=2)
+    log.max_bytes = 100
+    for n in range(5):
+        log._write(pack_record("signal", {"action": "RIGHT", "n": n, "pad": "x" * 60}), 1)
+    log._close_file()
+    names = segments(tmp_path)
+    assert other.name in names
+    assert len(names) == 3  # The other worker's segment and this worker's newest two
+
+
+def test_segment_after_write_error_gets_a_new_name(tmp_path):
+    log = SessionLog(str(tmp_path), max_mb=1, keep=10)
+    log._write(pack_record("signal", {"n": 0}), 1)
+    first = log.path
+    log.file = FailingFile()
+    log._write(pack_record("signal", {"n": 1}), 1)
+    log._write(pack_record("signal", {"n": 2}), 1)
+    log._close_file()
+    assert log.write_errors == 1
+    assert log.path != first
+    assert [event["n"] for event in read_events(first)] == [0]
+    assert [event["n"] for event in read_events(log.path)] == [2]
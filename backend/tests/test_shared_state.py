@@ -0,0 +1,78 @@
+import asyncio
+import os
+from shared_state import MemoryState, SqliteState
+
+
+def workers(tmp_path, count):
+    """SqliteStates on one database, as if in separate processes."""
+    states = [SqliteState(str(tmp_path / "state.db")) for _ in range(count)]
+    for n, state in enumerate(states):
+        state.doorbell_path = os.path.join(state.doorbell_dir, f"worker{n}.sock")
+    return states
+
+
+async def settle(*states):
+    # Let every worker's read loop pick up the rings
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if len({state.cursor for state in states}) == 1:
+            return
+
+
+def test_writes_reach_other_workers(tmp_path):
+    async def run():
+        a, b = workers(tmp_path, 2)
+        await a.start()
+        await b.start()
+        await a.set("voice_id", "v1")
+        assert await a.incr("generation") == 1
+        assert await b.incr("generation") == 2
+        assert await a.advance("seq", 5)
+        assert not await b.advance("seq", 5)
+        await settle(a, b)
+        assert b.get("voice_id") == "v1"
+        assert a.get("generation") == b.get("generation") == 2
+        await a.close()
+        await b.close()
+
+    asyncio.run(run())
+
+
+def test_publish_reports_workers_woken(tmp_path):
+    async def run():
+        a, b = workers(tmp_path, 2)
+        received = []
+        b.subscribe("signals", lambda message, topic: received.append((message, topic)))
+        await a.start()
+        await b.start()
+        assert await a.publish("signals", "RIGHT", "tablet") == 2
+        await settle(a, b)
+        assert received == [("RIGHT", "tablet")]
+        await a.close()
+        await b.close()
+
+    asyncio.run(run())
+
+
+def test_compare_and_set_keeps_the_first_writer(tmp_path):
+    async def run():
+        a, b = workers(tmp_path, 2)
+        await a.start()
+        await b.start()
+        assert await a.compare_and_set({"words:used": (None, ["hello"])}) == []
+        # b still expects the key unset, as when it loaded the session
+        assert await b.compare_and_set({"words:used": (None, ["bye"]), "words:cache": (None, ["x"])}) == ["words:used"]
+        await settle(a, b)
+        assert a.get("words:used") == b.get("words:used") == ["hello"]
+        assert a.get("words:cache") == ["x"]
+        await a.close()
+        await b.close()
+
+    asyncio.run(run())
+
+
+def test_memory_compare_and_set():
+    state = MemoryState()
+    asyncio.run(state.set("k", 1))
+    assert asyncio.run(state.compare_and_set({"k": (0, 2), "j": (None, 3)})) == ["k"]
+    assert state.get("k") == 1 and state.get("j") == 3
@@ -0,0 +1,26 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from main import UPLOAD_FORM_OVERHEAD, VOICE_UPLOAD_MAX_MB, UploadLimit
+
+LIMIT = VOICE_UPLOAD_MAX_MB * 1024 * 1024 + UPLOAD_FORM_OVERHEAD
+
+
+def client():
+    app = FastAPI()
+
+    @app.post("/api/clone-voice")
+    async def clone_voice():
+        return {"status": "queued"}
+
+    app.add_middleware(UploadLimit)
+    return TestClient(app)
+
+
+def test_oversized_upload_is_refused_from_content_length():
+    response = client().post("/api/clone-voice", content=b"x", headers={"content-length": str(LIMIT + 1)})
+    assert response.status_code == 413
+
+
+def test_upload_within_the_limit_reaches_the_endpoint():
+    response = client().post("/api/clone-voice", content=b"x" * 100)
+    assert response.json() == {"status": "queued"}
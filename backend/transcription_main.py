@@ -2,32 +2,93 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from elevenlabs import ElevenLabs
+from collections import OrderedDict, deque
+from broadcast import BroadcastHub, Subscriber
+from config import BROADCAST_QUEUE_SIZE
 import io
 import asyncio
 import json
 import os
-from typing import List
+import uuid
 import base64
 
-# Connection manager to handle multiple WebSocket clients
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []    
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-    
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-    
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                pass
+# Commands kept for frontends that reconnect, and reconnectable client ids remembered
+BCI_REPLAY_SIZE = int(os.getenv("BCI_REPLAY_SIZE", "256"))
+MAX_TRACKED_CLIENTS = 1000
+
+
+class CommandRelay:
+    """
+    Sequenced BCI command fan-out.
+    Every command gets the next sequence number and goes into a ring buffer of
+    the last BCI_REPLAY_SIZE. Frontends ack what they have applied; one that
+    reconnects (same ?client= id, or ?last_seq=) gets everything after its last
+    ack replayed before live commands. Each frontend has its own queue and
+    writer task (see broadcast.py), so fan-out is concurrent per connection.
+    """
+
+    def __init__(self, replay_size: int = BCI_REPLAY_SIZE):
+        self.epoch = uuid.uuid4().hex[:8]  # Sequence numbers restart with the process
+        self.seq = 0
+        self.buffer: deque[tuple[int, str]] = deque(maxlen=replay_size)
+        # Room for a full replay on top of the usual backlog. A full queue disconnects
+        # the frontend whatever BROADCAST_SLOW_CONSUMER says: dropping a sequenced
+        # command would leave a silent hole, while a reconnect resumes from the last ack
+        self.hub = BroadcastHub("bci", queue_size=replay_size + BROADCAST_QUEUE_SIZE, policy="disconnect")
+        self.client_acks: OrderedDict[str, int] = OrderedDict()
+
+    def publish(self, command: str, timestamp: float | None) -> int:
+        self.seq += 1
+        message = json.dumps({"seq": self.seq, "epoch": self.epoch, "action": command, "timestamp": timestamp})
+        self.buffer.append((self.seq, message))
+        self.hub.publish(message)
+        return self.seq
+
+    def connect(
+        self,
+        websocket: WebSocket,
+        client_id: str | None,
+        last_seq: int | None,
+        epoch: str | None
+    ) -> Subscriber:
+        """Subscribe a frontend and queue what it missed, all before any live command can interleave."""
+        if last_seq is not None and epoch not in (None, self.epoch):
+            last_seq = 0  # Acked against an earlier relay process: everything buffered now is new
+        if client_id in self.client_acks:
+            last_seq = max(last_seq or 0, self.client_acks[client_id])
+        # A new frontend starts from now; replaying old gestures would move its highlight
+        resume = self.seq if last_seq is None else min(last_seq, self.seq)
+
+        subscriber = self.hub.subscribe(websocket)
+        subscriber.send(json.dumps({"type": "hello", "epoch": self.epoch, "seq": self.seq, "resume_from": resume}))
+        oldest = self.buffer[0][0] if self.buffer else self.seq + 1
+        if resume + 1 < oldest:
+            subscriber.send(json.dumps({"type": "gap", "from": resume + 1, "to": oldest - 1}))
+        for seq, message in self.buffer:
+            if seq > resume:
+                subscriber.send(message)
+        return subscriber
+
+    def ack(self, client_id: str | None, seq: int):
+        if not client_id:
+            return
+        self.client_acks[client_id] = max(seq, self.client_acks.get(client_id, 0))
+        self.client_acks.move_to_end(client_id)
+        while len(self.client_acks) > MAX_TRACKED_CLIENTS:
+            self.client_acks.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "buffered": len(self.buffer),
+            "oldest_buffered": self.buffer[0][0] if self.buffer else None,
+            "tracked_clients": len(self.client_acks),
+            **self.hub.stats(),
+        }
 
-manager = ConnectionManager()
+
+relay = CommandRelay()
 
 app = FastAPI()
 
@@ -43,7 +104,8 @@ app.add_middleware(
 # Initialize ElevenLabs client
 # You'll add your API key here
 ELEVENLABS_API_KEY = "sk_30b0db719231579fe0bf060a65a80499fa6a780071f903b4"
-client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+# Set ELEVENLABS_BASE_URL to point at fake_elevenlabs.py for local latency testing
+client = ElevenLabs(api_key=ELEVENLABS_API_KEY, base_url=os.getenv("ELEVENLABS_BASE_URL") or None)
 
 @app.get("/")
 def read_root():
@@ -52,7 +114,8 @@ def read_root():
 @app.websocket("/ws/bci")
 async def bci_commands(websocket: WebSocket):
     """
-    Receives BCI commands and broadcasts to all frontend clients
+    Receives BCI commands ({"command": "right" | "down" | "select", "timestamp"})
+    and relays them, sequenced, to all frontend clients
     """
     await websocket.accept()
     print("BCI hardware connected")
@@ -63,34 +126,57 @@ async def bci_commands(websocket: WebSocket):
             command_data = json.loads(data)
             
             command = command_data.get("command")
-            print(f"BCI Command: {command}")
-            
-            # Broadcast to all connected frontends
-            await manager.broadcast(json.dumps({
-                "action": command,
-                "timestamp": command_data.get("timestamp")
-            }))
+            seq = relay.publish(command, command_data.get("timestamp"))
+            print(f"BCI Command #{seq}: {command}")
             
     except WebSocketDisconnect:
         print("BCI hardware disconnected")
+    except Exception as e:
+        print(f"BCI WebSocket error: {e}")
+        await websocket.close()
 
 
 @app.websocket("/ws/frontend")
-async def frontend_connection(websocket: WebSocket):
+async def frontend_connection(
+    websocket: WebSocket,
+    client: str | None = None,
+    last_seq: int | None = None,
+    epoch: str | None = None
+):
     """
-    Frontend connects here to receive BCI commands
+    Frontend connects here to receive BCI commands: {"seq", "epoch", "action", "timestamp"}.
+    Connect with ?client=<stable id> (and optionally &last_seq=<n>&epoch=<e>) and
+    send {"ack": seq} after applying a command; on reconnect, commands after the
+    last ack are replayed. The relay opens with {"type": "hello", "epoch", "seq",
+    "resume_from"}, and sends {"type": "gap", "from", "to"} if some already left the buffer.
     """
-    await manager.connect(websocket)
-    print("Frontend connected")
+    await websocket.accept()
+    subscriber = relay.connect(websocket, client, last_seq, epoch)
+    print(f"Frontend connected ({client or 'anonymous'}), {len(relay.hub)} total")
     
     try:
         while True:
-            # Keep connection alive
-            await websocket.receive_text()
+            data = await websocket.receive_text()
+            if data == "ping":
+                subscriber.send("pong")
+                continue
+            try:
+                message = json.loads(data)
+                relay.ack(client, int(message["ack"]))
+            except (ValueError, KeyError, TypeError):
+                continue
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        relay.hub.unsubscribe(subscriber)
         print("Frontend disconnected")
 
+
+@app.get("/bci-stats")
+def bci_stats():
+    """Relay sequence, replay buffer and per-frontend fan-out counters."""
+    return relay.stats()
+
 @app.post("/clone-voice")
 async def clone_voice(name: str, audio_file: UploadFile = File(...)):
     """
@@ -151,37 +237,6 @@ async def text_to_speech(text: str, voice_id: str):
         print(f"TTS error: {e}")
         return {"status": "error", "message": str(e)}
 
-@app.websocket("/ws/bci")
-async def bci_commands(websocket: WebSocket):
-    """
-    WebSocket endpoint to receive BCI commands from hardware team
-    and forward to frontend
-    """
-    await websocket.accept()
-    print("BCI client connected")
-    
-    try:
-        while True:
-            # Receive command from BCI hardware team
-            data = await websocket.receive_text()
-            command_data = json.loads(data)
-            
-            command = command_data.get("command")  # "right", "down", or "select"
-            
-            print(f"BCI Command received: {command}")
-            
-            # Forward command to frontend
-            await websocket.send_text(json.dumps({
-                "action": command,
-                "timestamp": command_data.get("timestamp", None)
-            }))
-            
-    except WebSocketDisconnect:
-        print("BCI client disconnected")
-    except Exception as e:
-        print(f"BCI WebSocket error: {e}")
-        await websocket.close()
-
 @app.post("/speak-sentence")
 async def speak_sentence(text: str, voice_id: str):
     """
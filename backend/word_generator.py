@@ -7,12 +7,41 @@ import httpx
 from config import (
     OPENROUTER_API_KEY,
     OPENROUTER_MODEL,
+    OPENROUTER_HTTP2,
+    OPENROUTER_MAX_CONNECTIONS,
+    OPENROUTER_KEEPALIVE_EXPIRY,
+    OPENROUTER_KEEPALIVE_INTERVAL,
+    SHARDED_GENERATION,
     DEFAULT_SENTENCE_STARTERS,
     DEFAULT_CONTINUATION_WORDS
 )
 from models import ChatMessage
+from lexicon import Lexicon, context_tokens
+from cassette import upstream_transport
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
 WORD_COUNT = 15  # 15 words for 4x4 grid (1 slot reserved for refresh button)
+MAX_RETRIES = 2
+
+# Sharded generation: (name, word count, what to predict). Counts add up to WORD_COUNT
+# and merged results keep shard order, so the most likely words stay top-left.
+START_SHARDS = [
+    ("likely", 8, "most likely words to START a new sentence"),
+    ("alternatives", 7, "less common but useful words to START a new sentence, avoiding the most obvious choices"),
+]
+CONTINUATION_SHARDS = [
+    ("likely", 6, "most likely NEXT words to continue the sentence, without ending punctuation"),
+    ("ending", 4, "NEXT words that would END the sentence, each ending with . ! or ?"),
+    ("alternatives", 5, "less common but contextually appropriate NEXT words, avoiding the most obvious choices"),
+]
 
 # Extended fallback words to ensure grid is always filled (200+ words each)
 EXTENDED_STARTERS = [
@@ -76,6 +105,18 @@ class WordGenerator:
         self.level1_words: list[str] = []
         self.level2_words: dict[str, list[str]] = {}
         self.level2_excluded: dict[str, set[str]] = {}
+        self.lexicon = Lexicon()
+        self.keepalive_task: asyncio.Task | None = None
+        self.last_request_time: float = 0.0
+        self.connection_stats = {
+            "requests": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+            "last_connect_ms": None,
+            "max_connect_ms": 0,
+            "warmups": 0,
+            "http_version": None,
+        }
 
     def load_model(self):
         """Initialize the HTTP client for OpenRouter API calls."""
@@ -83,16 +124,141 @@ class WordGenerator:
             return
 
         print(f"Initializing OpenRouter client with model: {OPENROUTER_MODEL}")
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        use_http2 = OPENROUTER_HTTP2 and H2_AVAILABLE
+        if OPENROUTER_HTTP2 and not H2_AVAILABLE:
+            print("h2 not installed; OpenRouter client falling back to HTTP/1.1")
+        self.http_client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=use_http2,
+            limits=httpx.Limits(
+                max_connections=OPENROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENROUTER_MAX_CONNECTIONS,
+                keepalive_expiry=OPENROUTER_KEEPALIVE_EXPIRY,
+            ),
+            transport=upstream_transport("openrouter"),
+        )
         self.is_loaded = True
         print("OpenRouter client ready!")
 
+    def load_lexicon(self):
+        """Build the prefix index (spelling mode). Safe to run in a worker thread."""
+        lexicon = Lexicon()
+        lexicon.load(fallback_words=EXTENDED_STARTERS + EXTENDED_CONTINUATIONS)
+        self.lexicon = lexicon
+
+    def _make_trace(self, request_state: dict):
+        """httpcore trace hook for one request: notes TCP/TLS setup so cold-connection cost is visible."""
+        async def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.started":
+                request_state["connect_started"] = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                request_state["connect_ms"] = int((time.perf_counter() - request_state["connect_started"]) * 1000)
+        return trace
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send an OpenRouter request through the shared pool, recording connection reuse."""
+        request_state: dict = {}
+        response = await self.http_client.request(
+            method,
+            f"{OPENROUTER_BASE_URL}{path}",
+            headers={
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            extensions={"trace": self._make_trace(request_state)},
+            **kwargs
+        )
+        self.last_request_time = time.monotonic()
+        stats = self.connection_stats
+        stats["requests"] += 1
+        stats["http_version"] = response.http_version
+        if "connect_ms" in request_state:
+            stats["new_connections"] += 1
+            stats["last_connect_ms"] = request_state["connect_ms"]
+            stats["max_connect_ms"] = max(stats["max_connect_ms"], request_state["connect_ms"])
+        else:
+            stats["reused_connections"] += 1
+        return response
+
+    def start_warm_up(self):
+        """
+        Open the upstream connection (DNS, TCP, TLS) in the background before the first
+        prediction needs it, then keep it alive with periodic lightweight requests while idle.
+        """
+        if not self.is_loaded or not self.http_client or self.keepalive_task is not None:
+            return
+        self.keepalive_task = asyncio.create_task(self._keepalive_loop())
+
+    async def _ping(self):
+        start_time = time.perf_counter()
+        try:
+            response = await self._request("GET", "/auth/key")
+            self.connection_stats["warmups"] += 1
+            print(f"OpenRouter connection warm ({response.status_code}) in {int((time.perf_counter() - start_time) * 1000)}ms")
+        except Exception as e:
+            print(f"OpenRouter warm-up failed: {repr(e)}")
+
+    async def _keepalive_loop(self):
+        await self._ping()
+        if OPENROUTER_KEEPALIVE_INTERVAL <= 0:
+            return
+        while True:
+            await asyncio.sleep(OPENROUTER_KEEPALIVE_INTERVAL)
+            if time.monotonic() - self.last_request_time >= OPENROUTER_KEEPALIVE_INTERVAL:
+                await self._ping()
+
+    def get_connection_stats(self) -> dict:
+        return dict(self.connection_stats)
+
     async def close(self):
         if self.pending_cache_task:
             self.pending_cache_task.cancel()
+        if self.keepalive_task:
+            self.keepalive_task.cancel()
         if self.http_client:
             await self.http_client.aclose()
 
+    # Per-user navigation state; main.py syncs it through shared_state when running several workers
+    SESSION_FIELDS = (
+        "used_words", "refresh_excluded", "word_cache", "cache_context",
+        "two_step_predictions", "tree_context", "level1_words", "level2_words", "level2_excluded"
+    )
+
+    def session_state(self) -> dict:
+        """Session fields as JSON-serializable values (sets become sorted lists)."""
+        return {
+            "used_words": sorted(self.used_words),
+            "refresh_excluded": sorted(self.refresh_excluded),
+            "word_cache": list(self.word_cache),
+            "cache_context": list(self.cache_context),
+            "two_step_predictions": {k: list(v) for k, v in self.two_step_predictions.items()},
+            "tree_context": self.tree_context,
+            "level1_words": list(self.level1_words),
+            "level2_words": {k: list(v) for k, v in self.level2_words.items()},
+            "level2_excluded": {k: sorted(v) for k, v in self.level2_excluded.items()},
+        }
+
+    def restore_session(self, state: dict):
+        """Load the fields present in state (as produced by session_state)."""
+        if "used_words" in state:
+            self.used_words = set(state["used_words"])
+        if "refresh_excluded" in state:
+            self.refresh_excluded = set(state["refresh_excluded"])
+        if "word_cache" in state:
+            self.word_cache = list(state["word_cache"])
+        if "cache_context" in state:
+            self.cache_context = list(state["cache_context"])
+        if "two_step_predictions" in state:
+            self.two_step_predictions = {k: list(v) for k, v in state["two_step_predictions"].items()}
+        if "tree_context" in state:
+            self.tree_context = state["tree_context"]
+        if "level1_words" in state:
+            self.level1_words = list(state["level1_words"])
+        if "level2_words" in state:
+            self.level2_words = {k: list(v) for k, v in state["level2_words"].items()}
+        if "level2_excluded" in state:
+            self.level2_excluded = {k: set(v) for k, v in state["level2_excluded"].items()}
+
     def clear_used_words(self):
         """Clear used words when starting a new sentence."""
         self.used_words.clear()
@@ -117,8 +283,15 @@ class WordGenerator:
 
         return "\n".join(context_parts)
 
-    async def _generate_words(self, prompt: str, exclude_words: set[str] | None = None, retry_count: int = 0) -> list[str]:
-        """Generate words using OpenRouter API with Gemini Flash. Retries if fewer than 15 words returned."""
+    async def _generate_words(
+        self,
+        prompt: str,
+        exclude_words: set[str] | None = None,
+        retry_count: int = 0,
+        count: int = WORD_COUNT,
+        punctuation_hint: bool = True
+    ) -> list[str]:
+        """Generate words using OpenRouter API with Gemini Flash. Retries if fewer than count words returned."""
         if not self.is_loaded or not self.http_client:
             print("Client not initialized!")
             return []
@@ -129,24 +302,21 @@ class WordGenerator:
             exclude_list = f"\n\nIMPORTANT: Do NOT include any of these words (already used): {', '.join(list(exclude_words)[:50])}"
 
         context_snippet = prompt[-1024:]
+        hint = "\nSome words should end with punctuation (. ! ?) to allow sentence completion." if punctuation_hint else ""
 
         full_prompt = f"""You are an AAC word prediction assistant.
-You MUST respond with ONLY a JSON array of EXACTLY {WORD_COUNT} single words, in order of likelihood.
-Some words should end with punctuation (. ! ?) to allow sentence completion.
-No explanations, no markdown, just the raw JSON array with exactly {WORD_COUNT} words.{exclude_list}
+You MUST respond with ONLY a JSON array of EXACTLY {count} single words, in order of likelihood.{hint}
+No explanations, no markdown, just the raw JSON array with exactly {count} words.{exclude_list}
 
 Context:
 {context_snippet}
 
-Response (JSON array of exactly {WORD_COUNT} words):"""
+Response (JSON array of exactly {count} words):"""
 
         try:
-            response = await self.http_client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                },
+            response = await self._request(
+                "POST",
+                "/chat/completions",
                 json={
                     "model": OPENROUTER_MODEL,
                     "messages": [
@@ -171,12 +341,12 @@ Response (JSON array of exactly {WORD_COUNT} words):"""
                 words = [str(w).strip() for w in words if w and str(w).strip() and str(w).strip().lower() not in exclude_words]
                 print(f"Parsed {len(words)} words after filtering: {words}")
 
-                # If we got fewer than WORD_COUNT words and haven't retried too many times, retry
-                if len(words) < WORD_COUNT and retry_count < 2:
+                # If we got fewer than count words and haven't retried too many times, retry
+                if len(words) < count and retry_count < MAX_RETRIES:
                     print(f"Only got {len(words)} words, retrying (attempt {retry_count + 1})...")
                     # Add current words to exclusion to get different ones
                     new_exclude = exclude_words | {w.lower().rstrip('.!?') for w in words}
-                    more_words = await self._generate_words(prompt, new_exclude, retry_count + 1)
+                    more_words = await self._generate_words(prompt, new_exclude, retry_count + 1, count, punctuation_hint)
                     words.extend(more_words)
                     # Remove duplicates while preserving order
                     seen = set()
@@ -186,9 +356,9 @@ Response (JSON array of exactly {WORD_COUNT} words):"""
                         if w_lower not in seen and w_lower not in exclude_words:
                             seen.add(w_lower)
                             unique_words.append(w)
-                    return unique_words[:WORD_COUNT]
+                    return unique_words[:count]
 
-                return words[:WORD_COUNT]
+                return words[:count]
 
             print("No JSON array found in response")
             return []
@@ -198,6 +368,43 @@ Response (JSON array of exactly {WORD_COUNT} words):"""
             traceback.print_exc()
             return []
 
+    async def _generate_words_sharded(self, context: str, is_sentence_start: bool, exclude_words: set[str]) -> list[str]:
+        """
+        Split the grid into shards with disjoint instructions and request them concurrently,
+        so latency follows the slowest shard instead of one 15-word completion.
+        Results are merged in shard order and deduplicated; any shortfall is padded by the caller.
+        """
+        shards = START_SHARDS if is_sentence_start else CONTINUATION_SHARDS
+        prompts = [
+            (count, f"""Based on this context, predict the {count} {description}.
+Order from most likely (first) to least likely (last).
+
+{context}
+
+Respond with ONLY a JSON array of {count} words.""")
+            for _, count, description in shards
+        ]
+
+        start_time = time.perf_counter()
+        # No per-shard retries: a retry would serialize behind the slowest shard
+        results = await asyncio.gather(*(
+            self._generate_words(prompt, exclude_words, MAX_RETRIES, count, punctuation_hint=False)
+            for count, prompt in prompts
+        ))
+
+        seen = set()
+        words = []
+        for shard_words in results:
+            for w in shard_words:
+                w_lower = w.lower().rstrip('.!?')
+                if w_lower not in seen:
+                    seen.add(w_lower)
+                    words.append(w)
+        duration_ms = int((time.perf_counter() - start_time) * 1000)
+        counts = {name: len(r) for (name, _, _), r in zip(shards, results)}
+        print(f"Sharded generation: {counts} in {duration_ms}ms")
+        return words[:WORD_COUNT]
+
     def _filter_used_words(self, words: list[str]) -> list[str]:
         return [w for w in words if w.lower() not in self.used_words]
 
@@ -325,7 +532,10 @@ Respond with ONLY a JSON array of {WORD_COUNT} words."""
         base_exclude = self.used_words | {first_word.lower()}
         exclude = base_exclude | {w.lower() for w in previous}
 
-        words = await self._generate_words(prompt, exclude)
+        if SHARDED_GENERATION:
+            words = await self._generate_words_sharded(context, False, exclude)
+        else:
+            words = await self._generate_words(prompt, exclude)
         if not words:
             words = []
 
@@ -377,7 +587,9 @@ Respond with ONLY a JSON array of {WORD_COUNT} words."""
         exclude_set = set(self.refresh_excluded)  # Don't include used_words - allow reuse
         print(f"Total exclude_set size: {len(exclude_set)}")
 
-        if is_sentence_start:
+        if SHARDED_GENERATION:
+            display_words = await self._generate_words_sharded(context, is_sentence_start, exclude_set)
+        elif is_sentence_start:
             prompt = f"""Based on this conversation context, predict the {WORD_COUNT} most likely words to START a new sentence.
 Order from most likely (first) to least likely (last).
 
@@ -421,6 +633,39 @@ Respond with ONLY a JSON array of {WORD_COUNT} words."""
         print(f"=== Returning {len(display_words)} words in {duration_ms}ms ===\n")
         return display_words, cache_words, duration_ms
 
+    def generate_prefix_words(
+        self,
+        chat_history: list[ChatMessage],
+        current_sentence: list[str],
+        is_sentence_start: bool,
+        prefix: str,
+        is_refresh: bool = False
+    ) -> tuple[list[str], list[str], int]:
+        """
+        Spelling mode: words starting with prefix from the local lexicon, no LLM call.
+        Refreshing pages through further matches using the same refresh exclusions.
+        Only matching words are returned, so a rare prefix gives a partly empty grid.
+        """
+        start_time = time.perf_counter()
+
+        if not is_refresh:
+            self.refresh_excluded.clear()
+
+        prefix = prefix.strip().lower()
+        context_words = context_tokens([msg.text for msg in chat_history[-10:]] + current_sentence)
+        exclude_set = set(self.refresh_excluded)
+
+        words = self.lexicon.lookup(prefix, WORD_COUNT, exclude_set, context_words)
+        if is_sentence_start:
+            words = [w[:1].upper() + w[1:] for w in words]
+
+        for w in words:
+            self.refresh_excluded.add(w.lower())
+
+        duration_ms = int((time.perf_counter() - start_time) * 1000)
+        print(f"Prefix '{prefix}': {len(words)} lexicon matches in {duration_ms}ms")
+        return words, [], duration_ms
+
     def _get_alternative_starters(self, exclude: set[str]) -> list[str]:
         """Get alternative sentence starters not in exclude set."""
         alternatives = [
@@ -0,0 +1,11 @@
+/**
+ * Device/session id this tab belongs to. Gestures, transcriptions and the TTS voice
+ * are scoped to it, so several users can share one backend. Taken from ?device= in
+ * the page URL, then VITE_DEVICE_ID; detector and transcription scripts use DEVICE_ID.
+ */
+export const DEVICE_ID =
+  new URLSearchParams(window.location.search).get('device') ||
+  import.meta.env.VITE_DEVICE_ID ||
+  'default'
+
+export const DEVICE_QUERY = `device=${encodeURIComponent(DEVICE_ID)}`
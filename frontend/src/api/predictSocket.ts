@@ -0,0 +1,134 @@
+import type { WordRequest, WordResponse } from './wordApi'
+
+const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
+const PREDICT_WS_URL = `${API_BASE_URL.replace(/^http/, 'ws')}/ws/predict`
+// After a failed connect, calls fail fast (and callers use HTTP) for this long before retrying
+const RECONNECT_AFTER_MS = 5000
+
+type PredictOp = 'words' | 'refresh' | 'generate_cache' | 'reset_branch'
+
+interface PredictMessage {
+  id?: string
+  op: string
+  result?: unknown
+  error?: string
+  cancelled?: boolean
+}
+
+/** The socket could not deliver the call; the same request can be retried over HTTP. */
+export class PredictTransportError extends Error {}
+
+/** The server dropped the call because a newer grid request superseded it. */
+export class PredictCancelled extends Error {
+  constructor() {
+    super('cancelled')
+  }
+}
+
+interface Pending {
+  resolve: (value: unknown) => void
+  reject: (reason: Error) => void
+}
+
+/**
+ * One long-lived connection for all prediction calls.
+ * Each call is tagged with a request id; the server may also push
+ * cancellations (superseded grid requests) and prefetched cache words.
+ */
+export class PredictSocket {
+  private ws: WebSocket | null = null
+  private nextId = 1
+  private pending = new Map<string, Pending>()
+  private opening: Promise<WebSocket> | null = null
+  private failedAt = 0
+
+  onCache?: (cachedWords: string[]) => void
+
+  private open(): Promise<WebSocket> {
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+      return Promise.resolve(this.ws)
+    }
+    if (this.opening) {
+      return this.opening
+    }
+    if (Date.now() - this.failedAt < RECONNECT_AFTER_MS) {
+      return Promise.reject(new PredictTransportError('Predict WebSocket unavailable'))
+    }
+
+    this.opening = new Promise((resolve, reject) => {
+      const ws = new WebSocket(PREDICT_WS_URL)
+
+      ws.onopen = () => {
+        this.ws = ws
+        this.opening = null
+        resolve(ws)
+      }
+
+      ws.onmessage = (event) => {
+        if (event.data === 'pong') return
+        const message: PredictMessage = JSON.parse(event.data)
+
+        if (message.op === 'cache' && !message.id) {
+          const result = message.result as { cached_words: string[] }
+          this.onCache?.(result.cached_words)
+          return
+        }
+
+        const entry = message.id ? this.pending.get(message.id) : undefined
+        if (!entry || !message.id) return
+        this.pending.delete(message.id)
+
+        if (message.cancelled) {
+          entry.reject(new PredictCancelled())
+        } else if (message.error) {
+          entry.reject(new Error(message.error))
+        } else {
+          entry.resolve(message.result)
+        }
+      }
+
+      ws.onclose = () => {
+        this.ws = null
+        this.opening = null
+        this.pending.forEach((entry) => entry.reject(new PredictTransportError('Predict WebSocket closed')))
+        this.pending.clear()
+      }
+
+      ws.onerror = () => {
+        this.opening = null
+        this.failedAt = Date.now()
+        reject(new PredictTransportError('Predict WebSocket connection failed'))
+      }
+    })
+
+    return this.opening
+  }
+
+  async call<T>(op: PredictOp, params: object): Promise<T> {
+    const ws = await this.open()
+    const id = String(this.nextId++)
+    const result = new Promise<T>((resolve, reject) => {
+      this.pending.set(id, { resolve: resolve as (value: unknown) => void, reject })
+    })
+    ws.send(JSON.stringify({ id, op, params }))
+    return result
+  }
+
+  words(request: WordRequest, prefetchCache = false): Promise<WordResponse> {
+    return this.call('words', { ...request, prefetch_cache: prefetchCache })
+  }
+
+  refresh(request: WordRequest): Promise<WordResponse> {
+    return this.call('refresh', request)
+  }
+
+  generateCache(request: WordRequest): Promise<{ cached_words: string[] }> {
+    return this.call('generate_cache', request)
+  }
+
+  resetBranch(request: WordRequest & { first_word: string }): Promise<{ words: string[] }> {
+    return this.call('reset_branch', request)
+  }
+}
+
+export const predictSocket = new PredictSocket()
@@ -1,3 +1,6 @@
+import { DEVICE_ID } from './device'
+import { predictSocket, PredictCancelled, PredictTransportError } from './predictSocket'
+
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
 export interface ChatMessage {
@@ -9,6 +12,8 @@ export interface WordRequest {
   chat_history: ChatMessage[]
   current_sentence: string[]
   is_sentence_start: boolean
+  prefix?: string
+  device?: string  // Speculative speech for the grid uses this device's voice
 }
 
 export interface WordResponse {
@@ -18,7 +23,28 @@ export interface WordResponse {
   two_step_time_ms?: number
 }
 
-export async function fetchWords(request: WordRequest): Promise<WordResponse> {
+export function isCancelled(error: unknown): boolean {
+  return error instanceof PredictCancelled
+}
+
+// Prediction calls go over the /ws/predict socket; HTTP only when the socket can't be reached
+async function overSocket<T>(call: () => Promise<T>, fallback: () => Promise<T>): Promise<T> {
+  try {
+    return await call()
+  } catch (error) {
+    if (error instanceof PredictTransportError) {
+      return fallback()
+    }
+    throw error
+  }
+}
+
+export function fetchWords(request: WordRequest): Promise<WordResponse> {
+  request = { ...request, device: DEVICE_ID }
+  return overSocket(() => predictSocket.words(request), () => fetchWordsHttp(request))
+}
+
+async function fetchWordsHttp(request: WordRequest): Promise<WordResponse> {
   const response = await fetch(`${API_BASE_URL}/api/words`, {
     method: 'POST',
     headers: {
@@ -34,7 +60,12 @@ export async function fetchWords(request: WordRequest): Promise<WordResponse> {
   return response.json()
 }
 
-export async function refreshWords(request: WordRequest): Promise<WordResponse> {
+export function refreshWords(request: WordRequest): Promise<WordResponse> {
+  request = { ...request, device: DEVICE_ID }
+  return overSocket(() => predictSocket.refresh(request), () => refreshWordsHttp(request))
+}
+
+async function refreshWordsHttp(request: WordRequest): Promise<WordResponse> {
   const response = await fetch(`${API_BASE_URL}/api/refresh`, {
     method: 'POST',
     headers: {
@@ -52,13 +83,16 @@ export async function refreshWords(request: WordRequest): Promise<WordResponse>
 
 export async function generateCacheInBackground(request: WordRequest): Promise<void> {
   // Fire and forget - don't wait for response
-  fetch(`${API_BASE_URL}/api/generate-cache`, {
-    method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-    },
-    body: JSON.stringify(request),
-  }).catch(err => console.error('Background cache generation failed:', err))
+  overSocket(
+    () => predictSocket.generateCache(request),
+    () => fetch(`${API_BASE_URL}/api/generate-cache`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(request),
+    })
+  ).catch(err => console.error('Background cache generation failed:', err))
 }
 
 export async function getCache(): Promise<{ cached_words: string[], used_words: string[] }> {
@@ -73,7 +107,11 @@ export async function clearUsedWords(): Promise<void> {
   await fetch(`${API_BASE_URL}/api/clear-used`, { method: 'POST' })
 }
 
-export async function resetBranch(request: WordRequest & { first_word: string }): Promise<{ words: string[] }> {
+export function resetBranch(request: WordRequest & { first_word: string }): Promise<{ words: string[] }> {
+  return overSocket(() => predictSocket.resetBranch(request), () => resetBranchHttp(request))
+}
+
+async function resetBranchHttp(request: WordRequest & { first_word: string }): Promise<{ words: string[] }> {
   const response = await fetch(`${API_BASE_URL}/api/reset-branch`, {
     method: 'POST',
     headers: {
@@ -98,11 +136,21 @@ export async function checkHealth(): Promise<boolean> {
   }
 }
 
+const CLONE_POLL_INTERVAL_MS = 1000
+
+interface CloneJob {
+  job_id: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  voice_id: string | null
+  error: string | null
+}
+
 export async function cloneVoiceFromFile(file: File): Promise<string> {
   const formData = new FormData()
   const name = file.name.replace(/\.[^/.]+$/, '') || 'user-voice'
   formData.append('name', name)
   formData.append('audio_file', file)
+  formData.append('device', DEVICE_ID)
 
   const response = await fetch(`${API_BASE_URL}/api/clone-voice`, {
     method: 'POST',
@@ -113,22 +161,26 @@ export async function cloneVoiceFromFile(file: File): Promise<string> {
     throw new Error(`Failed to clone voice: ${response.statusText}`)
   }
 
-  const data = await response.json()
-
-  if (!data.voice_id) {
-    throw new Error('Clone voice response did not include voice_id')
-  }
-
-  return data.voice_id as string
-}
-
-export async function setActiveVoice(voiceId: string): Promise<void> {
-  const response = await fetch(`${API_BASE_URL}/api/set-voice?voice_id=${encodeURIComponent(voiceId)}`, {
-    method: 'POST'
-  })
-
-  if (!response.ok) {
-    throw new Error(`Failed to set active voice: ${response.statusText}`)
+  const { job_id: jobId } = await response.json()
+
+  // Cloning runs as a background job on the server; poll until it finishes
+  for (;;) {
+    await new Promise((resolve) => setTimeout(resolve, CLONE_POLL_INTERVAL_MS))
+    const statusResponse = await fetch(`${API_BASE_URL}/api/clone-voice/${jobId}`)
+    if (!statusResponse.ok) {
+      throw new Error(`Failed to get clone status: ${statusResponse.statusText}`)
+    }
+
+    const job: CloneJob = await statusResponse.json()
+    if (job.status === 'failed') {
+      throw new Error(`Failed to clone voice: ${job.error}`)
+    }
+    if (job.status === 'succeeded') {
+      if (!job.voice_id) {
+        throw new Error('Clone voice job did not include voice_id')
+      }
+      return job.voice_id
+    }
   }
 }
 
@@ -138,16 +190,53 @@ export async function speakSentence(text: string): Promise<void> {
     headers: {
       'Content-Type': 'application/json',
     },
-    body: JSON.stringify({ text }),
+    body: JSON.stringify({ text, device: DEVICE_ID }),
   })
 
   if (!response.ok) {
     throw new Error(`Failed to speak sentence: ${response.statusText}`)
   }
 
+  // Start playback on the first chunk where the browser can append MP3 to a MediaSource
+  if (response.body && 'MediaSource' in window && MediaSource.isTypeSupported('audio/mpeg')) {
+    await playAudioStream(response.body)
+    return
+  }
+
   const audioData = await response.arrayBuffer()
   const blob = new Blob([audioData], { type: 'audio/mpeg' })
   const url = URL.createObjectURL(blob)
   const audio = new Audio(url)
   audio.play().catch(() => {})
 }
+
+async function playAudioStream(body: ReadableStream<Uint8Array>): Promise<void> {
+  const mediaSource = new MediaSource()
+  const audio = new Audio(URL.createObjectURL(mediaSource))
+
+  await new Promise<void>((resolve) => {
+    mediaSource.addEventListener('sourceopen', () => resolve(), { once: true })
+  })
+
+  const sourceBuffer = mediaSource.addSourceBuffer('audio/mpeg')
+  const append = (chunk: Uint8Array) => new Promise<void>((resolve) => {
+    sourceBuffer.addEventListener('updateend', () => resolve(), { once: true })
+    sourceBuffer.appendBuffer(chunk)
+  })
+
+  const reader = body.getReader()
+  let started = false
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    await append(value)
+    if (!started) {
+      started = true
+      audio.play().catch(() => {})
+    }
+  }
+
+  if (mediaSource.readyState === 'open') {
+    mediaSource.endOfStream()
+  }
+}
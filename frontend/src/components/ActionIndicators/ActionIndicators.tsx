@@ -1,6 +1,6 @@
 import { useRef, useState } from 'react'
 import { useClenchStore } from '../../stores/useClenchStore'
-import { cloneVoiceFromFile, setActiveVoice } from '../../api/wordApi'
+import { cloneVoiceFromFile } from '../../api/wordApi'
 import { IndicatorLight } from './IndicatorLight'
 import styles from './ActionIndicators.module.css'
 
@@ -31,8 +31,8 @@ export function ActionIndicators() {
     setStatus('processing')
 
     try {
-      const voiceId = await cloneVoiceFromFile(file)
-      await setActiveVoice(voiceId)
+      // The server activates the cloned voice itself once the job succeeds
+      await cloneVoiceFromFile(file)
       setStatus('done')
     } catch (error) {
       console.error('Failed to clone voice from file:', error)
@@ -1,6 +1,15 @@
 import { useEffect, useCallback, useRef } from 'react'
 import { useGridStore } from '../stores/useGridStore'
 import { useClenchStore } from '../stores/useClenchStore'
+import { DEVICE_QUERY } from '../api/device'
+
+// Clock probes for latency tracing: offset = backend clock - our clock, from the lowest-RTT recent probe
+const CLOCK_SYNC_INTERVAL_MS = 10000
+const CLOCK_SYNC_SAMPLES = 8
+
+function monotonicSeconds() {
+  return performance.now() / 1000
+}
 
 interface UseSignalListenerOptions {
   enabled?: boolean
@@ -12,6 +21,7 @@ export function useSignalListener(options: UseSignalListenerOptions = {}) {
   const { enabled = true, onAction, onSelect } = options
 
   const moveRight = useGridStore((state) => state.moveRight)
+  const moveLeft = useGridStore((state) => state.moveLeft)
   const moveDown = useGridStore((state) => state.moveDown)
   const triggerClench = useClenchStore((state) => state.triggerClench)
 
@@ -21,8 +31,11 @@ export function useSignalListener(options: UseSignalListenerOptions = {}) {
   const lastRightTimeRef = useRef(0)
   const lastDownTimeRef = useRef(0)
   const lastSelectTimeRef = useRef(0)
+  // The last RIGHT applied (its trace and the cell it moved to), so a CORRECT_DOWN can undo it
+  const lastRightRef = useRef<{ trace?: string; target: number } | null>(null)
+  const clockSamplesRef = useRef<{ rtt: number; offset: number }[]>([])
 
-  const handleSignal = useCallback((action: string) => {
+  const handleSignal = useCallback((action: string, trace?: string, corrects?: string): boolean => {
     console.log(`Signal received: ${action}`)
 
     const now = Date.now()
@@ -32,49 +45,110 @@ export function useSignalListener(options: UseSignalListenerOptions = {}) {
       case 'RIGHT':
         if (now - lastRightTimeRef.current < cooldownMs) {
           console.log('RIGHT ignored due to cooldown')
-          return
+          // A CORRECT_DOWN for this RIGHT must not undo the earlier one
+          lastRightRef.current = null
+          return false
         }
         lastRightTimeRef.current = now
         // Same as pressing ArrowRight or '1'
         triggerClench(1)
         moveRight()
+        lastRightRef.current = { trace, target: useGridStore.getState().cursorPosition }
         onAction?.('right')
-        break
+        return true
+
+      case 'CORRECT_DOWN':
+        // Speculative mode: the RIGHT we just applied was the first clench of a double.
+        // Undo it only if it is the RIGHT being corrected (detectors name it by trace)
+        // and the cursor hasn't moved since (e.g. the grid was reset meanwhile).
+        const lastRight = lastRightRef.current
+        if (
+          lastRight &&
+          (corrects === undefined || lastRight.trace === corrects) &&
+          lastRight.target === useGridStore.getState().cursorPosition
+        ) {
+          moveLeft()
+        }
+        lastRightRef.current = null
+        if (now - lastDownTimeRef.current < cooldownMs) {
+          console.log('CORRECT_DOWN ignored due to cooldown')
+          return false
+        }
+        lastDownTimeRef.current = now
+        triggerClench(2)
+        moveDown()
+        onAction?.('down')
+        return true
 
       case 'DOWN':
         if (now - lastDownTimeRef.current < cooldownMs) {
           console.log('DOWN ignored due to cooldown')
-          return
+          return false
         }
         lastDownTimeRef.current = now
+        lastRightRef.current = null
         // Same as pressing ArrowDown or '2'
         triggerClench(2)
         moveDown()
         onAction?.('down')
-        break
+        return true
 
       case 'SELECT':
         if (now - lastSelectTimeRef.current < cooldownMs) {
           console.log('SELECT ignored due to cooldown')
-          return
+          return false
         }
         lastSelectTimeRef.current = now
+        lastRightRef.current = null
         // Same as pressing '3'
         triggerClench(3)
         onSelect?.()
         onAction?.('select')
-        break
+        return true
 
       default:
         console.warn(`Unknown signal action: ${action}`)
+        return false
     }
-  }, [moveRight, moveDown, triggerClench, onAction, onSelect])
+  }, [moveRight, moveLeft, moveDown, triggerClench, onAction, onSelect])
 
   useEffect(() => {
     if (!enabled) return
 
-    const wsUrl = 'ws://localhost:8000/ws/signals'
+    const wsUrl = `ws://localhost:8000/ws/signals?${DEVICE_QUERY}`
     let pingInterval: number | null = null
+    let clockInterval: number | null = null
+
+    const probeClock = (ws: WebSocket) => {
+      if (ws.readyState === WebSocket.OPEN) {
+        ws.send(JSON.stringify({ type: 'clock', t0: monotonicSeconds() }))
+      }
+    }
+
+    const clockOffset = (): number | null => {
+      const samples = clockSamplesRef.current
+      if (samples.length === 0) return null
+      return samples.reduce((best, sample) => (sample.rtt < best.rtt ? sample : best)).offset
+    }
+
+    // Ack once the highlight move has been painted: next frame, then after that frame's paint.
+    // The backend's stage stamps are echoed back so whichever worker gets the ack can record the trace.
+    const acknowledge = (ws: WebSocket, trace: string, stamps: Record<string, number>, delivered: number) => {
+      requestAnimationFrame(() => {
+        setTimeout(() => {
+          const offset = clockOffset()
+          if (offset === null || ws.readyState !== WebSocket.OPEN) return
+          ws.send(JSON.stringify({
+            type: 'ack',
+            trace,
+            stamps,
+            delivered,
+            rendered: monotonicSeconds(),
+            clock_offset: offset
+          }))
+        }, 0)
+      })
+    }
 
     const connect = () => {
       if (wsRef.current && (
@@ -100,13 +174,22 @@ export function useSignalListener(options: UseSignalListenerOptions = {}) {
             clearTimeout(reconnectTimeoutRef.current)
             reconnectTimeoutRef.current = null
           }
+          clockSamplesRef.current = []
+          for (let i = 0; i < 3; i++) probeClock(ws)
         }
 
         ws.onmessage = (event) => {
+          const received = monotonicSeconds()
           try {
             const data = JSON.parse(event.data)
-            if (data.action) {
-              handleSignal(data.action)
+            if (data.type === 'clock') {
+              const samples = clockSamplesRef.current
+              samples.push({ rtt: received - data.t0, offset: data.t1 - (data.t0 + received) / 2 })
+              if (samples.length > CLOCK_SYNC_SAMPLES) samples.shift()
+            } else if (data.action) {
+              if (handleSignal(data.action, data.trace, data.corrects) && data.trace) {
+                acknowledge(ws, data.trace, data.stamps ?? {}, received)
+              }
             }
           } catch (e) {
             if (event.data !== 'pong') {
@@ -136,6 +219,7 @@ export function useSignalListener(options: UseSignalListenerOptions = {}) {
             ws.send('ping')
           }
         }, 30000)
+        clockInterval = window.setInterval(() => probeClock(ws), CLOCK_SYNC_INTERVAL_MS)
       } catch (error) {
         console.error('Failed to create WebSocket:', error)
         isConnectingRef.current = false
@@ -149,6 +233,9 @@ export function useSignalListener(options: UseSignalListenerOptions = {}) {
       if (pingInterval !== null) {
         clearInterval(pingInterval)
       }
+      if (clockInterval !== null) {
+        clearInterval(clockInterval)
+      }
       if (reconnectTimeoutRef.current !== null) {
         clearTimeout(reconnectTimeoutRef.current)
         reconnectTimeoutRef.current = null
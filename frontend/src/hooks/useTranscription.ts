@@ -1,5 +1,6 @@
 import { useEffect, useRef, useCallback, useState } from 'react'
 import { useChatStore } from '../stores/useChatStore'
+import { DEVICE_QUERY } from '../api/device'
 
 let muteUntilTimestamp = 0
 
@@ -42,7 +43,7 @@ export function useTranscription(options: UseTranscriptionOptions = {}) {
   useEffect(() => {
     if (!enabled) return
 
-    const wsUrl = 'ws://localhost:8000/ws/transcription'
+    const wsUrl = `ws://localhost:8000/ws/transcription?${DEVICE_QUERY}`
     let reconnectTimeout: number | null = null
     let pingInterval: number | null = null
 
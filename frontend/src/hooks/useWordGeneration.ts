@@ -1,7 +1,7 @@
 import { useEffect, useCallback } from 'react'
 import { useGridStore } from '../stores/useGridStore'
 import { useChatStore } from '../stores/useChatStore'
-import { checkHealth, refreshWords, ChatMessage as ApiChatMessage } from '../api/wordApi'
+import { checkHealth, refreshWords, isCancelled, ChatMessage as ApiChatMessage } from '../api/wordApi'
 
 export function useWordGeneration() {
   const fetchNewWords = useGridStore((state) => state.fetchNewWords)
@@ -113,7 +113,9 @@ export function useWordGeneration() {
       setLookahead(response.two_step_predictions || {})
       setGenerationTime(response.two_step_time_ms || null)
     } catch (error) {
-      console.error('Failed to refresh words:', error)
+      if (!isCancelled(error)) {
+        console.error('Failed to refresh words:', error)
+      }
     } finally {
       setLoading(false)
     }
@@ -1,5 +1,5 @@
 import { create } from 'zustand'
-import { fetchWords, refreshWords, ChatMessage as ApiChatMessage } from '../api/wordApi'
+import { fetchWords, refreshWords, isCancelled, ChatMessage as ApiChatMessage } from '../api/wordApi'
 import { sentenceStarters } from '../data/sentenceStarters'
 
 type GridMode = 'normal' | 'sentence-start'
@@ -15,6 +15,7 @@ interface GridState {
   generationTime: number | null
 
   moveRight: () => void
+  moveLeft: () => void
   moveDown: () => void
   refreshGrid: () => void
   setMode: (mode: GridMode) => void
@@ -58,6 +59,14 @@ export const useGridStore = create<GridState>((set, get) => ({
     return { cursorPosition: row * GRID_SIZE + newCol }
   }),
 
+  // Undoes moveRight (used when a speculative single clench turns out to be a double)
+  moveLeft: () => set((state) => {
+    const col = state.cursorPosition % GRID_SIZE
+    const row = Math.floor(state.cursorPosition / GRID_SIZE)
+    const newCol = (col + GRID_SIZE - 1) % GRID_SIZE
+    return { cursorPosition: row * GRID_SIZE + newCol }
+  }),
+
   moveDown: () => set((state) => {
     const row = Math.floor(state.cursorPosition / GRID_SIZE)
     const col = state.cursorPosition % GRID_SIZE
@@ -147,6 +156,8 @@ export const useGridStore = create<GridState>((set, get) => ({
         mode: isSentenceStart ? 'sentence-start' : 'normal'
       })
     } catch (error) {
+      // Superseded by a newer grid request, which will fill the grid
+      if (isCancelled(error)) return
       console.error('Failed to fetch words from backend:', error)
       set({
         isLoading: false,